@@ -0,0 +1,184 @@
+import asyncio
+import contextlib
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return "429" in text or "resourceexhausted" in text or "resource exhausted" in text or "rate limit" in text
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    An AIMD concurrency limit driven by observed latency and errors.
+
+    Each completed call records its latency and whether it failed. Every
+    `window_size` samples the limiter compares the window's p50 latency with a
+    baseline: the lowest window p50 among the last `baseline_windows`
+    windows, so the baseline follows slow drift over the day:
+
+    * error rate above `error_threshold`, any rate-limit error, or p50 above
+      `baseline * latency_tolerance` → multiply the limit by `backoff_ratio`;
+    * otherwise, if callers were actually held back by the limit during the
+      window → add 1 to the limit.
+
+    Use `with limiter.acquire():` around blocking calls or
+    `async with limiter.acquire_async():` inside coroutines.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        window_size: int = 20,
+        latency_tolerance: float = 1.5,
+        error_threshold: float = 0.1,
+        backoff_ratio: float = 0.7,
+        baseline_windows: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window_size = window_size
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.backoff_ratio = backoff_ratio
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._limit = max(min_limit, min(initial_limit, max_limit))
+        self._inflight = 0
+        self._saturated = False
+        self._window_latencies: List[float] = []
+        self._window_errors = 0
+        self._window_rate_limited = False
+        self._window_p50s: Deque[float] = deque(maxlen=baseline_windows)
+        self._last = {"p50_ms": None, "baseline_p50_ms": None, "error_rate": 0.0}
+        self._increases = 0
+        self._decreases = 0
+        self._total_calls = 0
+        self._total_errors = 0
+        self._last_decrease_at = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @contextlib.contextmanager
+    def acquire(self):
+        with self._condition:
+            while self._inflight >= self._limit:
+                self._saturated = True
+                self._condition.wait()
+            self._take_slot()
+        start = self._clock()
+        try:
+            yield
+        except BaseException as e:
+            self.release(self._clock() - start, error=e)
+            raise
+        self.release(self._clock() - start)
+
+    @contextlib.asynccontextmanager
+    async def acquire_async(self, poll_interval: float = 0.005):
+        delay = poll_interval
+        while not self.try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        start = self._clock()
+        try:
+            yield
+        except BaseException as e:
+            self.release(self._clock() - start, error=e)
+            raise
+        self.release(self._clock() - start)
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._inflight >= self._limit:
+                self._saturated = True
+                return False
+            self._take_slot()
+            return True
+
+    def release(self, latency: float, error: Optional[BaseException] = None):
+        """Frees a slot taken by `try_acquire` and records the call's outcome."""
+        with self._condition:
+            self._inflight -= 1
+            if isinstance(error, Exception):
+                self._record(latency, error)
+            elif error is None:
+                self._record(latency, None)
+            # Cancellations (BaseException) free the slot without counting as a sample.
+            self._condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "limit": self._limit,
+                "inflight": self._inflight,
+                **self._last,
+                "increases": self._increases,
+                "decreases": self._decreases,
+                "total_calls": self._total_calls,
+                "total_errors": self._total_errors,
+            }
+
+    def _take_slot(self):
+        self._inflight += 1
+        if self._inflight >= self._limit:
+            self._saturated = True
+
+    def _record(self, latency: float, error: Optional[Exception]):
+        self._total_calls += 1
+        if error is not None:
+            self._total_errors += 1
+            self._window_errors += 1
+            # Like TCP, back off once per burst: calls started before the last
+            # decrease were sent under the old limit and do not trigger another.
+            if is_rate_limit_error(error) and self._clock() - latency >= self._last_decrease_at:
+                self._window_rate_limited = True
+        else:
+            self._window_latencies.append(latency)
+
+        samples = len(self._window_latencies) + self._window_errors
+        if self._window_rate_limited or samples >= self.window_size:
+            self._adjust(samples)
+
+    def _adjust(self, samples: int):
+        error_rate = self._window_errors / samples if samples else 0.0
+        p50 = statistics.median(self._window_latencies) if self._window_latencies else None
+        baseline = min(self._window_p50s) if self._window_p50s else p50
+        if p50 is not None:
+            self._window_p50s.append(p50)
+
+        overloaded = (
+            self._window_rate_limited
+            or error_rate > self.error_threshold
+            or (p50 is not None and baseline and p50 > baseline * self.latency_tolerance)
+        )
+        if overloaded:
+            new_limit = max(self.min_limit, math.floor(self._limit * self.backoff_ratio))
+            if new_limit < self._limit:
+                self._decreases += 1
+            self._limit = new_limit
+            self._last_decrease_at = self._clock()
+        elif self._saturated and self._limit < self.max_limit:
+            self._limit += 1
+            self._increases += 1
+
+        self._last = {
+            "p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "baseline_p50_ms": None if baseline is None else round(baseline * 1000, 1),
+            "error_rate": round(error_rate, 3),
+        }
+        self._window_latencies = []
+        self._window_errors = 0
+        self._window_rate_limited = False
+        self._saturated = self._inflight >= self._limit
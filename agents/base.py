@@ -1,29 +1,241 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, Optional, TypeVar, Generic
 import os
+import threading
+import profiling
+from prompt_registry import PromptSnapshot, get_registry
+from single_flight import SingleFlight, fingerprint
 
 InputType = TypeVar("InputType")
 OutputType = TypeVar("OutputType")
 
+_run_flight = SingleFlight("agent.run")
+
+# Agent class name -> prompt version, for the runs inside `record_prompt_versions`.
+_used_prompt_versions: ContextVar[Optional[Dict[str, str]]] = ContextVar("used_prompt_versions", default=None)
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    """The templates an agent built from one prompt snapshot. Replaced as a whole, never mutated."""
+    version: Optional[str]
+    templates: SimpleNamespace
+
+
+@contextmanager
+def record_prompt_versions():
+    """
+    Collects the prompt version each agent actually used for the runs,
+    prompts and async runs made inside the block (including threads and
+    tasks started from it). Yields a dict of agent class name -> version.
+    """
+    used: Dict[str, str] = {}
+    token = _used_prompt_versions.set(used)
+    try:
+        yield used
+    finally:
+        _used_prompt_versions.reset(token)
+
+
+def describe_prompt_versions(used: Dict[str, str]) -> Optional[str]:
+    """One version if every agent used the same one, otherwise "Agent:version,..." per agent."""
+    versions = set(used.values())
+    if len(versions) <= 1:
+        return next(iter(versions), None)
+    return ",".join(f"{name}:{version}" for name, version in sorted(used.items()))
+
 
 class BaseAgent(ABC, Generic[InputType, OutputType]):
+    """
+    Base class for all agents.
+
+    Construction is cheap: the LLM client, parser and prompt template are built
+    by `_initialize_agent` on the first call to `run`, so importing or creating
+    an agent does not pay for client setup or prompt loading.
+
+    Concurrent `run` calls on the same agent class with identical inputs are
+    coalesced into one execution (see `single_flight.SingleFlight`) when the
+    agent's model settings are deterministic; see `_coalesces`.
+
+    Prompt files are read from the shared `prompt_registry` snapshot by
+    `_load_prompts`, which returns the templates it built. When the registry
+    picks up edited prompts, the next call builds a new `PromptSet` and
+    publishes it only if every template loaded; `prompt_version` names the
+    version in use. A call keeps the templates it started with, even if a
+    newer version is published while it runs.
+    """
+
     def __init__(self):
-        print(f"Initializing {self.__class__.__name__}...")
-        self._initialize_agent()
-        print(f"✅ {self.__class__.__name__} initialized.")
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._prompt_set = PromptSet(None, SimpleNamespace())
+        self._pinned = threading.local()
+        self._loading_snapshot = None
+        self._rejected_prompt_version = None
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def templates(self) -> SimpleNamespace:
+        """The templates `_load_prompts` returned, as attributes."""
+        return self._current_prompts().templates
+
+    @property
+    def prompt_version(self) -> Optional[str]:
+        return self._current_prompts().version
+
+    def ensure_initialized(self):
+        """Builds the agent's client and prompt if that has not happened yet."""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            print(f"Initializing {self.__class__.__name__}...")
+            self._initialize_agent()
+            self._apply_prompts(get_registry().current())
+            self._initialized = True
+            print(f"✅ {self.__class__.__name__} initialized.")
+
+    def refresh_prompts(self):
+        """Rebuilds the prompt templates if the registry holds a newer prompt version."""
+        snapshot = get_registry().current()
+        if snapshot.version in (self._prompt_set.version, self._rejected_prompt_version):
+            return
+        with self._init_lock:
+            if snapshot.version in (self._prompt_set.version, self._rejected_prompt_version):
+                return
+            try:
+                self._apply_prompts(snapshot)
+                print(f"🔄 {self.__class__.__name__} now uses prompt version {snapshot.version}.")
+            except Exception as e:
+                # Keep serving the previous templates until the prompt files are fixed.
+                self._rejected_prompt_version = snapshot.version
+                print(f"Warning: {self.__class__.__name__} could not load prompt version {snapshot.version}: {e}")
+
+    def run(self, inputs: InputType) -> OutputType:
+        self.ensure_initialized()
+        self.refresh_prompts()
+        prompts = self._use_prompts()
+        key = (self._flight_scope(), prompts.version, fingerprint(inputs))
+
+        def execute():
+            with self._pin_prompts(prompts):
+                return self._run(inputs)
+
+        with profiling.stage(f"{self.__class__.__name__}.run"):
+            if not self._coalesces(inputs):
+                return execute()
+            return _run_flight.do(key, execute)
+
+    async def arun(self, inputs: InputType) -> OutputType:
+        """
+        Async counterpart of `run` for agents that make a single model call.
+        Cancelling the awaiting task cancels the model call in flight.
+        """
+        import asyncio
+
+        # The coroutine shares the event loop thread with other tasks, so only
+        # the synchronous render and parse steps get CPU times and stack samples.
+        with profiling.stage(f"{self.__class__.__name__}.arun", cpu=False):
+            if not self._initialized:
+                await asyncio.to_thread(self.ensure_initialized)
+            self.refresh_prompts()
+            prompts = self._use_prompts()
+            with profiling.stage("render"), self._pin_prompts(prompts):
+                prompt = self._build_prompt(inputs)
+            llm_output = await self.llm_client.ainvoke(prompt)
+            with profiling.stage("parse"), self._pin_prompts(prompts):
+                return self._parse_output(llm_output, inputs)
+
+    def build_prompt(self, inputs: InputType) -> str:
+        """Renders the prompt `run` would send for `inputs` without calling the model."""
+        self.ensure_initialized()
+        self.refresh_prompts()
+        with self._pin_prompts(self._use_prompts()):
+            return self._build_prompt(inputs)
+
+    def parse_output(self, llm_output: str, inputs: InputType) -> OutputType:
+        """Turns a raw model response to `build_prompt(inputs)` into the agent's output."""
+        self.ensure_initialized()
+        return self._parse_output(llm_output, inputs)
+
+    def _flight_scope(self) -> str:
+        """Agents whose output depends on constructor arguments should include them here."""
+        return self.__class__.__name__
+
+    def _coalesces(self, inputs: InputType) -> bool:
+        """
+        Whether concurrent identical runs may share one execution. Only when
+        the model client is deterministic: sampled runs are expected to differ.
+        """
+        return getattr(getattr(self, "llm_client", None), "coalesces", False)
 
     @abstractmethod
     def _initialize_agent(self):
         pass
 
+    def _load_prompts(self) -> dict:
+        """
+        Builds prompt templates with `_read_file`/`_load_examples` and returns
+        them by name; they are read back as `self.templates.<name>`. Agents
+        without prompts skip this.
+        """
+        return {}
+
+    def _apply_prompts(self, snapshot: PromptSnapshot):
+        # Runs under `_init_lock`. Nothing is published until every template
+        # has been built, so a failure leaves the previous set in place.
+        self._loading_snapshot = snapshot
+        try:
+            templates = self._load_prompts()
+        finally:
+            self._loading_snapshot = None
+        self._prompt_set = PromptSet(snapshot.version, SimpleNamespace(**templates))
+
+    def _current_prompts(self) -> PromptSet:
+        return getattr(self._pinned, "prompts", None) or self._prompt_set
+
+    def _use_prompts(self) -> PromptSet:
+        """The prompt set for a new call, recorded for `record_prompt_versions`."""
+        prompts = self._current_prompts()
+        used = _used_prompt_versions.get()
+        if used is not None and vars(prompts.templates):
+            used[self.__class__.__name__] = prompts.version
+        return prompts
+
+    @contextmanager
+    def _pin_prompts(self, prompts: PromptSet):
+        """Makes `templates` return `prompts` in this thread for the duration of the block."""
+        previous = getattr(self._pinned, "prompts", None)
+        self._pinned.prompts = prompts
+        try:
+            yield
+        finally:
+            self._pinned.prompts = previous
+
     @abstractmethod
-    def run(self, inputs: InputType) -> OutputType:
+    def _run(self, inputs: InputType) -> OutputType:
         pass
 
+    def _build_prompt(self, inputs: InputType) -> str:
+        raise NotImplementedError(f"{self.__class__.__name__} does not render a single prompt.")
+
+    def _parse_output(self, llm_output: str, inputs: InputType) -> OutputType:
+        return llm_output
+
+    def _prompts(self) -> PromptSnapshot:
+        return self._loading_snapshot or get_registry().current()
+
     def _read_file(self, path: str) -> str:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
+            return self._prompts().read(path)
         except FileNotFoundError:
             raise FileNotFoundError(
                 f"Cannot find a prompt file. Path is invalid: {path}"
@@ -31,11 +243,15 @@ class BaseAgent(ABC, Generic[InputType, OutputType]):
 
     def _load_examples(self, examples_path: str) -> list[dict]:
         examples = []
+        prompts = self._prompts()
         print(f"Loading examples from: {examples_path}")
-        for example_dir in sorted(os.listdir(examples_path)):
+        if not prompts.isdir(examples_path):
+            print(f"Warning: Examples directory {examples_path} does not exist. Continuing without few-shot examples.")
+            return examples
+        for example_dir in prompts.listdir(examples_path):
             full_dir_path = os.path.join(examples_path, example_dir)
 
-            if os.path.isdir(full_dir_path):
+            if prompts.isdir(full_dir_path) and not example_dir.startswith("."):
                 try:
                     example = {
                         "topic": self._read_file(os.path.join(full_dir_path, "topic.txt")),
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+
+from .base import BaseAgent
+from .quality_assurance import PassageQualityAgent, merge_evaluations
+
+if TYPE_CHECKING:
+    from config import EvaluationResult, QuestionReview, QuestionSetEvaluationResult
+    from paragraph_index import ParagraphIndex
+
+REVIEW_CRITERIA = ("clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency")
+
+
+class ChunkedQuestionSetQualityAgent(BaseAgent[dict, "QuestionSetEvaluationResult"]):
+    """
+    Map-reduce review of a reading question set.
+
+    Each question is reviewed in its own small call against only the
+    paragraph(s) it is about, found with a local `ParagraphIndex`; Prose
+    Summary questions see the whole passage. The calls run in parallel and the
+    per-question scores are reduced into `QuestionSetQualityScores`:
+
+    * each criterion scores the rounded mean over questions, and its comment
+      names the weakest question;
+    * question variety is checked locally against the per-passage type mix;
+    * the set fails if any question scores below `min_question_score` on any
+      criterion or the type mix is off.
+    """
+
+    def __init__(self, paragraphs_per_question: int = 2, max_workers: int = 8, min_question_score: int = 3):
+        super().__init__()
+        self.paragraphs_per_question = paragraphs_per_question
+        self.max_workers = max_workers
+        self.min_question_score = min_question_score
+
+    def _initialize_agent(self):
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, QuestionReview
+
+        self.llm_client = create_client(
+            model_name=GeminiModel.GEMINI_2_5_FLASH,
+            temperature=0.2
+        )
+        self.parser = PydanticOutputParser(pydantic_object=QuestionReview)
+
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return {"prompt_template": PromptTemplate(
+            template=self._read_file("prompts/reading/question_review_instruction.txt"),
+            input_variables=["excerpt", "question_json"],
+            partial_variables={"json_output": self.parser.get_format_instructions()}
+        )}
+
+    def _flight_scope(self) -> str:
+        return f"{self.__class__.__name__}:{self.paragraphs_per_question}:{self.min_question_score}"
+
+    def _run(self, inputs: dict) -> QuestionSetEvaluationResult:
+        prompts = self._review_prompts(inputs)
+        print(f"\n▶️ Reviewing {len(prompts)} questions against their paragraphs...")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            llm_outputs = list(pool.map(self.llm_client.invoke, prompts))
+
+        result = self._reduce(inputs, llm_outputs)
+        print(f"✅ Question set review complete. Decision: {result.overall_summary.final_decision}")
+        return result
+
+    async def arun(self, inputs: dict) -> QuestionSetEvaluationResult:
+        import asyncio
+
+        if not self.is_initialized:
+            await asyncio.to_thread(self.ensure_initialized)
+        self.refresh_prompts()
+        with self._pin_prompts(self._use_prompts()):
+            prompts = self._review_prompts(inputs)
+        llm_outputs = await asyncio.gather(*(self.llm_client.ainvoke(prompt) for prompt in prompts))
+        return self._reduce(inputs, llm_outputs)
+
+    def _review_prompts(self, inputs: dict) -> List[str]:
+        from paragraph_index import ParagraphIndex
+
+        passage = inputs.get("passage")
+        questions_set = inputs.get("questions_set")
+
+        if not passage or not questions_set:
+            raise ValueError("Inputs must contain 'passage' and 'questions_set'.")
+        if not questions_set.questions:
+            raise ValueError("The question set to review has no questions.")
+
+        index = ParagraphIndex.from_passage(passage)
+        return [self._review_prompt(index, question) for question in questions_set.questions]
+
+    def review_questions(
+        self, passage: str, questions: list, indices: Optional[List[int]] = None
+    ) -> List[QuestionReview]:
+        """
+        Reviews `questions[i]` for each i in `indices` (all questions by
+        default) and returns the reviews in that order. Lets callers that
+        changed a few questions re-score only those.
+        """
+        from paragraph_index import ParagraphIndex
+
+        self.ensure_initialized()
+        self.refresh_prompts()
+        indices = range(len(questions)) if indices is None else indices
+        index = ParagraphIndex.from_passage(passage)
+        with self._pin_prompts(self._use_prompts()):
+            prompts = [self._review_prompt(index, questions[i]) for i in indices]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            llm_outputs = list(pool.map(self.llm_client.invoke, prompts))
+        return [self.parser.parse(output) for output in llm_outputs]
+
+    def _review_prompt(self, index: ParagraphIndex, question) -> str:
+        return self.templates.prompt_template.format(
+            excerpt=question_excerpt(index, question, self.paragraphs_per_question),
+            question_json=question.model_dump_json(indent=2),
+        )
+
+    def _reduce(self, inputs: dict, llm_outputs: List[str]) -> QuestionSetEvaluationResult:
+        reviews = [self.parser.parse(output) for output in llm_outputs]
+        return reduce_question_reviews(inputs["questions_set"].questions, reviews, self.min_question_score)
+
+
+class ChunkedQualityAssuranceAgent(BaseAgent[dict, "EvaluationResult"]):
+    """
+    A drop-in for the reading `QualityAssuranceAgent` that never sends the
+    passage and the whole question set in one prompt: the passage review and
+    the chunked question review run in parallel and are merged.
+    """
+
+    def __init__(self, **question_review_options):
+        super().__init__()
+        self.passage_agent = PassageQualityAgent()
+        self.question_set_agent = ChunkedQuestionSetQualityAgent(**question_review_options)
+
+    def _initialize_agent(self):
+        self.passage_agent.ensure_initialized()
+        self.question_set_agent.ensure_initialized()
+
+    def _run(self, inputs: dict) -> EvaluationResult:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            passage_future = pool.submit(self.passage_agent.run, inputs.get("passage"))
+            question_set_future = pool.submit(self.question_set_agent.run, inputs)
+            return merge_evaluations(passage_future.result(), question_set_future.result())
+
+    async def arun(self, inputs: dict) -> EvaluationResult:
+        import asyncio
+
+        passage_result, question_set_result = await asyncio.gather(
+            self.passage_agent.arun(inputs.get("passage")),
+            self.question_set_agent.arun(inputs),
+        )
+        return merge_evaluations(passage_result, question_set_result)
+
+
+def question_excerpt(index: ParagraphIndex, question, paragraphs: int = 2) -> str:
+    """The paragraph(s) a question is about; Prose Summary questions get the whole passage."""
+    if question.question_type == "Prose Summary":
+        return index.excerpt(list(range(len(index.paragraphs))))
+    query = " ".join([
+        question.question,
+        *question.options,
+        getattr(question, "highlighted_sentence", ""),
+        getattr(question, "sentence_to_insert", ""),
+    ])
+    return index.excerpt(index.search(query, k=paragraphs))
+
+
+def reduce_question_reviews(
+    questions: list,
+    reviews: List[QuestionReview],
+    min_question_score: int = 3,
+) -> QuestionSetEvaluationResult:
+    """Combines per-question reviews into one question-set result (see ChunkedQuestionSetQualityAgent)."""
+    from config import OverallSummary, QuestionSetEvaluationResult, QuestionSetQualityScores, ScoreItem, type_mix_violations
+
+    if not questions:
+        raise ValueError("Cannot review an empty question set.")
+    if len(reviews) != len(questions):
+        raise ValueError(f"Expected one review per question: got {len(reviews)} reviews for {len(questions)} questions.")
+
+    scores = {}
+    weak = []
+    for criterion in REVIEW_CRITERIA:
+        items = [getattr(review, criterion) for review in reviews]
+        worst = min(range(len(items)), key=lambda i: items[i].score)
+        mean = statistics.mean(item.score for item in items)
+        scores[criterion] = ScoreItem(
+            score=max(1, min(5, round(mean))),
+            comment=f"Mean {mean:.1f} over {len(items)} questions; lowest Q{worst + 1} "
+                    f"({items[worst].score}): {items[worst].comment}",
+        )
+        weak.extend(f"Q{i + 1} {criterion} ({item.score})" for i, item in enumerate(items)
+                    if item.score < min_question_score)
+
+    off_mix = type_mix_violations(question.question_type for question in questions)
+    scores["question_variety"] = ScoreItem(
+        score=max(1, 5 - len(off_mix)),
+        comment="Type mix matches the required distribution." if not off_mix
+        else f"Types outside the required range (actual counts): {off_mix}",
+    )
+
+    problems = []
+    if weak:
+        problems.append(f"Scores below {min_question_score}: {', '.join(weak)}.")
+    if off_mix:
+        problems.append(f"Question type mix is off: {off_mix}.")
+    return QuestionSetEvaluationResult(
+        question_set_quality=QuestionSetQualityScores(**scores),
+        overall_summary=OverallSummary(
+            final_decision="Fail" if problems else "Pass",
+            justification=f"{len(questions)} questions reviewed individually. " + (
+                " ".join(problems) if problems
+                else f"Every question scored {min_question_score} or higher on every criterion."
+            ),
+        ),
+    )
@@ -0,0 +1,264 @@
+import hashlib
+import io
+import math
+import os
+import re
+import struct
+import tempfile
+import threading
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .base import BaseAgent
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2  # 16-bit mono PCM
+MAX_CHARS_PER_REQUEST = 4000  # Google TTS accepts at most 5000 bytes of input.
+
+DEFAULT_VOICES = {
+    "professor": "en-US-Neural2-D",
+    "student": "en-US-Neural2-F",
+    "librarian": "en-US-Neural2-C",
+}
+FALLBACK_VOICES = ["en-US-Neural2-A", "en-US-Neural2-E", "en-US-Neural2-I", "en-US-Neural2-J"]
+
+_DECLARED_SPEAKER = re.compile(r"^\s*\(([^()]{1,40})\)\s*:?\s*(.*)$")
+_LABELLED_LINE = re.compile(r"^\s*([A-Z][A-Za-z .'-]{0,30}):\s+(.*)$")
+
+
+@dataclass
+class SpeakerTurn:
+    speaker: str
+    text: str
+
+
+def split_speaker_turns(script: str, speakers: Iterable[str] = ()) -> List[SpeakerTurn]:
+    """
+    Splits a listening script into speaker turns.
+
+    Speaker lines look like "(Professor): ..." or "Student: ...". A bare
+    "Name:" label only starts a turn if the name is one of `speakers` or is
+    declared as "(Name)" somewhere in the script, so lines such as "Note: ..."
+    or "Example: ..." stay part of the current turn. Lines without a speaker
+    label continue the previous turn. If the script still contains the
+    model's thought process, only the part after "Final Script:" is used.
+    """
+    if "Final Script:" in script:
+        script = script.split("Final Script:", 1)[1]
+
+    lines = [line for line in script.splitlines() if line.strip()]
+    known = {speaker.strip().lower() for speaker in speakers}
+    known.update(m.group(1).strip().lower() for m in map(_DECLARED_SPEAKER.match, lines) if m)
+
+    turns: List[SpeakerTurn] = []
+    for line in lines:
+        match = _DECLARED_SPEAKER.match(line) or _LABELLED_LINE.match(line)
+        if match and match.group(1).strip().lower() in known:
+            turns.append(SpeakerTurn(speaker=match.group(1).strip(), text=match.group(2).strip()))
+        elif turns:
+            turns[-1].text = f"{turns[-1].text} {line.strip()}".strip()
+        else:
+            turns.append(SpeakerTurn(speaker="Narrator", text=line.strip()))
+    return [turn for turn in turns if turn.text]
+
+
+def _chunk_text(text: str, max_chars: int = MAX_CHARS_PER_REQUEST) -> List[str]:
+    """Splits a long turn at sentence boundaries so each chunk fits one TTS request."""
+    if len(text) <= max_chars:
+        return [text]
+    chunks, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TTSBackend(ABC):
+    """Synthesizes text to raw 16-bit mono PCM at `SAMPLE_RATE`."""
+
+    name = "base"
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str) -> bytes:
+        pass
+
+
+class GoogleTTSBackend(TTSBackend):
+    name = "google"
+
+    def __init__(self, language_code: str = "en-US"):
+        from google.cloud import texttospeech
+
+        self._tts = texttospeech
+        self.client = texttospeech.TextToSpeechClient()
+        self.language_code = language_code
+        self.audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+        )
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        response = self.client.synthesize_speech(
+            input=self._tts.SynthesisInput(text=text),
+            voice=self._tts.VoiceSelectionParams(language_code=self.language_code, name=voice),
+            audio_config=self.audio_config,
+        )
+        # LINEAR16 responses carry a WAV header; keep only the PCM frames.
+        with wave.open(io.BytesIO(response.audio_content), "rb") as wav:
+            return wav.readframes(wav.getnframes())
+
+
+class StubTTSBackend(TTSBackend):
+    """An offline backend that renders a short tone per word. Useful for tests."""
+
+    name = "stub"
+
+    def __init__(self, seconds_per_word: float = 0.05):
+        self.seconds_per_word = seconds_per_word
+        self.calls = 0
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        self.calls += 1
+        frequency = 200 + int(hashlib.md5(voice.encode()).hexdigest(), 16) % 400
+        n_frames = int(SAMPLE_RATE * self.seconds_per_word * max(1, len(text.split())))
+        return b"".join(
+            struct.pack("<h", int(3000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)))
+            for i in range(n_frames)
+        )
+
+
+class AudioCache:
+    """A content-addressed on-disk cache of synthesized PCM chunks."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, backend: str, voice: str, text: str) -> str:
+        return hashlib.sha256(f"{backend}|{voice}|{SAMPLE_RATE}|{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.pcm"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, pcm: bytes):
+        # A unique temp file per call: threads of one process may write the same key at once.
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.pcm"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class ListeningAudioAgent(BaseAgent[dict, str]):
+    """
+    Renders a listening script to a single WAV file.
+
+    Turns are synthesized concurrently with one voice per speaker, each chunk is
+    cached by a hash of its text, and the output file is written turn by turn
+    as soon as each turn (and every turn before it) is ready.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[TTSBackend] = None,
+        cache_dir: str = ".cache/tts",
+        voices: Optional[Dict[str, str]] = None,
+        max_workers: int = 4,
+        pause_seconds: float = 0.6,
+    ):
+        super().__init__()
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.voices = {k.lower(): v for k, v in (voices or DEFAULT_VOICES).items()}
+        self.max_workers = max_workers
+        self.pause_seconds = pause_seconds
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _initialize_agent(self):
+        if self.backend is None:
+            self.backend = GoogleTTSBackend()
+        self.cache = AudioCache(self.cache_dir)
+
+    def _flight_scope(self) -> str:
+        voices = ",".join(f"{speaker}={voice}" for speaker, voice in sorted(self.voices.items()))
+        return f"{self.__class__.__name__}:{self.backend.name}:{voices}:{self.pause_seconds}"
+
+    def _run(self, inputs: dict) -> str:
+        script = inputs.get("script")
+        output_path = inputs.get("output_path")
+
+        if not script or not output_path:
+            raise ValueError("Inputs must contain 'script' and 'output_path'.")
+
+        turns = split_speaker_turns(script, speakers=self.voices)
+        if not turns:
+            raise ValueError("The script does not contain any speaker turns.")
+
+        print(f"\n▶️ Rendering audio for {len(turns)} speaker turns...")
+        voice_map = self._assign_voices(turns)
+        silence = b"\x00" * int(SAMPLE_RATE * self.pause_seconds) * SAMPLE_WIDTH
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Repeated lines (e.g. "Right.") are synthesized once per render.
+            submitted = {}
+            futures = []
+            for turn in turns:
+                turn_futures = []
+                for chunk in _chunk_text(turn.text):
+                    request = (voice_map[turn.speaker], chunk)
+                    if request not in submitted:
+                        submitted[request] = pool.submit(self._synthesize_chunk, chunk, request[0])
+                    turn_futures.append(submitted[request])
+                futures.append(turn_futures)
+            with wave.open(output_path, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(SAMPLE_WIDTH)
+                wav.setframerate(SAMPLE_RATE)
+                for i, turn_futures in enumerate(futures):
+                    if i:
+                        wav.writeframes(silence)
+                    for future in turn_futures:
+                        wav.writeframes(future.result())
+
+        print(f"✅ Audio rendered to {output_path} (cache hits: {self.cache_hits}, misses: {self.cache_misses}).")
+        return output_path
+
+    def _assign_voices(self, turns: List[SpeakerTurn]) -> Dict[str, str]:
+        voice_map: Dict[str, str] = {}
+        fallback = iter(FALLBACK_VOICES * len(turns))
+        for turn in turns:
+            if turn.speaker not in voice_map:
+                voice_map[turn.speaker] = self.voices.get(turn.speaker.lower()) or next(fallback)
+        return voice_map
+
+    def _synthesize_chunk(self, text: str, voice: str) -> bytes:
+        key = self.cache.key(self.backend.name, voice, text)
+        pcm = self.cache.get(key)
+        with self._stats_lock:
+            if pcm is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if pcm is not None:
+            return pcm
+        pcm = self.backend.synthesize(text, voice)
+        self.cache.put(key, pcm)
+        return pcm
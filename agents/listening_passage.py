@@ -1,27 +1,55 @@
-from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 from .base import BaseAgent
-from llm_client import GoogleLLMClient
-from config import GeminiModel
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import FewShotPromptTemplate
+
+LISTENING_SCENARIOS = ("lecture", "conversation")
 
 
-class ListeningPassageAgent(BaseAgent[str, str]):
+class ListeningPassageAgent(BaseAgent[dict, str]):
     def _initialize_agent(self):
-        self.llm_client = GoogleLLMClient(
+        from llm_client import create_client
+        from config import GeminiModel
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH,
             temperature=0.8
         )
 
-    def run(self, scenario: str) -> str:
-        print(f"\n▶️ Generating listening script (Scenario: {scenario})...")
+    def _load_prompts(self):
+        return {"prompt_templates": {
+            scenario: self._create_few_shot_prompt(scenario) for scenario in LISTENING_SCENARIOS
+        }}
+
+    def _coalesces(self, inputs: dict) -> bool:
+        from pipeline import RANDOM_TOPIC
 
-        prompt_template = self._create_few_shot_prompt(scenario)
+        # Every random-topic request is meant to produce a different script.
+        return inputs.get("topic") != RANDOM_TOPIC and super()._coalesces(inputs)
 
-        final_prompt = prompt_template.format(scenario=scenario)
+    def _run(self, inputs: dict) -> str:
+        scenario = inputs.get("scenario")
+        topic = inputs.get("topic")
+
+        prompt_templates = self.templates.prompt_templates
+        if scenario not in prompt_templates or not topic:
+            raise ValueError(
+                f"Inputs must contain 'topic' and a 'scenario' from {LISTENING_SCENARIOS}."
+            )
+
+        print(f"\n▶️ Generating listening script (Scenario: {scenario}, Topic: '{topic}')...")
+
+        final_prompt = prompt_templates[scenario].format(topic=topic)
         script = self.llm_client.invoke(final_prompt)
         print("✅ Script generated successfully.")
         return script
 
     def _create_few_shot_prompt(self, scenario: str) -> FewShotPromptTemplate:
+        from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
+
         examples_path = f"prompts/listening/{scenario}/passage_examples"
         instruction_path = f"prompts/listening/{scenario}/passage_instruction.txt"
 
@@ -44,4 +72,3 @@ class ListeningPassageAgent(BaseAgent[str, str]):
             input_variables=["topic"],
             example_separator="\n\n---\n\n",
         )
-
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .base import BaseAgent
+from .listening_passage import LISTENING_SCENARIOS
+
+if TYPE_CHECKING:
+    from config import ListeningQuestionSet
+
+QUESTION_COUNTS = {"lecture": 6, "conversation": 5}
+
+
+class ListeningQuestionAgent(BaseAgent[dict, "ListeningQuestionSet"]):
+
+    def _initialize_agent(self):
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, ListeningQuestionSet
+
+        self.llm_client = create_client(
+            model_name=GeminiModel.GEMINI_2_5_FLASH,
+            temperature=0.7,
+        )
+        self.parser = PydanticOutputParser(pydantic_object=ListeningQuestionSet)
+
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return {"prompt_template": PromptTemplate(
+            template=self._read_file("prompts/listening/question_instruction.txt"),
+            input_variables=["scenario", "question_count", "script"],
+            partial_variables={"format_instructions": self.parser.get_format_instructions()},
+        )}
+
+    def _run(self, inputs: dict) -> ListeningQuestionSet:
+        scenario = inputs.get("scenario")
+        script = inputs.get("script")
+
+        if scenario not in LISTENING_SCENARIOS or not script:
+            raise ValueError(
+                f"Inputs must contain 'script' and a 'scenario' from {LISTENING_SCENARIOS}."
+            )
+
+        print(f"\n▶️ Generating questions for the {scenario} script...")
+
+        final_prompt = self.templates.prompt_template.format(
+            scenario=scenario,
+            question_count=QUESTION_COUNTS[scenario],
+            script=script,
+        )
+        llm_output = self.llm_client.invoke(final_prompt)
+
+        question_set = self.parser.parse(llm_output)
+
+        print("✅ Questions generated successfully.")
+        return question_set
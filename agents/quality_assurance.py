@@ -1,64 +1,207 @@
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 from agents.base import BaseAgent
-from llm_client import GoogleLLMClient
-from config import GeminiModel, BaseQuestionSet, EvaluationResult
+
+if TYPE_CHECKING:
+    from config import EvaluationResult, PassageEvaluationResult, QuestionSetEvaluationResult
 
 
-class QualityAssuranceAgent(BaseAgent[dict, EvaluationResult]):
+class QualityAssuranceAgent(BaseAgent[dict, "EvaluationResult"]):
     """
     An agent that evaluates the quality of a generated TOEFL task
     and returns a structured EvaluationResult.
+
+    `section` selects the rubric: "reading" (passage + questions) or
+    "listening" (script + questions).
     """
 
+    def __init__(self, section: str = "reading"):
+        super().__init__()
+        if section not in ("reading", "listening"):
+            raise ValueError(f"Unknown section: {section}")
+        self.section = section
+
     def _initialize_agent(self):
-        """Initializes the LLM client, parser, and prompt template for evaluation."""
-        self.llm_client = GoogleLLMClient(
+        """Initializes the LLM client and parser for evaluation."""
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, EvaluationResult
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH,
             temperature=0.2
         )
         self.parser = PydanticOutputParser(pydantic_object=EvaluationResult)
-        with open("prompts/reading/quality_assurance_instruction.txt", "r", encoding="utf-8") as f:
-            prompt_text = f.read()
 
-        self.prompt_template = PromptTemplate(
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        prompt_text = self._read_file(f"prompts/{self.section}/quality_assurance_instruction.txt")
+        return {"prompt_template": PromptTemplate(
             template=prompt_text,
             input_variables=["passage_text", "questions_json"],
             partial_variables={"json_output": self.parser.get_format_instructions()}
-        )
+        )}
+
+    def _flight_scope(self) -> str:
+        return f"{self.__class__.__name__}:{self.section}"
 
-    def run(self, inputs: dict) -> EvaluationResult:
+    def _run(self, inputs: dict) -> EvaluationResult:
         """
         Takes a passage and question set, evaluates them, and returns the structured result.
 
         Args:
-            inputs (dict): A dictionary containing 'passage' (str) and 'questions_set' (BaseQuestionSet).
+            inputs (dict): A dictionary containing 'passage' (str, the passage or listening script)
+                and 'questions_set' (BaseQuestionSet or ListeningQuestionSet).
 
         Returns:
             EvaluationResult: A Pydantic object containing the detailed evaluation.
         """
         print("\n▶️ Evaluating generated task quality...")
 
+        llm_output = self.llm_client.invoke(self._build_prompt(inputs))
+        parsed_result = self._parse_output(llm_output, inputs)
+
+        print(f"✅ Evaluation complete. Final Decision: {parsed_result.overall_summary.final_decision}")
+        return parsed_result
+
+    def _build_prompt(self, inputs: dict) -> str:
         passage = inputs.get("passage")
         questions_set = inputs.get("questions_set")
 
         if not passage or not questions_set:
             raise ValueError("Inputs must contain 'passage' and 'questions_set'.")
 
-        questions_json_str = questions_set.model_dump_json(indent=2)
-
-        final_prompt = self.prompt_template.format(
+        return self.templates.prompt_template.format(
             passage_text=passage,
-            questions_json=questions_json_str
+            questions_json=questions_set.model_dump_json(indent=2)
         )
 
-        llm_output = self.llm_client.invoke(final_prompt)
-        parsed_result = self.parser.parse(llm_output)
+    def _parse_output(self, llm_output: str, inputs: dict) -> EvaluationResult:
+        return self.parser.parse(llm_output)
 
-        print(f"✅ Evaluation complete. Final Decision: {parsed_result.overall_summary.final_decision}")
+
+class PassageQualityAgent(BaseAgent[str, "PassageEvaluationResult"]):
+    """
+    Scores only the passage half of the reading rubric (PassageQualityScores).
+
+    It needs nothing but the passage, so it can run while the questions are
+    still being generated; see `pipeline.generate_reading_task_early_exit`.
+    """
+
+    def _initialize_agent(self):
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, PassageEvaluationResult
+
+        self.llm_client = create_client(
+            model_name=GeminiModel.GEMINI_2_5_FLASH,
+            temperature=0.2
+        )
+        self.parser = PydanticOutputParser(pydantic_object=PassageEvaluationResult)
+
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return {"prompt_template": PromptTemplate(
+            template=self._read_file("prompts/reading/passage_quality_instruction.txt"),
+            input_variables=["passage_text"],
+            partial_variables={"json_output": self.parser.get_format_instructions()}
+        )}
+
+    def _run(self, passage: str) -> PassageEvaluationResult:
+        print("\n▶️ Evaluating passage quality...")
+
+        llm_output = self.llm_client.invoke(self._build_prompt(passage))
+        parsed_result = self._parse_output(llm_output, passage)
+
+        print(f"✅ Passage evaluation complete. Decision: {parsed_result.overall_summary.final_decision}")
         return parsed_result
 
+    def _build_prompt(self, passage: str) -> str:
+        if not passage:
+            raise ValueError("A passage is required.")
+        return self.templates.prompt_template.format(passage_text=passage)
+
+    def _parse_output(self, llm_output: str, passage: str) -> PassageEvaluationResult:
+        return self.parser.parse(llm_output)
+
+
+class QuestionSetQualityAgent(BaseAgent[dict, "QuestionSetEvaluationResult"]):
+    """Scores only the question-set half of the reading rubric (QuestionSetQualityScores)."""
+
+    def _initialize_agent(self):
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, QuestionSetEvaluationResult
+
+        self.llm_client = create_client(
+            model_name=GeminiModel.GEMINI_2_5_FLASH,
+            temperature=0.2
+        )
+        self.parser = PydanticOutputParser(pydantic_object=QuestionSetEvaluationResult)
+
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return {"prompt_template": PromptTemplate(
+            template=self._read_file("prompts/reading/question_set_quality_instruction.txt"),
+            input_variables=["passage_text", "questions_json"],
+            partial_variables={"json_output": self.parser.get_format_instructions()}
+        )}
+
+    def _run(self, inputs: dict) -> QuestionSetEvaluationResult:
+        print("\n▶️ Evaluating question set quality...")
+
+        llm_output = self.llm_client.invoke(self._build_prompt(inputs))
+        parsed_result = self._parse_output(llm_output, inputs)
+
+        print(f"✅ Question set evaluation complete. Decision: {parsed_result.overall_summary.final_decision}")
+        return parsed_result
+
+    def _build_prompt(self, inputs: dict) -> str:
+        passage = inputs.get("passage")
+        questions_set = inputs.get("questions_set")
+
+        if not passage or not questions_set:
+            raise ValueError("Inputs must contain 'passage' and 'questions_set'.")
+
+        return self.templates.prompt_template.format(
+            passage_text=passage,
+            questions_json=questions_set.model_dump_json(indent=2)
+        )
+
+    def _parse_output(self, llm_output: str, inputs: dict) -> QuestionSetEvaluationResult:
+        return self.parser.parse(llm_output)
+
+
+def merge_evaluations(
+    passage_result: PassageEvaluationResult,
+    question_set_result: QuestionSetEvaluationResult,
+) -> EvaluationResult:
+    """Combines the two halves of a split review into one EvaluationResult. Both must pass."""
+    from config import EvaluationResult, EvaluationScores, OverallSummary
+
+    decisions = (passage_result.overall_summary.final_decision, question_set_result.overall_summary.final_decision)
+    return EvaluationResult(
+        evaluation_scores=EvaluationScores(
+            passage_quality=passage_result.passage_quality,
+            question_set_quality=question_set_result.question_set_quality,
+        ),
+        overall_summary=OverallSummary(
+            final_decision="Pass" if decisions == ("Pass", "Pass") else "Fail",
+            justification=(
+                f"Passage: {passage_result.overall_summary.justification}\n"
+                f"Questions: {question_set_result.overall_summary.justification}"
+            ),
+        ),
+    )
+
+
 if __name__ == '__main__':
+    from config import BaseQuestionSet
+
     qa_agent = QualityAssuranceAgent()
     with open("prompts/reading/question_examples/example_02/input_passage.txt", "r", encoding="utf-8") as f:
         passage_text = f.read()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .base import BaseAgent
+from .chunked_quality_assurance import ChunkedQuestionSetQualityAgent, question_excerpt, reduce_question_reviews
+
+if TYPE_CHECKING:
+    from config import BaseQuestionSet, QuestionReview, QuestionSetEvaluationResult
+    from paragraph_index import ParagraphIndex
+
+
+class QuestionRegenerationAgent(BaseAgent[dict, "BaseQuestionSet"]):
+    """
+    Rewrites selected questions of an existing reading question set.
+
+    Inputs: {"passage", "questions_set", "indices", "feedback"}, where
+    `indices` are 0-based positions to replace and the optional `feedback`
+    maps a position to the reviewer's note. Each replacement is one small call
+    that carries only the paragraph(s) the question is about, a one-line
+    summary of every other question and the original question as the output
+    template, so fixing one question costs about one question's worth of
+    tokens. Replacements keep their slot's question type, which keeps the
+    set's type mix; a reply of the wrong type or shape is retried up to
+    `max_attempts` times.
+    """
+
+    def __init__(self, paragraphs_per_question: int = 2, max_workers: int = 8, max_attempts: int = 2):
+        super().__init__()
+        self.paragraphs_per_question = paragraphs_per_question
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+
+    def _initialize_agent(self):
+        from typing import Annotated
+        from pydantic import Field, TypeAdapter
+        from llm_client import create_client
+        from config import GeminiModel, AnyQuestion
+
+        self.llm_client = create_client(
+            model_name=GeminiModel.GEMINI_2_5_FLASH,
+            temperature=0.7,
+        )
+        self.question_adapter = TypeAdapter(Annotated[AnyQuestion, Field(discriminator="question_type")])
+
+    def _load_prompts(self):
+        from langchain_core.prompts import PromptTemplate
+
+        return {"prompt_template": PromptTemplate(
+            template=self._read_file("prompts/reading/question_regeneration_instruction.txt"),
+            input_variables=["question_type", "excerpt", "other_questions", "feedback", "original_json"],
+        )}
+
+    def _flight_scope(self) -> str:
+        return f"{self.__class__.__name__}:{self.paragraphs_per_question}:{self.max_attempts}"
+
+    def _run(self, inputs: dict) -> BaseQuestionSet:
+        from config import BaseQuestionSet
+        from paragraph_index import ParagraphIndex
+
+        passage, questions_set, indices = inputs.get("passage"), inputs.get("questions_set"), inputs.get("indices")
+        if not passage or not questions_set or not indices:
+            raise ValueError("Inputs must contain 'passage', 'questions_set' and 'indices'.")
+        questions = questions_set.questions
+        if any(not 0 <= i < len(questions) for i in indices):
+            raise ValueError(f"Question indices must be between 0 and {len(questions) - 1}: {indices}")
+        feedback = inputs.get("feedback") or {}
+
+        print(f"\n▶️ Regenerating {len(indices)} of {len(questions)} questions...")
+        index = ParagraphIndex.from_passage(passage)
+        # Rendered here, not in the pool threads, so every slot uses the templates this run started with.
+        prompts = {i: self._regeneration_prompt(index, questions, i, feedback.get(i, "")) for i in indices}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            replacements = list(pool.map(lambda i: self._regenerate_one(questions, i, prompts[i]), indices))
+
+        new_questions = list(questions)
+        for i, replacement in zip(indices, replacements):
+            new_questions[i] = replacement
+
+        print("✅ Questions regenerated successfully.")
+        return BaseQuestionSet(questions=new_questions)
+
+    def _regenerate_one(self, questions: list, position: int, prompt: str):
+        original = questions[position]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                replacement = self._parse_question(self.llm_client.invoke(prompt))
+                if replacement.question_type != original.question_type:
+                    raise ValueError(f"expected a {original.question_type} question, got {replacement.question_type}")
+                return replacement
+            except ValueError as e:
+                if attempt == self.max_attempts:
+                    raise ValueError(f"Q{position + 1} could not be regenerated: {e}") from e
+                print(f"↩️ Q{position + 1} replacement {attempt}/{self.max_attempts} was rejected: {e}")
+
+    def _regeneration_prompt(self, index: ParagraphIndex, questions: list, position: int, feedback: str) -> str:
+        original = questions[position]
+        others = "\n".join(
+            f"Q{i + 1} ({q.question_type}): {_summarize(q)}"
+            for i, q in enumerate(questions) if i != position
+        )
+        return self.templates.prompt_template.format(
+            question_type=original.question_type,
+            excerpt=question_excerpt(index, original, self.paragraphs_per_question),
+            other_questions=others or "(none)",
+            feedback=feedback or "(none)",
+            original_json=original.model_dump_json(indent=2),
+        )
+
+    def _parse_question(self, llm_output: str):
+        from langchain_core.utils.json import parse_json_markdown
+
+        try:
+            data = parse_json_markdown(llm_output)
+        except Exception as e:
+            raise ValueError(f"reply is not JSON: {e}") from e
+        # pydantic.ValidationError is a ValueError, so malformed questions are retried too.
+        return self.question_adapter.validate_python(data)
+
+
+def _summarize(question) -> str:
+    """One line per question: enough to avoid overlap without resending the whole set."""
+    answer = ", ".join(question.answer) if isinstance(question.answer, list) else question.answer
+    stem = getattr(question, "sentence_to_insert", None) or question.question
+    return f"{' '.join(stem.split())[:160]} [answer: {answer[:80]}]"
+
+
+@dataclass
+class QuestionRegeneration:
+    questions_set: BaseQuestionSet
+    changed: List[int]
+    # Reviews of the changed questions only, by position.
+    reviews: Dict[int, QuestionReview] = field(default_factory=dict)
+    # The whole set's result, when reviews of the unchanged questions were given.
+    evaluation: Optional[QuestionSetEvaluationResult] = None
+
+
+def regenerate_questions(
+    passage: str,
+    questions_set: BaseQuestionSet,
+    indices: List[int],
+    feedback: Optional[Dict[int, str]] = None,
+    previous_reviews: Optional[List[QuestionReview]] = None,
+    regeneration_agent: Optional[QuestionRegenerationAgent] = None,
+    review_agent: Optional[ChunkedQuestionSetQualityAgent] = None,
+) -> QuestionRegeneration:
+    """
+    Replaces the questions at `indices` and re-scores only those.
+
+    `previous_reviews` are per-question reviews of the original set (for
+    example from `ChunkedQuestionSetQualityAgent.review_questions`); with them
+    the unchanged questions keep their scores and the whole set gets a new
+    `QuestionSetEvaluationResult` without reviewing them again.
+    """
+    regeneration_agent = regeneration_agent or QuestionRegenerationAgent()
+    review_agent = review_agent or ChunkedQuestionSetQualityAgent()
+    indices = sorted(set(indices))
+
+    new_set = regeneration_agent.run({
+        "passage": passage, "questions_set": questions_set, "indices": indices, "feedback": feedback or {},
+    })
+    changed_reviews = dict(zip(indices, review_agent.review_questions(passage, new_set.questions, indices)))
+
+    evaluation = None
+    if previous_reviews is not None:
+        if len(previous_reviews) != len(questions_set.questions):
+            raise ValueError("previous_reviews must hold one review per question of the original set.")
+        reviews = [changed_reviews.get(i, review) for i, review in enumerate(previous_reviews)]
+        evaluation = reduce_question_reviews(new_set.questions, reviews, review_agent.min_question_score)
+    return QuestionRegeneration(questions_set=new_set, changed=indices, reviews=changed_reviews, evaluation=evaluation)
@@ -1,24 +1,137 @@
-from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 from .base import BaseAgent
-from llm_client import GoogleLLMClient
-from config import GeminiModel
 
+if TYPE_CHECKING:
+    from langchain_core.prompts import FewShotPromptTemplate
+    from difficulty import DifficultyReport
+
+
+class ReadingPassageAgent(BaseAgent[Union[str, dict], str]):
+    """
+    Generates a reading passage for a topic.
+
+    Inputs are a topic, or a dict with "topic" plus "related_topic" and
+    "related_passage": a reviewed passage on a similar topic that the prompt
+    offers as a model of length, structure and register (see `topic_cache.py`).
+
+    With a target `difficulty` ("easy", "medium" or "hard") the prompt asks for
+    that band's sentence length and vocabulary profile, and every draft is
+    scored locally (see `difficulty.py`). Drafts outside the band are
+    discarded before any questions or reviews are generated for them, and the
+    next draft is told how the previous one missed. After `max_drafts` the
+    draft closest to the band is returned.
+    """
+
+    def __init__(self, difficulty: Optional[str] = None, max_drafts: int = 3):
+        super().__init__()
+        self.difficulty = difficulty
+        self.band = None
+        if difficulty is not None:
+            from difficulty import DIFFICULTY_BANDS
+
+            if difficulty not in DIFFICULTY_BANDS:
+                raise ValueError(f"Unknown difficulty: {difficulty}")
+            self.band = DIFFICULTY_BANDS[difficulty]
+        self.max_drafts = max_drafts
+        self.draft_stats = Counter()
+        self._stats_lock = threading.Lock()
 
-class ReadingPassageAgent(BaseAgent[str, str]):
     def _initialize_agent(self):
-        self.llm_client = GoogleLLMClient(
+        from llm_client import create_client
+        from config import GeminiModel
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH, temperature=0.7
         )
-        self.prompt_template = self._create_few_shot_prompt()
+        if self.band is not None:
+            from difficulty import DifficultyScorer
+
+            self.scorer = DifficultyScorer()
+
+    def _load_prompts(self):
+        templates = {
+            "prompt_template": self._create_few_shot_prompt(),
+            "reference_template": self._read_file("prompts/reading/passage_reference_instruction.txt"),
+        }
+        if self.band is not None:
+            templates["difficulty_template"] = self._read_file("prompts/reading/passage_difficulty_instruction.txt")
+        return templates
+
+    def _flight_scope(self) -> str:
+        return f"{self.__class__.__name__}:{self.difficulty}:{self.max_drafts}"
 
-    def run(self, topic: str) -> str:
-        print(f"\n▶️ Generating passage for topic: '{topic}'...")
-        final_prompt = self.prompt_template.format(topic=topic)
-        passage = self.llm_client.invoke(final_prompt)
-        print("✅ Passage generated successfully.")
-        return passage
+    def _coalesces(self, inputs: Union[str, dict]) -> bool:
+        from pipeline import RANDOM_TOPIC
+
+        # Every random-topic request is meant to produce a different passage.
+        return _split_inputs(inputs)[0] != RANDOM_TOPIC and super()._coalesces(inputs)
+
+    def _run(self, inputs: Union[str, dict]) -> str:
+        topic, related = _split_inputs(inputs)
+        suffix = f" (modelled on '{related[0]}')" if related else ""
+        print(f"\n▶️ Generating passage for topic: '{topic}'{suffix}...")
+        if self.band is None:
+            passage = self.llm_client.invoke(self._build_prompt(inputs))
+            print("✅ Passage generated successfully.")
+            return passage
+
+        best, best_distance, feedback = None, float("inf"), ""
+        for draft in range(1, self.max_drafts + 1):
+            passage = self.llm_client.invoke(self._build_prompt(inputs, feedback))
+            report = self.score_passage(passage)
+            self._count("drafts")
+            if self.band.contains(report.score):
+                self._count("accepted")
+                print(f"✅ Passage generated successfully (difficulty {report.score:.1f}, {self.band.name}).")
+                return passage
+            self._count("rejected")
+            print(f"↩️ Draft {draft}/{self.max_drafts} scored {report.score:.1f} ({report.band}), "
+                  f"target {self.band.name}.")
+            if self.band.distance(report.score) < best_distance:
+                best, best_distance = passage, self.band.distance(report.score)
+            feedback = report.feedback(self.band)
+
+        self._count("exhausted")
+        print(f"Warning: No draft reached the '{self.band.name}' band; using the closest one.")
+        return best
+
+    def score_passage(self, passage: str) -> Optional[DifficultyReport]:
+        """Scores the passage part of a generation (after 'Final Passage:' if the model echoed one)."""
+        if self.band is None:
+            return None
+        self.ensure_initialized()
+        return self.scorer.score(passage.split("Final Passage:")[-1])
+
+    def _build_prompt(self, inputs: Union[str, dict], feedback: str = "") -> str:
+        topic, related = _split_inputs(inputs)
+        templates = self.templates
+        guidance = ""
+        if related:
+            guidance = templates.reference_template.format(
+                related_topic=related[0],
+                related_passage=related[1].split("Final Passage:")[-1].strip(),
+            )
+        if self.band is not None:
+            guidance += templates.difficulty_template.format(
+                band=self.band.name,
+                description=self.band.description,
+                sentence_words=self.band.sentence_words,
+                academic_percent=self.band.academic_percent,
+                feedback=feedback,
+            )
+        return templates.prompt_template.format(topic=topic, difficulty_guidance=guidance)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.draft_stats[key] += 1
 
     def _create_few_shot_prompt(self) -> FewShotPromptTemplate:
+        from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
+
         examples = self._load_examples("prompts/reading/passage_examples")
 
         example_prompt = PromptTemplate(
@@ -28,13 +141,21 @@ class ReadingPassageAgent(BaseAgent[str, str]):
 
         prefix = self._read_file("prompts/reading/passage_instruction.txt")
 
-        suffix = "Topic:\n{topic}\n\nThought Process:"
+        suffix = "{difficulty_guidance}Topic:\n{topic}\n\nThought Process:"
 
         return FewShotPromptTemplate(
             examples=examples,
             example_prompt=example_prompt,
             prefix=prefix,
             suffix=suffix,
-            input_variables=["topic"],
+            input_variables=["topic", "difficulty_guidance"],
             example_separator="\n\n---\n\n",
         )
+
+
+def _split_inputs(inputs: Union[str, dict]) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """(topic, (related topic, related passage) or None) from either input form."""
+    if isinstance(inputs, str):
+        return inputs, None
+    related = inputs.get("related_passage")
+    return inputs["topic"], (inputs.get("related_topic", ""), related) if related else None
@@ -1,34 +1,65 @@
+from __future__ import annotations
+
 import os
-from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from typing import TYPE_CHECKING, Dict, Tuple, Union
 
 from .base import BaseAgent
-from llm_client import GoogleLLMClient
-from config import GeminiModel, BaseQuestionSet
 
+if TYPE_CHECKING:
+    from langchain_core.prompts import FewShotPromptTemplate
+    from config import BaseQuestionSet
+
+
+class ReadingQuestionAgent(BaseAgent[Union[str, dict], "BaseQuestionSet"]):
+    """
+    Generates the question set for a reading passage.
 
-class ReadingQuestionAgent(BaseAgent[str, BaseQuestionSet]):
+    Inputs are a passage, or a dict with "passage" and "question_types": the
+    minimum number of questions of each type the set must include (for
+    example, the types a form still lacks; see `form_assembler.py`).
+    """
 
     def _initialize_agent(self):
-        self.llm_client = GoogleLLMClient(
+        from langchain_core.output_parsers import PydanticOutputParser
+        from llm_client import create_client
+        from config import GeminiModel, BaseQuestionSet
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH,
             temperature=0.7,
         )
         self.parser = PydanticOutputParser(pydantic_object=BaseQuestionSet)
-        self.prompt_template = self._create_few_shot_prompt()
 
-    def run(self, passage: str) -> BaseQuestionSet:
-        print("\n▶️ Generating questions for the passage...")
+    def _load_prompts(self):
+        return {
+            "prompt_template": self._create_few_shot_prompt(),
+            "question_types_template": self._read_file("prompts/reading/question_types_instruction.txt"),
+        }
 
-        final_prompt = self.prompt_template.format(passage=passage)
-        llm_output = self.llm_client.invoke(final_prompt)
+    def _run(self, inputs: Union[str, dict]) -> BaseQuestionSet:
+        print("\n▶️ Generating questions for the passage...")
 
-        question_set = self.parser.parse(llm_output)
+        llm_output = self.llm_client.invoke(self._build_prompt(inputs))
+        question_set = self._parse_output(llm_output, inputs)
 
         print("✅ Questions generated successfully.")
         return question_set
 
+    def _build_prompt(self, inputs: Union[str, dict]) -> str:
+        passage, question_types = _split_inputs(inputs)
+        requirements = ""
+        if question_types:
+            requirements = self.templates.question_types_template.format(
+                question_types="\n".join(f"- {qt}: {n}" for qt, n in question_types.items()),
+            )
+        return self.templates.prompt_template.format(passage=passage, requirements=requirements)
+
+    def _parse_output(self, llm_output: str, inputs: Union[str, dict]) -> BaseQuestionSet:
+        return self.parser.parse(llm_output)
+
     def _create_few_shot_prompt(self) -> FewShotPromptTemplate:
+        from langchain_core.prompts import PromptTemplate, FewShotPromptTemplate
+
         examples = self._load_examples("prompts/reading/question_examples")
 
         example_prompt = PromptTemplate(
@@ -39,14 +70,14 @@ class ReadingQuestionAgent(BaseAgent[str, BaseQuestionSet]):
 
         prefix = self._read_file("prompts/reading/question_instruction.txt")
 
-        suffix = "Passage:\n{{passage}}\n\nJSON Output:"
+        suffix = "{{requirements}}Passage:\n{{passage}}\n\nJSON Output:"
 
         return FewShotPromptTemplate(
             examples=examples,
             example_prompt=example_prompt,
             prefix=prefix,
             suffix=suffix,
-            input_variables=["passage"],
+            input_variables=["passage", "requirements"],
             partial_variables={
                 "format_instructions": self.parser.get_format_instructions()
             },
@@ -56,9 +87,13 @@ class ReadingQuestionAgent(BaseAgent[str, BaseQuestionSet]):
 
     def _load_examples(self, examples_path: str) -> list[dict]:
         examples = []
-        for example_dir in sorted(os.listdir(examples_path)):
+        prompts = self._prompts()
+        if not prompts.isdir(examples_path):
+            print(f"Warning: Examples directory {examples_path} does not exist. Continuing without few-shot examples.")
+            return examples
+        for example_dir in prompts.listdir(examples_path):
             full_dir_path = os.path.join(examples_path, example_dir)
-            if os.path.isdir(full_dir_path):
+            if prompts.isdir(full_dir_path) and not example_dir.startswith("."):
                 try:
                     output_json_str = self._read_file(
                         os.path.join(full_dir_path, "output.json")
@@ -76,3 +111,10 @@ class ReadingQuestionAgent(BaseAgent[str, BaseQuestionSet]):
                     )
         print(f"✅ Loaded {len(examples)} few-shot question examples.")
         return examples
+
+
+def _split_inputs(inputs: Union[str, dict]) -> Tuple[str, Dict[str, int]]:
+    """(passage, minimum count per required question type) from either input form."""
+    if isinstance(inputs, str):
+        return inputs, {}
+    return inputs["passage"], inputs.get("question_types") or {}
@@ -1,19 +1,27 @@
-from langchain_core.prompts import PromptTemplate
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 from .base import BaseAgent
-from llm_client import GoogleLLMClient
-from config import GeminiModel
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
 
 
 class QuestionThoughtProcessAgent(BaseAgent[dict, str]):
     def _initialize_agent(self):
-        self.llm_client = GoogleLLMClient(
+        from llm_client import create_client
+        from config import GeminiModel
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH,
             temperature=0.5,
         )
-        self.prompt_template = self._load_prompt_template()
 
-    def run(self, inputs: dict) -> str:
+    def _load_prompts(self):
+        return {"prompt_template": self._load_prompt_template()}
+
+    def _run(self, inputs: dict) -> str:
         print("\n▶️ Generating thought process for the question set...")
 
         passage = inputs.get("passage")
@@ -24,7 +32,7 @@ class QuestionThoughtProcessAgent(BaseAgent[dict, str]):
                 "Inputs dictionary must contain 'passage' and 'json_output' keys."
             )
 
-        final_prompt = self.prompt_template.format(
+        final_prompt = self.templates.prompt_template.format(
             passage=passage, json_output=json_output
         )
 
@@ -33,13 +41,10 @@ class QuestionThoughtProcessAgent(BaseAgent[dict, str]):
         return thought_process
 
     def _load_prompt_template(self) -> PromptTemplate:
+        from langchain_core.prompts import PromptTemplate
+
         try:
-            with open(
-                "prompts/reading/question_thought_process_instruction.txt",
-                "r",
-                encoding="utf-8",
-            ) as f:
-                prompt_text = f.read()
+            prompt_text = self._read_file("prompts/reading/question_thought_process_generator_instruction.txt")
 
             return PromptTemplate(
                 template=prompt_text,
@@ -51,13 +56,18 @@ class QuestionThoughtProcessAgent(BaseAgent[dict, str]):
 
 class PassageThoughtProcessAgent(BaseAgent[dict, str]):
     def _initialize_agent(self):
-        self.llm_client = GoogleLLMClient(
+        from llm_client import create_client
+        from config import GeminiModel
+
+        self.llm_client = create_client(
             model_name=GeminiModel.GEMINI_2_5_FLASH,
             temperature=0.5,
         )
-        self.prompt_template = self._load_prompt_template()
 
-    def run(self, inputs: dict) -> str:
+    def _load_prompts(self):
+        return {"prompt_template": self._load_prompt_template()}
+
+    def _run(self, inputs: dict) -> str:
         print("\n▶️ Generating thought process for the passage...")
 
         topic = inputs.get("topic")
@@ -68,7 +78,7 @@ class PassageThoughtProcessAgent(BaseAgent[dict, str]):
                 "Inputs dictionary must contain 'topic' and 'final_passage' keys."
             )
 
-        final_prompt = self.prompt_template.format(
+        final_prompt = self.templates.prompt_template.format(
             topic=topic, final_passage=final_passage
         )
 
@@ -77,13 +87,10 @@ class PassageThoughtProcessAgent(BaseAgent[dict, str]):
         return thought_process
 
     def _load_prompt_template(self) -> PromptTemplate:
+        from langchain_core.prompts import PromptTemplate
+
         try:
-            with open(
-                "prompts/reading/passage_thought_process_instruction.txt",
-                "r",
-                encoding="utf-8",
-            ) as f:
-                prompt_text = f.read()
+            prompt_text = self._read_file("prompts/reading/passage_thought_process_generator_instruction.txt")
 
             return PromptTemplate(
                 template=prompt_text,
@@ -0,0 +1,345 @@
+"""
+Offline job mode for nightly corpus builds.
+
+Instead of calling the model one prompt at a time, each stage of the reading
+pipeline (passages → questions → QA) renders all of its prompts up front,
+writes them to a JSONL request file, submits that file to a `BatchEndpoint`,
+polls until the job finishes and parses the result file into the inputs of
+the next stage.
+
+Request lines look like {"key", "model", "temperature", "prompt"}; result
+lines are {"key", "output"} or {"key", "error"}. An endpoint for a hosted
+batch API only has to translate between these files and the provider's.
+
+Usage:
+    python batch_jobs.py --topics-file topics.txt --work-dir output/nightly
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from pipeline import RANDOM_TOPIC, resolve_topic
+
+STAGES = ("passages", "questions", "qa")
+
+
+class BatchJobError(RuntimeError):
+    pass
+
+
+class BatchEndpoint(ABC):
+    """A batch-style model endpoint: submit a request file, poll, fetch a result file."""
+
+    @abstractmethod
+    def submit(self, request_path: str) -> str:
+        """Uploads a JSONL request file and returns the job ID."""
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """Returns "pending", "running", "succeeded" or "failed"."""
+
+    @abstractmethod
+    def download_results(self, job_id: str, dest_path: str) -> str:
+        """Writes the JSONL result file of a succeeded job to `dest_path`."""
+
+
+class LocalBatchEndpoint(BatchEndpoint):
+    """
+    A filesystem stand-in for a hosted batch API.
+
+    Jobs live under `root_dir/<job_id>/` and are processed on a background
+    thread with ordinary LLM clients (see `llm_client.create_client`), so the
+    whole offline flow can run without a provider batch endpoint.
+    """
+
+    def __init__(self, root_dir: str = ".cache/batch", max_workers: int = 8):
+        self.root_dir = root_dir
+        self.max_workers = max_workers
+        self._clients: Dict[tuple, object] = {}
+        self._clients_lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    def submit(self, request_path: str) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.root_dir, job_id)
+        os.makedirs(job_dir)
+        shutil.copyfile(request_path, os.path.join(job_dir, "requests.jsonl"))
+        self._write_status(job_id, {"state": "pending"})
+        threading.Thread(target=self._process, args=(job_id,), name=f"batch-{job_id}", daemon=True).start()
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        with open(os.path.join(self.root_dir, job_id, "status.json"), "r", encoding="utf-8") as f:
+            return json.load(f)["state"]
+
+    def download_results(self, job_id: str, dest_path: str) -> str:
+        shutil.copyfile(os.path.join(self.root_dir, job_id, "results.jsonl"), dest_path)
+        return dest_path
+
+    def _process(self, job_id: str):
+        job_dir = os.path.join(self.root_dir, job_id)
+        self._write_status(job_id, {"state": "running"})
+        try:
+            requests = _read_jsonl(os.path.join(job_dir, "requests.jsonl"))
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(self._answer, requests))
+            _write_jsonl(os.path.join(job_dir, "results.jsonl"), results)
+            errors = sum(1 for result in results if "error" in result)
+            self._write_status(job_id, {"state": "succeeded", "requests": len(results), "errors": errors})
+        except Exception as e:
+            self._write_status(job_id, {"state": "failed", "error": f"{type(e).__name__}: {e}"})
+
+    def _answer(self, request: dict) -> dict:
+        try:
+            client = self._client(request["model"], request["temperature"])
+            return {"key": request["key"], "output": client.invoke(request["prompt"])}
+        except Exception as e:
+            return {"key": request["key"], "error": f"{type(e).__name__}: {e}"}
+
+    def _client(self, model: str, temperature: float):
+        from llm_client import create_client
+
+        with self._clients_lock:
+            if (model, temperature) not in self._clients:
+                self._clients[(model, temperature)] = create_client(model_name=model, temperature=temperature)
+            return self._clients[(model, temperature)]
+
+    def _write_status(self, job_id: str, status: dict):
+        _write_json(os.path.join(self.root_dir, job_id, "status.json"), status)
+
+
+class NightlyReadingJob:
+    """
+    Runs the reading pipeline through a `BatchEndpoint`, one stage per batch job.
+
+    Progress is recorded in `work_dir/state.json` (resolved topics and the job
+    ID of every submitted stage), so rerunning an interrupted build with the
+    same topics resumes polling instead of resubmitting. The state is keyed by
+    a hash of the topic list: a run with different topics archives the stale
+    state and starts fresh. A stage whose job failed is resubmitted on the
+    next run. Once a build completes, its files are moved to
+    `work_dir/archive/<time>-<hash>/` so the next night starts clean. Items
+    that fail at any stage are dropped from later stages and reported in
+    `failures`.
+    """
+
+    def __init__(
+        self,
+        endpoint: BatchEndpoint,
+        work_dir: str,
+        passage_agent=None,
+        question_agent=None,
+        qa_agent=None,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = None,
+        on_poll: Optional[Callable[[str, str], None]] = None,
+    ):
+        from agents.reading_passage import ReadingPassageAgent
+        from agents.reading_question import ReadingQuestionAgent
+        from agents.quality_assurance import QualityAssuranceAgent
+
+        self.endpoint = endpoint
+        self.work_dir = work_dir
+        self.passage_agent = passage_agent or ReadingPassageAgent()
+        self.question_agent = question_agent or ReadingQuestionAgent()
+        self.qa_agent = qa_agent or QualityAssuranceAgent()
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.on_poll = on_poll
+        self.failures: Dict[str, str] = {}
+        os.makedirs(work_dir, exist_ok=True)
+        self._state_path = os.path.join(work_dir, "state.json")
+        self._state = _read_json(self._state_path) if os.path.exists(self._state_path) else self._new_state()
+
+    def run(self, topics: List[str]) -> list:
+        from config import ReadingTask
+        from agents.base import describe_prompt_versions
+        from single_flight import fingerprint
+
+        topics_hash = fingerprint(list(topics))
+        if "topics" in self._state and self._state.get("topics_hash") != topics_hash:
+            print("⚠️ The saved state belongs to a different topic list; archiving it and starting fresh.")
+            self._archive()
+        if "topics" not in self._state:
+            # Random topics are resolved once so a resumed build sees the same ones.
+            self._state["topics_hash"] = topics_hash
+            self._state["topics"] = {f"task-{i:05d}": resolve_topic(topic) for i, topic in enumerate(topics)}
+            self._save_state()
+        topics_by_key: Dict[str, str] = self._state["topics"]
+
+        passages = self._run_stage("passages", self.passage_agent, topics_by_key)
+        question_sets = self._run_stage("questions", self.question_agent, passages)
+        evaluations = self._run_stage("qa", self.qa_agent, {
+            key: {"passage": passages[key], "questions_set": question_set}
+            for key, question_set in question_sets.items()
+        })
+
+        used = {}
+        for stage in STAGES:
+            used.update(self._state["prompt_versions"].get(stage, {}))
+        prompt_version = describe_prompt_versions(used)
+        tasks = [
+            ReadingTask(
+                topic=topics_by_key[key],
+                passage=passages[key],
+                questions_set=question_sets[key],
+                evaluation_result=evaluation,
+                prompt_version=prompt_version,
+            )
+            for key, evaluation in evaluations.items()
+        ]
+        self._archive()
+        return tasks
+
+    def _run_stage(self, stage: str, agent, inputs: Dict[str, object]) -> Dict[str, object]:
+        from agents.base import record_prompt_versions
+
+        request_path = os.path.join(self.work_dir, f"{stage}_requests.jsonl")
+        result_path = os.path.join(self.work_dir, f"{stage}_results.jsonl")
+
+        job_id = self._state["jobs"].get(stage)
+        if job_id is None:
+            requests = []
+            with record_prompt_versions() as used:
+                for key, item in inputs.items():
+                    try:
+                        prompt = agent.build_prompt(item)
+                    except Exception as e:
+                        self.failures[key] = f"{stage}: {type(e).__name__}: {e}"
+                        continue
+                    requests.append({
+                        "key": key,
+                        "model": agent.llm_client.model_name,
+                        "temperature": agent.llm_client.temperature,
+                        "prompt": prompt,
+                    })
+            _write_jsonl(request_path, requests)
+            job_id = self.endpoint.submit(request_path)
+            self._state["jobs"][stage] = job_id
+            self._state["prompt_versions"][stage] = used
+            self._save_state()
+            print(f"📤 Submitted {len(requests)} {stage} request(s) as batch job {job_id}.")
+
+        if not os.path.exists(result_path):
+            self._wait(stage, job_id)
+            self.endpoint.download_results(job_id, result_path)
+
+        outputs = {}
+        for result in _read_jsonl(result_path):
+            key = result["key"]
+            if "error" in result:
+                self.failures[key] = f"{stage}: {result['error']}"
+                continue
+            try:
+                outputs[key] = agent.parse_output(result["output"], inputs[key])
+            except Exception as e:
+                self.failures[key] = f"{stage}: {type(e).__name__}: {e}"
+        print(f"📥 {stage}: {len(outputs)} parsed, {len(inputs) - len(outputs)} failed.")
+        return outputs
+
+    def _wait(self, stage: str, job_id: str):
+        start = time.monotonic()
+        while True:
+            state = self.endpoint.status(job_id)
+            if self.on_poll:
+                self.on_poll(stage, state)
+            if state == "succeeded":
+                return
+            if state == "failed":
+                # Forget the job so the next run resubmits the stage.
+                del self._state["jobs"][stage]
+                self._state["prompt_versions"].pop(stage, None)
+                self._save_state()
+                raise BatchJobError(f"Batch job {job_id} for stage '{stage}' failed.")
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise BatchJobError(f"Timed out waiting for batch job {job_id} (stage '{stage}').")
+            time.sleep(self.poll_interval)
+
+    def _save_state(self):
+        _write_json(self._state_path, self._state)
+
+    @staticmethod
+    def _new_state() -> dict:
+        return {"jobs": {}, "prompt_versions": {}}
+
+    def _archive(self):
+        """Moves the state and stage files to `work_dir/archive/` and resets the state."""
+        names = ["state.json"] + [f"{stage}_{kind}.jsonl" for stage in STAGES for kind in ("requests", "results")]
+        present = [name for name in names if os.path.exists(os.path.join(self.work_dir, name))]
+        if present:
+            label = (self._state.get("topics_hash") or "unknown")[:12]
+            archive_dir = os.path.join(self.work_dir, "archive", f"{time.strftime('%Y%m%d-%H%M%S')}-{label}")
+            os.makedirs(archive_dir, exist_ok=True)
+            for name in present:
+                os.replace(os.path.join(self.work_dir, name), os.path.join(archive_dir, name))
+            print(f"🗄️ Archived the build files to {archive_dir}.")
+        self._state = self._new_state()
+
+
+def _read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_jsonl(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_jsonl(path: str, records: List[dict]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build reading tasks overnight through a batch endpoint.")
+    parser.add_argument("--topics-file", help="A text file with one topic per line.")
+    parser.add_argument("--random", type=int, default=0, help="Number of additional random-topic tasks.")
+    parser.add_argument("--work-dir", default="output/nightly", help="Request/result files and resume state.")
+    parser.add_argument("--batch-dir", default=".cache/batch", help="Job directory of the local batch endpoint.")
+    parser.add_argument("--out", default="output/tasks.jsonl", help="Task pool JSONL path (appended to).")
+    parser.add_argument("--poll-interval", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    topics: List[str] = []
+    if args.topics_file:
+        with open(args.topics_file, "r", encoding="utf-8") as f:
+            topics.extend(line.strip() for line in f if line.strip())
+    topics.extend([RANDOM_TOPIC] * args.random)
+    if not topics:
+        parser.error("Provide --topics-file and/or --random N.")
+
+    job = NightlyReadingJob(LocalBatchEndpoint(args.batch_dir), args.work_dir, poll_interval=args.poll_interval)
+    tasks = job.run(topics)
+
+    from batch_runner import JsonlBatchWriter
+
+    with JsonlBatchWriter(args.out) as writer:
+        for task in tasks:
+            writer.add({"lane": "reading", "status": "done", "task": task.model_dump(mode="json")})
+
+    print(f"\n🎉 {len(tasks)} task(s) written to {args.out}; {len(job.failures)} failed.")
+    for key, error in sorted(job.failures.items()):
+        print(f"  - {key}: {error}")
+    return 0 if not job.failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import profiling
+from generation_service import GenerationService
+from pipeline import RANDOM_TOPIC, generate_listening_task, generate_reading_task_early_exit, resolve_topic, topic_key
+
+BATCH_USER_ID = "batch"
+
+# (lane, dedup key, payload)
+BatchItem = Tuple[str, str, Any]
+
+
+class JsonlBatchWriter:
+    """Buffers result records and appends them to a JSONL file in batches."""
+
+    def __init__(self, path: str, batch_size: int = 10):
+        self.path = path
+        self.batch_size = batch_size
+        self.written = 0
+        self._buffer: List[dict] = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def add(self, record: dict):
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._buffer)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        self.written += len(self._buffer)
+        self._buffer.clear()
+
+    def __enter__(self) -> "JsonlBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+
+def build_reading_handler(
+    passage_attempts: int = 1,
+    chunked_qa: bool = False,
+    difficulty: Optional[str] = None,
+    max_drafts: int = 3,
+    topic_cache=None,
+) -> Callable:
+    from agents.reading_passage import ReadingPassageAgent
+    from agents.reading_question import ReadingQuestionAgent
+    from agents.quality_assurance import PassageQualityAgent, QuestionSetQualityAgent
+    from agents.chunked_quality_assurance import ChunkedQuestionSetQualityAgent
+
+    passage_agent = ReadingPassageAgent(difficulty=difficulty, max_drafts=max_drafts)
+    question_agent = ReadingQuestionAgent()
+    passage_qa_agent = PassageQualityAgent()
+    question_qa_agent = ChunkedQuestionSetQualityAgent() if chunked_qa else QuestionSetQualityAgent()
+
+    async def handler(topic: str):
+        with profiling.task(f"reading:{topic}"):
+            return await generate_reading_task_early_exit(
+                topic, passage_agent, question_agent, passage_qa_agent, question_qa_agent,
+                passage_attempts=passage_attempts, topic_cache=topic_cache,
+            )
+
+    return handler
+
+
+def build_listening_handler(render_audio: bool = False, audio_dir: str = "output/audio") -> Callable:
+    from agents.listening_passage import ListeningPassageAgent
+    from agents.listening_question import ListeningQuestionAgent
+    from agents.listening_audio import ListeningAudioAgent
+    from agents.quality_assurance import QualityAssuranceAgent
+
+    passage_agent = ListeningPassageAgent()
+    question_agent = ListeningQuestionAgent()
+    qa_agent = QualityAssuranceAgent(section="listening")
+    audio_agent = ListeningAudioAgent() if render_audio else None
+
+    async def handler(payload: Tuple[str, str]):
+        scenario, topic = payload
+        with profiling.task(f"{scenario}:{topic}"):
+            return await generate_listening_task(
+                scenario, topic, passage_agent, question_agent, qa_agent,
+                audio_agent=audio_agent, audio_dir=audio_dir,
+            )
+
+    return handler
+
+
+def reading_items(topics: List[str]) -> List[BatchItem]:
+    return [("reading", topic_key(topic), resolve_topic(topic)) for topic in topics]
+
+
+def listening_items(topics: List[str], scenarios: List[str]) -> List[BatchItem]:
+    return [
+        (scenario, f"{scenario}:{topic_key(topic)}", (scenario, resolve_topic(topic)))
+        for topic in topics
+        for scenario in scenarios
+    ]
+
+
+async def run_batch(
+    service: GenerationService,
+    items: List[BatchItem],
+    writer: JsonlBatchWriter,
+    on_progress: Optional[Callable[[int, int, dict], None]] = None,
+) -> Dict[str, int]:
+    """
+    Submits every item to the service, writes each result as it completes and
+    returns a summary. Items that duplicate an in-flight job are skipped.
+    """
+    jobs = {}
+    for lane, key, payload in items:
+        job = service.submit(BATCH_USER_ID, key, payload, lane=lane)
+        jobs.setdefault(job.job_id, job)
+
+    pending = {asyncio.wrap_future(job.future): job for job in jobs.values()}
+    summary = {"submitted": len(items), "unique": len(jobs), "done": 0, "failed": 0}
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            future.exception()  # The job records the error; mark it as retrieved.
+            _record_job(pending.pop(future), writer, summary)
+        if on_progress:
+            on_progress(summary["done"] + summary["failed"], len(jobs), service.stats())
+
+    writer.flush()
+    return summary
+
+
+def _record_job(job, writer: JsonlBatchWriter, summary: Dict[str, int]):
+    record = {
+        "lane": job.lane,
+        "status": job.status,
+        "queue_delay_s": round(job.queue_delay or 0.0, 3),
+        "elapsed_s": round(job.elapsed, 3),
+    }
+    if job.status == "done":
+        summary["done"] += 1
+        record["task"] = job.result.model_dump(mode="json")
+    else:
+        summary["failed"] += 1
+        record["payload"] = job.payload
+        record["error"] = job.error
+    writer.add(record)
+
+
+def _print_progress(completed: int, total: int, stats: dict):
+    import llm_client
+
+    llm = llm_client.default_limiter.snapshot()
+    print(
+        f"📦 {completed}/{total} tasks finished (running: {stats['running']}, queued: {stats['queued']}) | "
+        f"LLM concurrency limit {llm['limit']} (in flight {llm['inflight']}, p50 {llm['p50_ms']} ms, "
+        f"baseline {llm['baseline_p50_ms']} ms, error rate {llm['error_rate']:.0%})"
+    )
+
+
+def _load_topics(args) -> List[str]:
+    topics: List[str] = []
+    if args.topics_file:
+        with open(args.topics_file, "r", encoding="utf-8") as f:
+            topics.extend(line.strip() for line in f if line.strip())
+    topics.extend([RANDOM_TOPIC] * args.random)
+    return topics
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate many TOEFL tasks concurrently and write them to a JSONL file.")
+    parser.add_argument("section", choices=["reading", "listening"])
+    parser.add_argument("--topics-file", help="A text file with one topic per line.")
+    parser.add_argument("--random", type=int, default=0, help="Number of additional random-topic tasks.")
+    parser.add_argument("--scenarios", nargs="+", default=["lecture", "conversation"], choices=["lecture", "conversation"])
+    parser.add_argument("--out", default="output/tasks.jsonl", help="Output JSONL path (appended to).")
+    parser.add_argument("--batch-size", type=int, default=10, help="Number of results buffered per file write.")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Maximum tasks in progress at once.")
+    parser.add_argument("--llm-initial-concurrency", type=int, default=4)
+    parser.add_argument("--llm-max-concurrency", type=int, default=32,
+                        help="Upper bound for the adaptive limit on concurrent Gemini calls.")
+    parser.add_argument("--lecture-concurrency", type=int, default=4)
+    parser.add_argument("--conversation-concurrency", type=int, default=3)
+    parser.add_argument("--passage-attempts", type=int, default=1,
+                        help="Passages to try per reading task before giving up on passages that fail review.")
+    parser.add_argument("--chunked-qa", action="store_true",
+                        help="Review each reading question against its own paragraphs in parallel calls.")
+    parser.add_argument("--difficulty", choices=["easy", "medium", "hard"],
+                        help="Target difficulty band for reading passages, checked locally before questions are made.")
+    parser.add_argument("--max-drafts", type=int, default=3,
+                        help="Passage drafts to try per task before settling for the one closest to --difficulty.")
+    parser.add_argument("--topic-cache",
+                        help="Reading only: a JSONL cache of QA-passed tasks reused for near-identical topics.")
+    parser.add_argument("--cache-threshold", type=float, default=0.9,
+                        help="Topic similarity (0-1) at which a cached task is served as is.")
+    parser.add_argument("--cache-seed-threshold", type=float, default=0.8,
+                        help="Topic similarity at which a cached passage is used as a model for a new one.")
+    parser.add_argument("--render-audio", action="store_true", help="Also render listening scripts to audio.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Sample stacks and write flame graphs for the run and the slowest tasks.")
+    parser.add_argument("--profile-dir", default="output/profiles", help="Where --profile writes its files.")
+    parser.add_argument("--profile-top", type=int, default=5, help="Slowest tasks to export with --profile.")
+    args = parser.parse_args(argv)
+
+    topics = _load_topics(args)
+    if not topics:
+        parser.error("Provide --topics-file and/or --random N.")
+
+    from llm_client import configure_default_limiter
+
+    limiter = configure_default_limiter(
+        initial_limit=args.llm_initial_concurrency,
+        max_limit=args.llm_max_concurrency,
+    )
+
+    topic_cache = None
+    if args.section == "reading" and args.topic_cache:
+        from topic_cache import TopicCache
+
+        topic_cache = TopicCache(
+            args.topic_cache,
+            threshold=args.cache_threshold,
+            seed_threshold=args.cache_seed_threshold,
+            scope=args.difficulty or "",
+        )
+
+    if args.section == "reading":
+        handler = build_reading_handler(
+            passage_attempts=args.passage_attempts,
+            chunked_qa=args.chunked_qa,
+            difficulty=args.difficulty,
+            max_drafts=args.max_drafts,
+            topic_cache=topic_cache,
+        )
+        items = reading_items(topics)
+        lane_limits = {}
+    else:
+        handler = build_listening_handler(render_audio=args.render_audio)
+        items = listening_items(topics, args.scenarios)
+        lane_limits = {"lecture": args.lecture_concurrency, "conversation": args.conversation_concurrency}
+
+    service = GenerationService(
+        handler,
+        max_concurrency=args.max_concurrency,
+        max_queue_size=len(items),
+        max_jobs_per_user=len(items),
+        lane_limits=lane_limits,
+    ).start()
+
+    if args.profile:
+        profiling.enable(output_dir=args.profile_dir, top_n=args.profile_top)
+    else:
+        profiling.enable_from_env()
+
+    print(f"🔥 Generating {len(items)} {args.section} task(s) → {args.out}")
+    start = time.monotonic()
+    try:
+        with JsonlBatchWriter(args.out, batch_size=args.batch_size) as writer:
+            summary = asyncio.run(run_batch(service, items, writer, on_progress=_print_progress))
+    finally:
+        service.stop()
+        profiling.disable()
+
+    print(f"\n🎉 Batch finished in {time.monotonic() - start:.1f}s: {summary}")
+    print(f"📈 Final LLM concurrency: {limiter.snapshot()}")
+    if topic_cache is not None:
+        print(f"♻️ Topic cache: {topic_cache.stats()}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
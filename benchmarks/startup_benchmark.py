@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a short-lived worker or test process typically imports first.
+ENTRY_MODULES = [
+    "config",
+    "llm_client",
+    "agents.reading_passage",
+    "agents.reading_question",
+    "agents.quality_assurance",
+    "agents.thought_process",
+    "run_cli",
+    "thought_process_generator",
+]
+
+# Modules that should only be imported once an agent actually runs.
+HEAVY_MODULES = ["langchain_google_genai", "langchain_core", "dotenv"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules), "heavy": heavy}}))
+"""
+
+CONSTRUCT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from agents.reading_passage import ReadingPassageAgent
+from agents.reading_question import ReadingQuestionAgent
+from agents.quality_assurance import QualityAssuranceAgent
+agents = [ReadingPassageAgent(), ReadingQuestionAgent(), QualityAssuranceAgent()]
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def _run_snippet(code: str) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    samples = [
+        _run_snippet(IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES))
+        for _ in range(repeat)
+    ]
+    return {
+        "module": module,
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "modules_loaded": samples[-1]["modules"],
+        "heavy_imports": samples[-1]["heavy"],
+    }
+
+
+def measure_agent_construction(repeat: int) -> dict:
+    samples = [_run_snippet(CONSTRUCT_SNIPPET) for _ in range(repeat)]
+    return {
+        "module": "<construct reading agents>",
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "modules_loaded": None,
+        "heavy_imports": [],
+    }
+
+
+def print_report(results: list[dict]):
+    print("=" * 72)
+    print(f"{'Entry point':<36}{'median ms':>12}{'modules':>10}  heavy imports")
+    print("-" * 72)
+    for r in results:
+        modules = "-" if r["modules_loaded"] is None else str(r["modules_loaded"])
+        heavy = ", ".join(r["heavy_imports"]) or "-"
+        print(f"{r['module']:<36}{r['median_ms']:>12.1f}{modules:>10}  {heavy}")
+    print("=" * 72)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start import and agent construction time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreter runs per measurement.")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file.")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Exit non-zero if any entry point's median cold start exceeds this budget.",
+    )
+    args = parser.parse_args(argv)
+
+    results = [measure_import(module, args.repeat) for module in ENTRY_MODULES]
+    results.append(measure_agent_construction(args.repeat))
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r["median_ms"] > args.max_ms]
+        if slow:
+            print(f"🚨 {len(slow)} entry point(s) exceeded the {args.max_ms:.0f} ms budget.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
+from collections import Counter
 from enum import Enum
-from typing import List, Literal, Union, Annotated
+from typing import Dict, Iterable, List, Literal, Optional, Union, Annotated
 from pydantic import BaseModel, Field
 
 
@@ -94,10 +95,57 @@ AnyQuestion = Union[
 ]
 
 
+# Per-passage question mix required by prompts/reading/question_instruction.txt.
+READING_QUESTION_TYPE_RANGES = {
+    "Factual Information": (2, 3),
+    "Negative Factual Information": (1, 1),
+    "Vocabulary-in-Context": (2, 2),
+    "Inference": (1, 1),
+    "Rhetorical Purpose": (1, 1),
+    "Sentence Simplification": (1, 1),
+    "Insert Text": (1, 1),
+    "Prose Summary": (1, 1),
+}
+
+
+def type_mix_violations(question_types: Iterable[str]) -> Dict[str, int]:
+    """Question types whose count falls outside READING_QUESTION_TYPE_RANGES, mapped to their actual count."""
+    counts = Counter(question_types)
+    return {
+        question_type: counts[question_type]
+        for question_type, (low, high) in READING_QUESTION_TYPE_RANGES.items()
+        if not low <= counts[question_type] <= high
+    }
+
+
 class BaseQuestionSet(BaseModel):
     questions: List[Annotated[AnyQuestion, Field(discriminator="question_type")]]
 
 
+class ListeningQuestion(BaseQuestion):
+    question_type: Literal[
+        "Gist-Content",
+        "Gist-Purpose",
+        "Detail",
+        "Function",
+        "Attitude",
+        "Organization",
+        "Connecting Content",
+        "Inference",
+    ]
+    question: str = Field(description="The full text of the question.")
+    options: List[str] = Field(
+        description="A list of 4 multiple-choice options.", min_items=4, max_items=4
+    )
+    answer: Union[str, List[str]] = Field(
+        description="The correct answer text, or a list of 2 answer texts for 'Detail' questions with two correct options."
+    )
+
+
+class ListeningQuestionSet(BaseModel):
+    questions: List[ListeningQuestion]
+
+
 class ScoreItem(BaseModel):
     score: int = Field(description="The score from 1 to 5.", ge=1, le=5)
     comment: str = Field(description="A brief comment justifying the score.")
@@ -111,6 +159,14 @@ class PassageQualityScores(BaseModel):
     tone: ScoreItem
 
 
+class QuestionReview(BaseModel):
+    """Scores for a single question, reviewed against the paragraphs it is about."""
+    clarity_of_stem: ScoreItem
+    unambiguous_correct_answer: ScoreItem
+    plausible_distractors: ScoreItem
+    passage_dependency: ScoreItem
+
+
 class QuestionSetQualityScores(BaseModel):
     clarity_of_stem: ScoreItem
     unambiguous_correct_answer: ScoreItem
@@ -132,3 +188,38 @@ class OverallSummary(BaseModel):
 class EvaluationResult(BaseModel):
     evaluation_scores: EvaluationScores
     overall_summary: OverallSummary
+
+
+class PassageEvaluationResult(BaseModel):
+    passage_quality: PassageQualityScores
+    overall_summary: OverallSummary
+
+
+class QuestionSetEvaluationResult(BaseModel):
+    question_set_quality: QuestionSetQualityScores
+    overall_summary: OverallSummary
+
+
+class ReadingTask(BaseModel):
+    topic: str
+    passage: str
+    questions_set: BaseQuestionSet
+    evaluation_result: Optional[EvaluationResult] = None
+    prompt_version: Optional[str] = None
+    difficulty_score: Optional[float] = None
+
+
+class ListeningTask(BaseModel):
+    scenario: Literal["lecture", "conversation"]
+    topic: str
+    script: str
+    questions_set: ListeningQuestionSet
+    evaluation_result: Optional[EvaluationResult] = None
+    audio_path: Optional[str] = None
+    prompt_version: Optional[str] = None
+
+
+class ReadingForm(BaseModel):
+    tasks: List[ReadingTask]
+    question_type_counts: dict[str, int]
+    mean_difficulty: float
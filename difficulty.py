@@ -0,0 +1,315 @@
+"""
+Local difficulty scoring for reading passages.
+
+`DifficultyScorer` turns a passage into a handful of surface features and
+combines them linearly into a score on a US grade-level scale (the passage
+instruction targets Flesch-Kincaid 10-12):
+
+* word frequency bands: the share of words outside a general-service list of
+  common English words, and the share from the Academic Word List;
+* the sentence length distribution: mean, spread and share of long sentences;
+* lexical density: content words per word;
+* syllables per word, as in Flesch-Kincaid.
+
+Scoring needs no model call and takes well under a millisecond per passage,
+so generated passages can be checked against a target band before any
+questions or reviews are spent on them.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+FUNCTION_WORDS = frozenset("""
+a about above after again against all also although am among an and another any are as at be because been before
+being below between both but by can could did do does doing down during each either enough even ever every few for
+from further had has have having he her here hers herself him himself his how however i if in into is it its itself
+just least less many may me might more most much must my myself neither no nor not now of off often on once one only
+or other others our ours out over own per rather same several she should since so some such than that the their
+theirs them themselves then there therefore these they this those though through thus to too toward towards under
+until up upon us very was we were what whatever when where whether which while who whom whose why will with within
+without would yet you your
+""".split())
+
+# A compact general-service list: everyday words a B1 reader knows.
+COMMON_WORDS = frozenset("""
+able accept across act add age ago agree air allow almost alone along already always animal answer appear apply area
+arm army around arrive art ask away baby back bad ball bank base bear beat beautiful become bed begin behind believe
+belong best better big bird birth black blood blue board boat body book born bottom box boy break bring brother build
+burn business buy call camp car care carry case catch cause center central century certain chance change charge cheap
+check child choose church city claim class clean clear close clothes cloud cold collect college color come common
+company compare complete condition consider contain continue control cook cool copy corner cost count country course
+cover create cross crowd cry cup current cut dance danger dark date daughter day dead deal dear death decide deep
+degree depend describe design detail develop die difference different difficult direct discover disease distance
+divide doctor dog door double doubt draw dream dress drink drive drop dry due early earth east easy eat edge effect
+effort egg eight else empty end enemy energy enjoy enter equal escape especially establish event evening everything
+exact example except exchange exist expect experience explain express eye face fact fail fall family famous far farm
+fast father fear feel field fight figure fill final find fine finger finish fire firm first fish five floor flow flower
+fly follow food foot force foreign forest forget form forward four free fresh friend front fruit full fun future game
+garden gas gather general get girl give glass go god gold good government grass great green ground group grow guess
+gun hair half hall hand happen happy hard head health hear heart heat heavy help high hill history hit hold hole home
+hope horse hospital hot hour house huge human hundred hunt hurry idea ill image important include increase industry
+information inside instead interest iron island job join judge keep key kill kind king know knowledge labor lady lake
+land language large last late laugh law lay lead learn leave left leg lend length letter level library lie life lift
+light like line list listen little live local long look lose loss lot love low machine main make man manage mark market
+marry mass matter mean measure meat meet member memory metal method middle mile milk mind minute miss modern moment
+money month moon morning mother mountain mouth move music name nation native natural nature near necessary need never
+new news next night nine noise north note nothing notice number object observe ocean offer office oil old open order
+ordinary organize origin outside page pain paint pair paper parent part party pass past pay peace people perhaps
+period person pick picture piece place plain plan plant play please point poor popular position possible pound power
+practice prepare present president press pretty price print private probably problem produce product program promise
+protect prove provide public pull purpose push put quality quarter queen quick quiet race rain raise range rate reach
+read ready real reason receive record red reduce region remain remember report represent rest result return rich ride
+right ring rise river road rock role room root rough round row rule run safe sail salt save say school science sea
+season seat second see seed seem sell send sense separate serve set settle seven shape share ship shop short show side
+sign simple sing single sister sit six size skill skin sky sleep slow small smell smile snow social society soft soil
+soldier son song soon sort sound south space speak special speed spend spring square stand star start state station
+stay step still stone stop store story strange street strong student study subject succeed sudden summer sun supply
+support sure surface system table take talk tall teach team tell ten term test thank thick thin thing think third
+thousand three throw time today together tomorrow tool top total touch town trade train travel tree trouble true try
+turn two type understand unit use usual valley value village visit voice wait walk wall want war warm wash watch water
+way weak wealth wear weather week weight well west wet white whole wide wife wild win wind window winter wish woman
+wonder wood work world worry write wrong year yellow young
+""".split())
+
+# Headwords from the Academic Word List (Coxhead, 2000), most frequent sublists.
+ACADEMIC_WORDS = frozenset("""
+abstract academic access accommodate accompany accumulate accurate achieve acknowledge acquire adapt adequate adjacent
+adjust administrate adult advocate affect aggregate aid albeit allocate alter alternative ambiguous amend analogy
+analyse analyze annual anticipate apparent append appreciate approach appropriate approximate arbitrary aspect
+assemble assess assign assist assume assure attach attain attitude attribute author authority automate available
+aware behalf benefit bias bond brief bulk capable capacity category cease challenge channel chapter chart chemical
+circumstance cite civil clarify classic clause code coherent coincide collapse colleague commence comment commission
+commit commodity communicate community compatible compensate compile complement complex component compound
+comprehensive comprise compute conceive concentrate concept conclude concurrent conduct confer confine confirm
+conflict conform consent consequent considerable consist constant constitute constrain construct consult consume
+contact contemporary context contract contradict contrary contrast contribute controversy convene converse convert
+convince cooperate coordinate core corporate correspond couple create credit criteria crucial culture currency cycle
+data debate decade decline deduce define definite demonstrate denote deny depress derive design despite detect
+deviate device devote differentiate dimension diminish discrete discriminate displace display dispose distinct
+distort distribute diverse document domain domestic dominate draft drama duration dynamic economy edit element
+eliminate emerge emphasis empirical enable encounter energy enforce enhance enormous ensure entity environment
+equate equip equivalent erode error establish estate estimate ethic ethnic evaluate eventual evident evolve exceed
+exclude exhibit expand expert explicit exploit export expose external extract facilitate factor feature federal fee
+file final finance finite flexible fluctuate focus format formula forthcoming foundation framework function fund
+fundamental furthermore gender generate generation globe goal grade grant guarantee guideline hence hierarchy
+highlight hypothesis identical identify ideology ignorance illustrate image immigrate impact implement implicate
+implicit imply impose incentive incidence incline income incorporate index indicate individual induce inevitable
+infer infrastructure inherent inhibit initial initiate injure innovate input insert insight inspect instance
+institute instruct integral integrate integrity intelligence intense interact intermediate internal interpret
+interval intervene intrinsic invest investigate invoke involve isolate issue item journal justify label labour layer
+lecture legal legislate levy liberal licence likewise link locate logic maintain major manipulate manual margin
+mature maximise mechanism media mediate medical medium mental method migrate military minimal minimise minimum
+ministry minor mode modify monitor motive mutual negate network neutral nevertheless nonetheless norm normal notion
+notwithstanding nuclear objective obtain obvious occupy occur odd offset ongoing option orient outcome output overall
+overlap overseas panel paradigm paragraph parallel parameter participate partner passive perceive percent period
+persist perspective phase phenomenon philosophy physical plus policy portion pose positive potential practitioner
+precede precise predict predominant preliminary presume previous primary prime principal principle prior priority
+proceed process professional prohibit project promote proportion prospect protocol psychology publication publish
+purchase pursue qualitative quote radical random range ratio rational react recover refine regime region register
+regulate reinforce reject relax release relevant reluctance rely remove require research reside resolve resource
+respond restore restrain restrict retain reveal revenue reverse revise revolution rigid role route scenario schedule
+scheme scope section sector secure seek select sequence series sex shift significant similar simulate site so-called
+sole somewhat source specific specify sphere stable statistic status straightforward strategy stress structure style
+submit subordinate subsequent subsidy substitute successor sufficient sum summary supplement survey survive suspend
+sustain symbol tape target task team technical technique technology temporary tense terminate text theme theory
+thereby thesis topic trace tradition transfer transform transit transmit transport trend trigger ultimate undergo
+underlie undertake uniform unify unique utilise valid vary vehicle version via violate virtual visible vision visual
+volume voluntary welfare whereas whereby widespread
+""".split())
+
+_WORD = re.compile(r"[a-z]+(?:[-'][a-z]+)*")
+
+
+def _byte_class(chars: bytes) -> np.ndarray:
+    table = np.zeros(256, dtype=bool)
+    table[list(chars)] = True
+    return table
+
+
+# Lookup tables over UTF-8 bytes; non-ASCII bytes are never letters.
+_LETTER = _byte_class(b"abcdefghijklmnopqrstuvwxyz")
+_WORD_CHAR = _byte_class(b"abcdefghijklmnopqrstuvwxyz'-")
+_VOWEL = _byte_class(b"aeiouy")
+_SENTENCE_PUNCT = _byte_class(b".!?")
+_SPACE = _byte_class(b" \t\r\n")
+_NEWLINE, _E, _D = ord("\n"), ord("e"), ord("d")
+
+# Lookup codes for the frequency bands.
+FUNCTION, COMMON, ACADEMIC, RARE = 0, 1, 2, 3
+
+FEATURES = (
+    "mean_sentence_words",
+    "sentence_words_std",
+    "long_sentence_share",
+    "syllables_per_word",
+    "rare_share",
+    "academic_share",
+    "lexical_density",
+)
+
+# Grade = (FEATURES - CENTERS) · WEIGHTS - 15.59. Mean sentence length and
+# syllables per word carry the Flesch-Kincaid coefficients; the other terms
+# nudge the grade by a passage's distance from a typical TOEFL passage, about
+# one grade per 20 points of rare or academic content words.
+WEIGHTS = np.array([0.39, 0.04, 2.0, 11.8, 5.0, 5.0, 4.0])
+CENTERS = np.array([0.0, 5.0, 0.1, 0.0, 0.35, 0.20, 0.58])
+INTERCEPT = -15.59 - float(WEIGHTS @ CENTERS)
+
+
+def _inflections(word: str) -> List[str]:
+    forms = [word, word + "s", word + "es", word + "ed", word + "d", word + "ing", word + "ly", word + "er",
+             word + "ers", word + "al", word + "ally", word + "ity", word + "ion", word + "ions", word + "ment",
+             word + "ments", word + "ation", word + "ations"]
+    if word.endswith("e"):
+        stem = word[:-1]
+        forms += [stem + "ing", stem + "ion", stem + "ions", stem + "ation", stem + "ations", stem + "ive", stem + "ity"]
+    if word.endswith("y"):
+        stem = word[:-1]
+        forms += [stem + "ies", stem + "ied", stem + "ily", stem + "ier", stem + "ical"]
+    if word.endswith("ise"):
+        forms += [word[:-3] + "ize", word[:-3] + "izes", word[:-3] + "ized", word[:-3] + "izing"]
+    return forms
+
+
+def _build_bands() -> Dict[str, int]:
+    bands: Dict[str, int] = {}
+    # Later lists win, so a word in both COMMON_WORDS and ACADEMIC_WORDS counts as academic.
+    for code, words in ((COMMON, COMMON_WORDS), (ACADEMIC, ACADEMIC_WORDS)):
+        for word in words:
+            for form in _inflections(word):
+                bands[form] = code
+    for word in FUNCTION_WORDS:
+        bands[word] = FUNCTION
+    return bands
+
+
+_BANDS = _build_bands()
+
+
+@dataclass(frozen=True)
+class DifficultyBand:
+    """A target difficulty: a score range and the feature profile the prompt asks for."""
+
+    name: str
+    min_score: float
+    max_score: float
+    sentence_words: str
+    academic_percent: int
+    description: str
+
+    def contains(self, score: float) -> bool:
+        return self.min_score <= score < self.max_score
+
+    def distance(self, score: float) -> float:
+        return max(self.min_score - score, score - self.max_score, 0.0)
+
+
+DIFFICULTY_BANDS: Dict[str, DifficultyBand] = {
+    band.name: band for band in (
+        DifficultyBand("easy", float("-inf"), 10.0, "14-18", 10,
+                       "accessible prose for intermediate (B1-B2) readers, with mostly common vocabulary"),
+        DifficultyBand("medium", 10.0, 13.0, "19-23", 20,
+                       "a typical TOEFL passage for upper-intermediate (B2-C1) readers"),
+        DifficultyBand("hard", 13.0, float("inf"), "24-30", 28,
+                       "dense university-level prose for advanced (C1-C2) readers"),
+    )
+}
+
+
+@dataclass
+class DifficultyReport:
+    score: float
+    band: str
+    features: Dict[str, float]
+    word_count: int
+
+    def feedback(self, target: DifficultyBand) -> str:
+        """Explains, in prompt-ready terms, how a draft missed `target`."""
+        if target.contains(self.score):
+            return ""
+        direction = "too easy" if self.score < target.min_score else "too difficult"
+        return (
+            f"A previous draft was {direction} (estimated grade level {self.score:.1f}, target band '{target.name}'). "
+            f"It averaged {self.features['mean_sentence_words']:.0f} words per sentence, "
+            f"drew {self.features['academic_share']:.0%} of its content words from the Academic Word List and "
+            f"used {self.features['rare_share']:.0%} less common words. Adjust these toward the targets above."
+        )
+
+
+class DifficultyScorer:
+    def __init__(self, bands: Optional[Dict[str, DifficultyBand]] = None):
+        self.bands = bands or DIFFICULTY_BANDS
+
+    def features(self, text: str) -> np.ndarray:
+        lower = text.lower()
+        words = _WORD.findall(lower)
+        if not words:
+            return np.zeros(len(FEATURES))
+        codes = np.array(list(map(_BANDS.get, words, [RARE] * len(words))), dtype=np.int8)
+        counts = np.bincount(codes, minlength=4)
+        content = max(int(counts[COMMON:].sum()), 1)
+
+        # Character-level passes over the raw bytes instead of per-word Python loops.
+        data = np.frombuffer(lower.encode("utf-8"), dtype=np.uint8)
+        letter, vowel = _LETTER[data], _VOWEL[data]
+        prev_word_char = np.concatenate(([False], _WORD_CHAR[data[:-1]]))
+        prev_vowel = np.concatenate(([False], vowel[:-1]))
+        prev_byte = np.concatenate(([0], data[:-1]))
+        next_letter = np.concatenate((letter[1:], [False]))
+        next_byte = np.concatenate((data[1:], [_NEWLINE]))
+        next_space = _SPACE[next_byte]
+
+        word_starts = np.flatnonzero(letter & ~prev_word_char)
+        sentence_ends = np.flatnonzero(
+            (_SENTENCE_PUNCT[data] & next_space) | ((data == _NEWLINE) & (next_byte == _NEWLINE))
+        )
+        sentence_words = np.bincount(np.searchsorted(sentence_ends, word_starts)).astype(float)
+        sentence_words = sentence_words[sentence_words > 0]
+
+        # Vowel groups, minus a final silent "e" ("make") and a silent "-ed" ("walked").
+        consonant_before = _LETTER[prev_byte] & ~_VOWEL[prev_byte]
+        final_e = (data == _E) & ~next_letter & consonant_before & (prev_byte != ord("l"))
+        final_ed = ((data == _E) & (next_byte == _D) & consonant_before
+                    & (prev_byte != ord("t")) & (prev_byte != _D)
+                    & ~np.concatenate((letter[2:], [False, False])))
+        syllables = int((vowel & ~prev_vowel).sum() - final_e.sum() - final_ed.sum())
+        syllables = max(syllables, len(words))
+
+        return np.array([
+            sentence_words.mean(),
+            sentence_words.std(),
+            float((sentence_words > 30).mean()),
+            syllables / len(words),
+            counts[RARE] / content,
+            counts[ACADEMIC] / content,
+            content / len(words),
+        ])
+
+    def features_batch(self, texts: Sequence[str]) -> np.ndarray:
+        return np.vstack([self.features(text) for text in texts]) if texts else np.zeros((0, len(FEATURES)))
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Grade-level scores for many passages with one matrix product."""
+        return self.features_batch(texts) @ WEIGHTS + INTERCEPT
+
+    def score(self, text: str) -> DifficultyReport:
+        features = self.features(text)
+        score = float(features @ WEIGHTS + INTERCEPT)
+        return DifficultyReport(
+            score=round(score, 2),
+            band=self.band_for(score),
+            features={name: round(float(value), 4) for name, value in zip(FEATURES, features)},
+            word_count=len(_WORD.findall(text.lower())),
+        )
+
+    def band_for(self, score: float) -> str:
+        return next(name for name, band in self.bands.items() if band.contains(score))
+
+    def rank(self, texts: Sequence[str], target: str) -> List[int]:
+        """Indices of `texts`, closest to the `target` band first."""
+        band = self.bands[target]
+        scores = self.score_batch(texts)
+        distance = np.maximum(np.maximum(band.min_score - scores, scores - band.max_score), 0.0)
+        return [int(i) for i in np.argsort(distance, kind="stable")]
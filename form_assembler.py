@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import READING_QUESTION_TYPE_RANGES, EvaluationResult, ReadingForm, ReadingTask
+from single_flight import fingerprint
+
+
+class InsufficientPoolError(RuntimeError):
+    """Raised when the pool cannot satisfy a form spec and no generator was given."""
+
+    def __init__(self, message: str, missing: List["GenerationRequest"]):
+        super().__init__(message)
+        self.missing = missing
+
+
+def task_difficulty(evaluation_result: EvaluationResult) -> float:
+    """
+    Difficulty on the QA 1-5 scale: the mean of the passage's readability and
+    vocabulary distribution scores.
+    """
+    passage_quality = evaluation_result.evaluation_scores.passage_quality
+    return (passage_quality.readability.score + passage_quality.vocabulary_distribution.score) / 2
+
+
+def question_type_counts(task: ReadingTask) -> Counter:
+    return Counter(q.question_type for q in task.questions_set.questions)
+
+
+def difficulty_band(difficulty_target: float) -> str:
+    """The passage difficulty band (see `difficulty.py`) for a target on the QA 1-5 scale."""
+    if difficulty_target < 7 / 3:
+        return "easy"
+    if difficulty_target < 11 / 3:
+        return "medium"
+    return "hard"
+
+
+def _topic_key(topic: str) -> str:
+    return topic.strip().lower()
+
+
+@dataclass
+class PooledTask:
+    task_id: str
+    task: ReadingTask
+    type_counts: Counter
+    difficulty: float
+
+    @classmethod
+    def from_task(cls, task: ReadingTask) -> "PooledTask":
+        return cls(
+            # Tasks can share a passage (for example after question regeneration), so the questions are part of the ID.
+            task_id=fingerprint({"passage": task.passage, "questions_set": task.questions_set})[:16],
+            task=task,
+            type_counts=question_type_counts(task),
+            difficulty=task_difficulty(task.evaluation_result),
+        )
+
+
+class TaskPool:
+    """Generated reading tasks that can be assembled into forms."""
+
+    def __init__(self, tasks: Iterable[ReadingTask] = (), path: Optional[str] = None):
+        self.path = path
+        self._tasks: Dict[str, PooledTask] = {}
+        for task in tasks:
+            self._add(task)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "TaskPool":
+        """Loads the batch runner's output. Failed or unevaluated records are ignored."""
+        pool = cls(path=path)
+        if not os.path.exists(path):
+            return pool
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("status") == "done" and record.get("lane", "reading") == "reading":
+                    pool._add(ReadingTask.model_validate(record["task"]))
+        return pool
+
+    def add(self, task: ReadingTask) -> Optional[PooledTask]:
+        """Adds a task and appends it to the pool file, if the pool has one."""
+        pooled = self._add(task)
+        if pooled is not None and self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                record = {"lane": "reading", "status": "done", "task": task.model_dump(mode="json")}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return pooled
+
+    def _add(self, task: ReadingTask) -> Optional[PooledTask]:
+        if task.evaluation_result is None:
+            return None
+        pooled = PooledTask.from_task(task)
+        self._tasks[pooled.task_id] = pooled
+        return pooled
+
+    def __iter__(self):
+        return iter(self._tasks.values())
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+@dataclass
+class FormSpec:
+    passages: int = 3
+    # Inclusive (min, max) question count per type across the whole form.
+    question_type_ranges: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # Inclusive (min, max) mean difficulty across the form, on the QA 1-5 scale.
+    difficulty_range: Tuple[float, float] = (1.0, 5.0)
+    require_pass: bool = True
+
+    def __post_init__(self):
+        if not self.question_type_ranges:
+            self.question_type_ranges = {
+                question_type: (low * self.passages, high * self.passages)
+                for question_type, (low, high) in READING_QUESTION_TYPE_RANGES.items()
+            }
+
+
+@dataclass
+class GenerationRequest:
+    """A description of one passage the pool is missing."""
+
+    difficulty_target: float
+    needed_question_types: Dict[str, int]
+    exclude_topics: List[str]
+
+
+@dataclass
+class Assembly:
+    selected: List[PooledTask]
+    missing: List[GenerationRequest]
+    nodes_explored: int
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+
+class FormAssembler:
+    """
+    Picks tasks from a pool to satisfy a FormSpec.
+
+    The solver is a depth-first search over candidate combinations, ordered
+    greedily (closest to the difficulty target, most needed question types
+    first) and pruned with per-type and difficulty bounds, so typical pools
+    are solved on the first descent. When the pool cannot satisfy the spec,
+    the largest partial selection that fresh passages could still complete is
+    kept, and the remaining slots are returned as GenerationRequests.
+    """
+
+    def __init__(self, pool: TaskPool, spec: FormSpec, max_nodes: int = 50_000):
+        self.pool = pool
+        self.spec = spec
+        self.max_nodes = max_nodes
+
+    def solve(self) -> Assembly:
+        spec = self.spec
+        low_d, high_d = spec.difficulty_range
+        target_d = (low_d + high_d) / 2
+        candidates = [
+            t for t in self.pool
+            if not spec.require_pass or t.task.evaluation_result.overall_summary.final_decision == "Pass"
+        ]
+        candidates.sort(key=lambda t: (abs(t.difficulty - target_d), -self._coverage(t)))
+
+        n = spec.passages
+        # Suffix bounds let us prune branches that cannot reach the minimums.
+        suffix_max_type = [Counter() for _ in range(len(candidates) + 1)]
+        suffix_min_d = [float("inf")] * (len(candidates) + 1)
+        suffix_max_d = [float("-inf")] * (len(candidates) + 1)
+        for i in range(len(candidates) - 1, -1, -1):
+            c = candidates[i]
+            suffix_max_type[i] = Counter({
+                qt: max(suffix_max_type[i + 1][qt], c.type_counts[qt]) for qt in spec.question_type_ranges
+            })
+            suffix_min_d[i] = min(suffix_min_d[i + 1], c.difficulty)
+            suffix_max_d[i] = max(suffix_max_d[i + 1], c.difficulty)
+
+        state = {"nodes": 0, "solution": None, "best_partial": []}
+
+        def search(start: int, selected: List[PooledTask], counts: Counter, diff_sum: float, topics: set):
+            if state["solution"] is not None or state["nodes"] >= self.max_nodes:
+                return
+            state["nodes"] += 1
+            remaining = n - len(selected)
+
+            if remaining == 0:
+                if self._satisfied(counts, diff_sum):
+                    state["solution"] = list(selected)
+                return
+
+            for i in range(start, len(candidates) - remaining + 1):
+                c = candidates[i]
+                topic = _topic_key(c.task.topic)
+                if topic in topics:
+                    continue
+                new_counts = counts + c.type_counts
+                if any(new_counts[qt] > high for qt, (_, high) in spec.question_type_ranges.items()):
+                    continue
+                new_sum = diff_sum + c.difficulty
+                left = remaining - 1
+                # Track the best partial before pool-based pruning: fresh passages may complete it.
+                if len(selected) + 1 > len(state["best_partial"]) and self._completable_with_new(new_counts, new_sum, left):
+                    state["best_partial"] = selected + [c]
+                if left:
+                    if new_sum + left * suffix_min_d[i + 1] > high_d * n:
+                        continue
+                    if new_sum + left * suffix_max_d[i + 1] < low_d * n:
+                        continue
+                    if any(
+                        new_counts[qt] + left * suffix_max_type[i + 1][qt] < low
+                        for qt, (low, _) in spec.question_type_ranges.items()
+                    ):
+                        continue
+                selected.append(c)
+                topics.add(topic)
+                search(i + 1, selected, new_counts, new_sum, topics)
+                selected.pop()
+                topics.discard(topic)
+                if state["solution"] is not None:
+                    return
+
+        search(0, [], Counter(), 0.0, set())
+
+        if state["solution"] is not None:
+            return Assembly(selected=state["solution"], missing=[], nodes_explored=state["nodes"])
+        partial = state["best_partial"]
+        return Assembly(selected=partial, missing=self._missing_requests(partial), nodes_explored=state["nodes"])
+
+    def assemble(
+        self,
+        generate: Optional[Callable[[List[GenerationRequest]], List[ReadingTask]]] = None,
+        max_rounds: int = 3,
+    ) -> ReadingForm:
+        """
+        Solves the spec from the pool, generating only the missing passages
+        (via `generate`) and adding them to the pool until the form is complete.
+
+        Raises:
+            InsufficientPoolError: If the form is still incomplete.
+        """
+        assembly = self.solve()
+        for _ in range(max_rounds):
+            if assembly.complete or generate is None:
+                break
+            print(f"▶️ Pool is missing {len(assembly.missing)} passage(s); generating only those...")
+            for task in generate(assembly.missing):
+                self.pool.add(task)
+            assembly = self.solve()
+
+        if not assembly.complete:
+            raise InsufficientPoolError(
+                f"The pool cannot satisfy the form spec; {len(assembly.missing)} passage(s) missing.",
+                assembly.missing,
+            )
+
+        counts = Counter()
+        for t in assembly.selected:
+            counts += t.type_counts
+        return ReadingForm(
+            tasks=[t.task for t in assembly.selected],
+            question_type_counts=dict(counts),
+            mean_difficulty=sum(t.difficulty for t in assembly.selected) / len(assembly.selected),
+        )
+
+    def _coverage(self, task: PooledTask) -> int:
+        return sum(1 for qt in self.spec.question_type_ranges if task.type_counts[qt] > 0)
+
+    def _satisfied(self, counts: Counter, diff_sum: float) -> bool:
+        low_d, high_d = self.spec.difficulty_range
+        mean = diff_sum / self.spec.passages
+        return low_d <= mean <= high_d and all(
+            low <= counts[qt] <= high for qt, (low, high) in self.spec.question_type_ranges.items()
+        )
+
+    def _completable_with_new(self, counts: Counter, diff_sum: float, remaining: int) -> bool:
+        """Whether `remaining` freshly generated passages (with the standard mix) could finish the form."""
+        return self._shortfall(counts, diff_sum, remaining) == 0
+
+    def _shortfall(self, counts: Counter, diff_sum: float, remaining: int) -> float:
+        """
+        How far `remaining` fresh passages (with the standard mix) would leave
+        the form from its spec: question type counts out of range plus mean
+        difficulty out of range, in passages. 0 if they could complete it.
+        """
+        low_d, high_d = self.spec.difficulty_range
+        n = self.spec.passages
+        shortfall = max(0.0, low_d * n - diff_sum - remaining * 5.0, diff_sum + remaining * 1.0 - high_d * n)
+        for qt, (low, high) in self.spec.question_type_ranges.items():
+            per_low, per_high = READING_QUESTION_TYPE_RANGES.get(qt, (0, 0))
+            shortfall += max(0, low - counts[qt] - remaining * per_high, counts[qt] + remaining * per_low - high)
+        return shortfall
+
+    def _weakest_pick(self, selected: List[PooledTask]) -> int:
+        """The index of the pick whose replacement by a fresh passage leaves the smallest shortfall."""
+        total_counts = Counter()
+        for t in selected:
+            total_counts += t.type_counts
+        total_d = sum(t.difficulty for t in selected)
+        # Ties go to the latest pick, the one the greedy order liked least.
+        return min(
+            reversed(range(len(selected))),
+            key=lambda i: self._shortfall(total_counts - selected[i].type_counts, total_d - selected[i].difficulty, 1),
+        )
+
+    def _missing_requests(self, selected: List[PooledTask]) -> List[GenerationRequest]:
+        n = self.spec.passages
+        remaining = n - len(selected)
+        if remaining == 0:
+            # Every slot is filled but the mix is off; replace the weakest pick.
+            weakest = self._weakest_pick(selected)
+            selected = selected[:weakest] + selected[weakest + 1:]
+            remaining = 1
+        counts = Counter()
+        for t in selected:
+            counts += t.type_counts
+        diff_sum = sum(t.difficulty for t in selected)
+        low_d, high_d = self.spec.difficulty_range
+        target = min(5.0, max(1.0, ((low_d + high_d) / 2 * n - diff_sum) / remaining))
+        needed = {
+            qt: max(0, low - counts[qt]) for qt, (low, _) in self.spec.question_type_ranges.items()
+        }
+        topics = [t.task.topic for t in self.pool]
+        return [
+            GenerationRequest(
+                difficulty_target=round(target, 2),
+                needed_question_types={qt: -(-count // remaining) for qt, count in needed.items() if count},
+                exclude_topics=topics,
+            )
+            for _ in range(remaining)
+        ]
+
+
+def build_generator(topics: Iterable[str]) -> Callable[[List[GenerationRequest]], List[ReadingTask]]:
+    """
+    Generates missing passages concurrently with the standard reading pipeline.
+
+    Each request gets the first of `topics` that is neither in its
+    `exclude_topics` nor already taken by another request, and a passage
+    agent targeting the difficulty band closest to its `difficulty_target`.
+    The question agent is asked for the request's `needed_question_types`;
+    tasks that still do not supply them are dropped, so the next solve asks
+    for them again.
+    """
+    from agents.reading_passage import ReadingPassageAgent
+    from agents.reading_question import ReadingQuestionAgent
+    from agents.quality_assurance import QualityAssuranceAgent
+    from pipeline import generate_reading_task
+
+    candidates = list(dict.fromkeys(topic.strip() for topic in topics if topic.strip()))
+    passage_agents: Dict[str, ReadingPassageAgent] = {}
+    question_agent = ReadingQuestionAgent()
+    qa_agent = QualityAssuranceAgent()
+
+    def generate(requests: List[GenerationRequest]) -> List[ReadingTask]:
+        taken = set()
+        jobs = []
+        for request in requests:
+            excluded = taken | {_topic_key(topic) for topic in request.exclude_topics}
+            topic = next((t for t in candidates if _topic_key(t) not in excluded), None)
+            if topic is None:
+                print("⚠️ No candidate topic is left that the pool does not already cover.")
+                continue
+            taken.add(_topic_key(topic))
+            band = difficulty_band(request.difficulty_target)
+            if band not in passage_agents:
+                passage_agents[band] = ReadingPassageAgent(difficulty=band)
+            jobs.append((request, topic, passage_agents[band]))
+
+        async def generate_all():
+            return await asyncio.gather(
+                *(generate_reading_task(
+                    topic, passage_agent, question_agent, qa_agent,
+                    question_types=request.needed_question_types,
+                ) for request, topic, passage_agent in jobs),
+                return_exceptions=True,
+            )
+
+        tasks = []
+        for (request, topic, _), result in zip(jobs, asyncio.run(generate_all()) if jobs else []):
+            if not isinstance(result, ReadingTask):
+                print(f"❌ Generating '{topic}' failed: {result}")
+                continue
+            counts = question_type_counts(result)
+            short = {qt: n for qt, n in request.needed_question_types.items() if counts[qt] < n}
+            if short:
+                print(f"❌ '{topic}' does not supply the needed question types {short}; discarded.")
+                continue
+            tasks.append(result)
+        return tasks
+
+    return generate
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Assemble a full reading practice form from a pool of generated tasks.")
+    parser.add_argument("--pool", default="output/reading.jsonl", help="JSONL pool written by batch_runner.py.")
+    parser.add_argument("--passages", type=int, default=3)
+    parser.add_argument("--difficulty", type=float, nargs=2, default=(1.0, 5.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--generate-missing", action="store_true", help="Generate only the passages the pool lacks.")
+    parser.add_argument("--topics-file", help="Candidate topics for generated passages, one per line.")
+    parser.add_argument("--out", default="output/form.json")
+    args = parser.parse_args(argv)
+    if args.generate_missing and not args.topics_file:
+        parser.error("--generate-missing needs --topics-file to pick topics the pool does not cover.")
+
+    pool = TaskPool.from_jsonl(args.pool)
+    spec = FormSpec(passages=args.passages, difficulty_range=tuple(args.difficulty))
+    assembler = FormAssembler(pool, spec)
+    print(f"📚 Assembling a {args.passages}-passage form from a pool of {len(pool)} task(s)...")
+
+    try:
+        generate = None
+        if args.generate_missing:
+            with open(args.topics_file, "r", encoding="utf-8") as f:
+                generate = build_generator(f.read().splitlines())
+        form = assembler.assemble(generate=generate)
+    except InsufficientPoolError as e:
+        print(f"🚨 {e}")
+        for request in e.missing:
+            print(f"  - difficulty ≈ {request.difficulty_target}, needs {request.needed_question_types or 'standard mix'}")
+        return 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(form.model_dump_json(indent=2))
+    print(f"🎉 Form written to {args.out} (mean difficulty {form.mean_difficulty:.2f}, mix {form.question_type_counts})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
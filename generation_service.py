@@ -0,0 +1,301 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job cannot be accepted because the queue or the user's quota is full."""
+
+
+@dataclass
+class GenerationJob:
+    job_id: str
+    key: Hashable
+    payload: Any
+    lane: str
+    owner_id: str
+    user_ids: Set[str] = field(default_factory=set)
+    status: str = "queued"
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def queue_delay(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.submitted_at
+
+
+class GenerationService:
+    """
+    A shared, asyncio-based job runner for generation pipelines.
+
+    The service owns an event loop on a background thread. Callers on any thread
+    submit jobs and either poll `get_job` or wait on `job.future`. Jobs are
+    queued per user and dispatched round-robin across users so a single user
+    cannot starve the others. At most `max_concurrency` jobs run at once (and at
+    most `lane_limits[lane]` per lane). A job submitted while another job with
+    the same key is queued or running is coalesced into the existing job.
+
+    `stop` cancels running jobs and fails queued ones, so no `job.future`
+    waiter is left hanging.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        max_concurrency: int = 4,
+        max_queue_size: int = 32,
+        max_jobs_per_user: int = 2,
+        lane_limits: Optional[Dict[str, int]] = None,
+        result_ttl: float = 600.0,
+    ):
+        self._handler = handler
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.max_jobs_per_user = max_jobs_per_user
+        self.lane_limits = dict(lane_limits or {})
+        self.result_ttl = result_ttl
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._inflight: Dict[Hashable, GenerationJob] = {}
+        self._user_queues: "OrderedDict[str, deque[GenerationJob]]" = OrderedDict()
+        self._queued_count = 0
+        self._running: Dict[str, int] = {}
+        self._running_total = 0
+        self._coalesced_count = 0
+        self._stopping = False
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop_ready = threading.Event()
+
+    def start(self) -> "GenerationService":
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run_loop, name="generation-service", daemon=True)
+        self._thread.start()
+        self._loop_ready.wait()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Fails queued jobs, cancels running ones and shuts the event loop down."""
+        if self._loop is None:
+            return
+        with self._lock:
+            self._stopping = True
+        shutdown = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            shutdown.result(timeout)
+        except concurrent.futures.TimeoutError:
+            print(f"Warning: Running jobs did not stop within {timeout}s.")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self._loop = None
+        self._loop_ready.clear()
+        with self._lock:
+            self._stopping = False
+
+    def submit(self, user_id: str, key: Hashable, payload: Any, lane: str = "default") -> GenerationJob:
+        """
+        Queues a job, or joins an identical job that is already queued or running.
+
+        Raises:
+            QueueFullError: If the global queue or the user's quota is full.
+        """
+        if self._loop is None:
+            raise RuntimeError("GenerationService is not running. Call start() first.")
+
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("GenerationService is stopping.")
+            self._prune_finished()
+
+            existing = self._inflight.get(key)
+            if existing is not None:
+                existing.user_ids.add(user_id)
+                self._coalesced_count += 1
+                return existing
+
+            if self._queued_count >= self.max_queue_size:
+                raise QueueFullError(f"The generation queue is full ({self.max_queue_size} jobs waiting).")
+            if self._active_jobs_for(user_id) >= self.max_jobs_per_user:
+                raise QueueFullError(f"User already has {self.max_jobs_per_user} jobs pending.")
+
+            job = GenerationJob(
+                job_id=uuid.uuid4().hex,
+                key=key,
+                payload=payload,
+                lane=lane,
+                owner_id=user_id,
+                user_ids={user_id},
+            )
+            self._jobs[job.job_id] = job
+            self._inflight[key] = job
+            self._user_queues.setdefault(user_id, deque()).append(job)
+            self._queued_count += 1
+
+        self._loop.call_soon_threadsafe(self._wake.set)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job: GenerationJob) -> Optional[int]:
+        """Approximate number of queued jobs that will be dispatched before this one."""
+        with self._lock:
+            if job.status != "queued":
+                return None
+            user_queue = self._user_queues.get(job.owner_id, deque())
+            own_rank = next((i for i, j in enumerate(user_queue) if j is job), 0)
+            # Round-robin: every other user can run up to `own_rank + 1` jobs first.
+            ahead = own_rank
+            for user_id, queue in self._user_queues.items():
+                if user_id != job.owner_id:
+                    ahead += min(len(queue), own_rank + 1)
+            return ahead
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queued_count,
+                "running": self._running_total,
+                "running_by_lane": dict(self._running),
+                "users_waiting": sum(1 for q in self._user_queues.values() if q),
+                "coalesced": self._coalesced_count,
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def _active_jobs_for(self, user_id: str) -> int:
+        return sum(
+            1 for job in self._inflight.values() if job.owner_id == user_id
+        )
+
+    def _prune_finished(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _lane_has_capacity(self, lane: str) -> bool:
+        limit = self.lane_limits.get(lane)
+        return limit is None or self._running.get(lane, 0) < limit
+
+    def _pop_next_job(self) -> Optional[GenerationJob]:
+        """Picks the next runnable job, rotating across users for fairness."""
+        for user_id in list(self._user_queues):
+            queue = self._user_queues[user_id]
+            for job in queue:
+                if self._lane_has_capacity(job.lane):
+                    queue.remove(job)
+                    if queue:
+                        self._user_queues.move_to_end(user_id)
+                    else:
+                        del self._user_queues[user_id]
+                    self._queued_count -= 1
+                    return job
+        return None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._wake = asyncio.Event()
+        self._loop.create_task(self._dispatch())
+        self._loop_ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for task in asyncio.all_tasks(self._loop):
+                task.cancel()
+            self._loop.close()
+
+    async def _dispatch(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    if self._running_total >= self.max_concurrency:
+                        break
+                    job = self._pop_next_job()
+                    if job is None:
+                        break
+                    job.status = "running"
+                    job.started_at = time.monotonic()
+                    self._running[job.lane] = self._running.get(job.lane, 0) + 1
+                    self._running_total += 1
+                # The loop only keeps weak references to tasks; keep running jobs alive here.
+                task = asyncio.create_task(self._execute(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: GenerationJob):
+        result, error = None, None
+        try:
+            result = await self._handler(job.payload)
+        except asyncio.CancelledError:
+            error = RuntimeError("GenerationService stopped before the job finished.")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                self._running[job.lane] -= 1
+                self._running_total -= 1
+            self._finish(job, result, error)
+            self._wake.set()
+
+    async def _shutdown(self):
+        with self._lock:
+            queued = [job for queue in self._user_queues.values() for job in queue]
+            self._user_queues.clear()
+            self._queued_count = 0
+        for job in queued:
+            self._finish(job, None, RuntimeError("GenerationService stopped before the job started."))
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _finish(self, job: GenerationJob, result: Any, error: Optional[BaseException]):
+        with self._lock:
+            job.finished_at = time.monotonic()
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            if error is None:
+                job.result = result
+                job.status = "done"
+            else:
+                job.error = str(error)
+                job.status = "failed"
+
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
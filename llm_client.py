@@ -1,19 +1,72 @@
+from __future__ import annotations
+
 import os
-import json
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.outputs import LLMResult
+import functools
+import hashlib
+import profiling
+from typing import TYPE_CHECKING
 from config import GeminiModel
+from single_flight import SingleFlight
+from adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+if TYPE_CHECKING:
+    from langchain_core.outputs import LLMResult
+
+_invoke_flight = SingleFlight("llm.invoke")
+
+# Shared by every client in the process so the limit reflects total load on the API.
+default_limiter = AdaptiveConcurrencyLimiter()
+
+
+def configure_default_limiter(**kwargs) -> AdaptiveConcurrencyLimiter:
+    """Replaces the shared limiter. Clients created afterwards use the new one."""
+    global default_limiter
+    default_limiter = AdaptiveConcurrencyLimiter(**kwargs)
+    return default_limiter
+
+
+# Builds the client every agent uses; tests and offline runs swap it out.
+_client_factory = None
+
+
+def set_client_factory(factory) -> None:
+    """
+    Makes `create_client` build clients with `factory(model_name=..., temperature=...)`.
+    Pass None to go back to GoogleLLMClient.
+    """
+    global _client_factory
+    _client_factory = factory
+
 
+def create_client(model_name: GeminiModel = GeminiModel.GEMINI_2_5_FLASH, temperature=0.7) -> "GoogleLLMClient":
+    factory = _client_factory or GoogleLLMClient
+    return factory(model_name=model_name, temperature=temperature)
 
-load_dotenv()
+
+@functools.lru_cache(maxsize=None)
+def _load_env():
+    # Deferred until the first client is built so importing this module stays cheap.
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 
 class GoogleLLMClient:
-    def __init__(self, model_name: GeminiModel = GeminiModel.GEMINI_2_5_FLASH, temperature = 0.7):
+    def __init__(
+        self,
+        model_name: GeminiModel = GeminiModel.GEMINI_2_5_FLASH,
+        temperature = 0.7,
+        limiter: AdaptiveConcurrencyLimiter = None,
+    ):
+        self.limiter = limiter or default_limiter
+        _load_env()
         if not os.getenv("GOOGLE_API_KEY"):
             raise ValueError("GOOGLE_API_KEY environment variable not set")
 
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        self.model_name = str(model_name)
+        self.temperature = temperature
         self.llm = ChatGoogleGenerativeAI(
             model=model_name,
             temperature=temperature,
@@ -23,9 +76,49 @@ class GoogleLLMClient:
         print(f"✅LLM Client initialized with model name: {model_name}")
 
     def invoke(self, prompt: str) -> str:
+        """
+        Sends a prompt to the model. With deterministic settings (see
+        `coalesces`), identical prompts issued concurrently share a single
+        request. The number of requests in flight is bounded by the adaptive
+        concurrency limiter.
+        """
+        with profiling.stage("llm.invoke"):
+            if not self.coalesces:
+                return self._limited_invoke(prompt)
+            return _invoke_flight.do(self._request_key(prompt), lambda: self._limited_invoke(prompt))
+
+    @property
+    def coalesces(self) -> bool:
+        """Only temperature 0 makes identical prompts interchangeable; sampled replies must stay independent."""
+        return self.temperature == 0
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        Async counterpart of `invoke`. Cancelling the awaiting task abandons the
+        request and frees its concurrency slot. Calls are not coalesced.
+        """
+        with profiling.stage("llm.ainvoke", cpu=False):
+            async with self.limiter.acquire_async():
+                with profiling.stage("model", cpu=False):
+                    return await self._ainvoke_model(prompt)
+
+    def _limited_invoke(self, prompt: str) -> str:
+        # Wall time in llm.invoke but outside "model" is spent waiting for a slot.
+        with self.limiter.acquire(), profiling.stage("model"):
+            return self._invoke_model(prompt)
+
+    def _invoke_model(self, prompt: str) -> str:
         result = self.llm.invoke(prompt)
         return result.content
 
+    async def _ainvoke_model(self, prompt: str) -> str:
+        result = await self.llm.ainvoke(prompt)
+        return result.content
+
+    def _request_key(self, prompt: str) -> str:
+        settings = f"{self.model_name}|{self.temperature}|"
+        return hashlib.sha256((settings + prompt).encode("utf-8")).hexdigest()
+
     def batch(self, prompts: list[str]) -> LLMResult:
         return self.llm.generate(prompts)
 
@@ -0,0 +1,294 @@
+"""
+Headless load test for the Streamlit app (run_web.py).
+
+Each simulated session is a Streamlit `AppTest`: a real script run with its
+own session state, sharing the process-wide `st.cache_resource` generation
+service exactly as browser sessions on one server do. A session opens the
+page, types a topic, clicks "Generate & Evaluate Task" and reruns the page
+every `poll_interval` seconds (as the polling fragment does) until the result
+is rendered.
+
+AppTest keeps global runtime state, so script runs are serialized across
+sessions while generation jobs run concurrently in the shared service. The
+time sessions spend waiting for that lock is reported as `harness_wait_ms`;
+it is an artifact of the harness, not of the app.
+
+The model is replaced by `SimulatedLLMClient` with a configurable latency, so
+the numbers measure the app and its queueing, not Gemini:
+
+    python load_test_web.py --sessions 40 --llm-latency 2.0 --ramp-up 10
+
+The report gives p50/p95/p99 end-to-end latency (click to rendered result),
+the queueing delay before each job started, script rerun cost and memory per
+session.
+"""
+import argparse
+import json
+import os
+import pickle
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_web.py")
+
+# Matches run_web.POLL_INTERVAL_SECONDS, the polling fragment's rerun interval.
+DEFAULT_POLL_INTERVAL = 1.0
+
+_script_run_lock = threading.Lock()
+
+_SCORE = {"score": 4, "comment": "Simulated review."}
+_QUESTION_SET = {"questions": [
+    {"question_type": "Factual Information", "question": "According to paragraph 1, what is true?",
+     "options": ["A", "B", "C", "D"], "answer": "A"},
+    {"question_type": "Inference", "question": "What can be inferred from paragraph 2?",
+     "options": ["A", "B", "C", "D"], "answer": "B"},
+]}
+_PASSAGE = "A Simulated Passage\n\n" + "\n\n".join(
+    "This paragraph stands in for generated text so that the app renders a passage of realistic size. " * 12
+    for _ in range(5)
+)
+
+
+def fake_response(prompt: str) -> str:
+    """Answers each agent's prompt with output its parser accepts."""
+    if "question_set_quality" in prompt:
+        return json.dumps({
+            "question_set_quality": {k: _SCORE for k in (
+                "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency",
+                "question_variety")},
+            "overall_summary": {"final_decision": "Pass", "justification": "Simulated review."},
+        })
+    if "passage_quality" in prompt:
+        return json.dumps({
+            "passage_quality": {k: _SCORE for k in (
+                "word_count", "readability", "vocabulary_distribution", "academic_logic_and_cohesion", "tone")},
+            "overall_summary": {"final_decision": "Pass", "justification": "Simulated review."},
+        })
+    if "Passage Generation Goals" in prompt:
+        return _PASSAGE
+    return json.dumps(_QUESTION_SET)
+
+
+@dataclass
+class SessionResult:
+    session: int
+    status: str  # "done", "failed", "rejected" (queue full) or "timeout"
+    latency_s: Optional[float] = None
+    queue_delay_s: Optional[float] = None
+    script_runs: int = 0
+    script_run_s: float = 0.0
+    harness_wait_s: float = 0.0
+    session_state_bytes: int = 0
+    error: Optional[str] = None
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _session_state_bytes(app) -> int:
+    state = {}
+    for key in app.session_state.filtered_state:
+        try:
+            state[key] = pickle.dumps(app.session_state[key])
+        except Exception:
+            continue
+    return sum(len(value) for value in state.values())
+
+
+class WebLoadTest:
+    def __init__(
+        self,
+        sessions: int = 10,
+        ramp_up: float = 0.0,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: float = 120.0,
+        app_path: str = APP_PATH,
+    ):
+        self.sessions = sessions
+        self.ramp_up = ramp_up
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.app_path = app_path
+        # Apps stay alive until the report is built so their memory is counted.
+        self._apps = []
+        self._apps_lock = threading.Lock()
+
+    def run(self) -> dict:
+        from streamlit.testing.v1 import AppTest
+
+        # One warm-up page load builds the cached service and agents, which
+        # every real session after the first one finds ready.
+        with _script_run_lock:
+            AppTest.from_file(self.app_path, default_timeout=self.timeout).run()
+        rss_before = _rss_bytes()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.sessions) as pool:
+            results = list(pool.map(self._simulate_session, range(self.sessions)))
+        wall = time.perf_counter() - start
+
+        rss_after = _rss_bytes()
+        report = self._report(results, wall, rss_before, rss_after)
+        with self._apps_lock:
+            self._apps.clear()
+        return report
+
+    def _simulate_session(self, index: int) -> SessionResult:
+        from streamlit.testing.v1 import AppTest
+
+        if self.sessions > 1:
+            time.sleep(self.ramp_up * index / (self.sessions - 1))
+        result = SessionResult(session=index, status="timeout")
+        app = AppTest.from_file(self.app_path, default_timeout=self.timeout)
+        with self._apps_lock:
+            self._apps.append(app)
+
+        def rerun():
+            wait_start = time.perf_counter()
+            with _script_run_lock:
+                run_start = time.perf_counter()
+                app.run()
+                result.harness_wait_s += run_start - wait_start
+                result.script_runs += 1
+                result.script_run_s += time.perf_counter() - run_start
+
+        try:
+            rerun()
+            app.text_input(key="topic_input").input(f"load test topic {index}")
+            clicked = time.perf_counter()
+            app.button(key="generate_button").click()
+            rerun()
+            while time.perf_counter() - clicked < self.timeout:
+                if app.session_state.task_generated:
+                    result.status = "done"
+                    break
+                if app.session_state.job_id is None:
+                    result.status = "rejected" if app.warning else "failed"
+                    result.error = next((e.value for e in list(app.warning) + list(app.error)), None)
+                    break
+                time.sleep(self.poll_interval)
+                rerun()
+            result.latency_s = time.perf_counter() - clicked
+            if "last_job" in app.session_state:
+                result.queue_delay_s = app.session_state.last_job["queue_delay_s"]
+            result.session_state_bytes = _session_state_bytes(app)
+        except Exception as e:
+            result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+        return result
+
+    def _report(self, results: List[SessionResult], wall: float, rss_before, rss_after) -> dict:
+        done = [r for r in results if r.status == "done"]
+        latencies = [r.latency_s for r in done]
+        queue_delays = [r.queue_delay_s for r in done if r.queue_delay_s is not None]
+        runs = sum(r.script_runs for r in results)
+
+        def summary(values: List[float]) -> dict:
+            return {
+                "p50": _round(_percentile(values, 50)),
+                "p95": _round(_percentile(values, 95)),
+                "p99": _round(_percentile(values, 99)),
+                "max": _round(max(values) if values else None),
+            }
+
+        return {
+            "sessions": len(results),
+            "statuses": {s: sum(r.status == s for r in results) for s in ("done", "failed", "rejected", "timeout")},
+            "wall_s": round(wall, 3),
+            "throughput_tasks_per_min": round(len(done) / wall * 60, 2) if wall else None,
+            "latency_s": summary(latencies),
+            "queue_delay_s": summary(queue_delays),
+            "script_run_ms": {
+                "mean": round(sum(r.script_run_s for r in results) / runs * 1000, 1) if runs else None,
+                "runs": runs,
+            },
+            "harness_wait_ms": {
+                "mean": round(sum(r.harness_wait_s for r in results) / runs * 1000, 1) if runs else None,
+            },
+            "memory_per_session_kb": {
+                "session_state": round(statistics.median(r.session_state_bytes for r in results) / 1024, 1),
+                "process_rss": (round((rss_after - rss_before) / len(results) / 1024, 1)
+                                if rss_before is not None and rss_after is not None else None),
+            },
+            "errors": sorted({r.error for r in results if r.error}),
+            "poll_interval_s": self.poll_interval,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def configure_fake_backend(latency: float = 1.0, capacity: Optional[int] = None):
+    """Routes every agent's model calls to a simulated client with the given latency."""
+    import llm_client
+    from simulated_llm import SimulatedLLMClient, capacity_latency
+
+    curve = capacity_latency(latency, capacity) if capacity else latency
+    llm_client.set_client_factory(lambda model_name, temperature: SimulatedLLMClient(
+        latency=curve, responder=fake_response, limiter=llm_client.default_limiter,
+        model_name=model_name, temperature=temperature,
+    ))
+
+
+def run_load_test(sessions: int = 10, llm_latency: float = 1.0, llm_capacity: Optional[int] = None, **kwargs) -> dict:
+    import streamlit as st
+    import llm_client
+
+    configure_fake_backend(llm_latency, llm_capacity)
+    # A fresh service, built with the fake backend, for this run.
+    st.cache_resource.clear()
+    try:
+        return WebLoadTest(sessions=sessions, **kwargs).run()
+    finally:
+        st.cache_resource.clear()
+        llm_client.set_client_factory(None)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent users of run_web.py against a fake LLM backend.")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent browser sessions to simulate.")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which sessions arrive.")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per simulated model call.")
+    parser.add_argument("--llm-capacity", type=int,
+                        help="Concurrent calls the fake backend serves at full speed; beyond it latency grows.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Seconds between page reruns.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds a session waits for its task.")
+    parser.add_argument("--json", help="Also write the report to this file.")
+    args = parser.parse_args(argv)
+
+    print(f"🔥 Simulating {args.sessions} session(s) against a {args.llm_latency}s fake LLM backend...")
+    report = run_load_test(
+        sessions=args.sessions,
+        llm_latency=args.llm_latency,
+        llm_capacity=args.llm_capacity,
+        ramp_up=args.ramp_up,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "report": report}, f, ensure_ascii=False, indent=2)
+    return 0 if report["statuses"]["done"] == report["sessions"] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
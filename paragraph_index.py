@@ -0,0 +1,88 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_PARAGRAPH_REF = re.compile(r"\bparagraphs?\s+(\d+)(?:\s*(?:and|,|-|to)\s*(\d+))?", re.IGNORECASE)
+
+STOPWORDS = frozenset("""
+a about above after again against all also an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers him
+his how i if in into is it its itself just may me might more most much must my no nor not now of off on once only
+or other our out over own same she should so some such than that the their them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you your
+according author best closest following passage question statement sentence word words meaning paragraph
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+def split_paragraphs(passage: str) -> List[str]:
+    """
+    Splits a passage into paragraphs on blank lines (or on single newlines if
+    it has no blank lines). A short leading line without a final period is
+    treated as the title and dropped, so paragraph numbers match the way TOEFL
+    questions count them.
+    """
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", passage.strip()) if b.strip()]
+    if len(blocks) == 1:
+        blocks = [line.strip() for line in passage.splitlines() if line.strip()]
+    if len(blocks) > 1 and len(blocks[0].split()) <= 12 and not blocks[0].rstrip().endswith((".", "?", "!")):
+        blocks = blocks[1:]
+    return blocks
+
+
+class ParagraphIndex:
+    """
+    A small in-memory TF-IDF index over the paragraphs of one passage.
+
+    `search` returns the paragraphs most relevant to a question. Explicit
+    references such as "in paragraph 3" take precedence over lexical matches.
+    """
+
+    def __init__(self, paragraphs: List[str]):
+        self.paragraphs = paragraphs
+        counts = [Counter(tokenize(p)) for p in paragraphs]
+        document_frequency = Counter(term for c in counts for term in c)
+        n = len(paragraphs)
+        self._idf = {term: math.log((1 + n) / (1 + df)) + 1.0 for term, df in document_frequency.items()}
+        self._vectors = [self._normalize({t: tf * self._idf[t] for t, tf in c.items()}) for c in counts]
+
+    @classmethod
+    def from_passage(cls, passage: str) -> "ParagraphIndex":
+        """Indexes a passage, or the part after 'Final Passage:' of a raw generation that echoed its thought process."""
+        return cls(split_paragraphs(passage.split("Final Passage:")[-1]))
+
+    def search(self, query: str, k: int = 2) -> List[int]:
+        """Indices of up to `k` relevant paragraphs, in passage order."""
+        referenced = self.referenced_paragraphs(query)
+        if referenced:
+            return referenced
+        query_vector = self._normalize({
+            t: tf * self._idf[t] for t, tf in Counter(tokenize(query)).items() if t in self._idf
+        })
+        scores = [
+            (sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items()), i)
+            for i, vector in enumerate(self._vectors)
+        ]
+        best = [i for score, i in sorted(scores, key=lambda s: (-s[0], s[1]))[:k] if score > 0]
+        return sorted(best) or list(range(min(k, len(self.paragraphs))))
+
+    def referenced_paragraphs(self, query: str) -> List[int]:
+        indices = set()
+        for match in _PARAGRAPH_REF.finditer(query):
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.group(2) else first
+            indices.update(i - 1 for i in range(first, last + 1) if 1 <= i <= len(self.paragraphs))
+        return sorted(indices)
+
+    def excerpt(self, indices: List[int]) -> str:
+        return "\n\n".join(f"[Paragraph {i + 1}]\n{self.paragraphs[i]}" for i in indices)
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {t: w / norm for t, w in vector.items()} if norm else {}
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import uuid
+from typing import TYPE_CHECKING, Collection, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    from agents.reading_passage import ReadingPassageAgent
+    from agents.reading_question import ReadingQuestionAgent
+    from agents.quality_assurance import QualityAssuranceAgent, PassageQualityAgent, QuestionSetQualityAgent
+    from agents.listening_passage import ListeningPassageAgent
+    from agents.listening_question import ListeningQuestionAgent
+    from agents.listening_audio import ListeningAudioAgent
+    from config import ReadingTask, ListeningTask, PassageEvaluationResult
+    from topic_cache import TopicCache, TopicMatch
+
+RANDOM_TOPIC = "a randomly generated academic topic"
+
+
+class PassageRejectedError(Exception):
+    """The passage failed its quality review, so no questions were generated for it."""
+
+    def __init__(self, topic: str, passage: str, evaluation: PassageEvaluationResult):
+        super().__init__(
+            f"Passage for '{topic}' failed quality review: {evaluation.overall_summary.justification}"
+        )
+        self.topic = topic
+        self.passage = passage
+        self.evaluation = evaluation
+
+
+def resolve_topic(topic: str) -> str:
+    return topic.strip() if topic and topic.strip().lower() != "random" else RANDOM_TOPIC
+
+
+def topic_key(topic: str) -> str:
+    """
+    A de-duplication key for a topic request.
+
+    Equivalent spellings of the same topic share a key. Random-topic requests
+    each get a unique key, since two users asking for "random" expect
+    different tasks.
+    """
+    topic = resolve_topic(topic)
+    if topic == RANDOM_TOPIC:
+        return f"random:{uuid.uuid4().hex}"
+    return "topic:" + re.sub(r"\s+", " ", topic.lower())
+
+
+def _difficulty_score(passage_agent: ReadingPassageAgent, passage: str) -> Optional[float]:
+    """The local difficulty score, for passage agents that target a difficulty band."""
+    report = passage_agent.score_passage(passage) if hasattr(passage_agent, "score_passage") else None
+    return report.score if report is not None else None
+
+
+def _lookup_topic(topic: str, topic_cache: Optional[TopicCache], seen_topics: Collection[str]) -> Optional[TopicMatch]:
+    if topic_cache is None or topic == RANDOM_TOPIC:
+        return None
+    match = topic_cache.lookup(topic, exclude=seen_topics)
+    if match is not None:
+        verb = "Serving the cached task" if match.action == "serve" else "Modelling the passage on the cached one"
+        print(f"♻️ {verb} for '{match.topic}' (similarity {match.similarity:.2f} to '{topic}').")
+    return match
+
+
+def _passage_inputs(topic: str, match: Optional[TopicMatch]) -> Union[str, dict]:
+    """The passage agent's inputs: the topic, plus a seed match's passage as a model to follow."""
+    if match is None:
+        return topic
+    return {"topic": topic, "related_topic": match.topic, "related_passage": match.task.passage}
+
+
+def _remember(task: ReadingTask, topic_cache: Optional[TopicCache], match: Optional[TopicMatch]):
+    # Tasks modelled on a seed match are not cached: only tasks generated from
+    # scratch define what a topic's entry looks like.
+    if topic_cache is not None and task.topic != RANDOM_TOPIC and match is None:
+        topic_cache.add(task)
+
+
+async def generate_reading_task(
+    topic: str,
+    passage_agent: ReadingPassageAgent,
+    question_agent: ReadingQuestionAgent,
+    qa_agent: QualityAssuranceAgent,
+    topic_cache: Optional[TopicCache] = None,
+    seen_topics: Collection[str] = (),
+    question_types: Optional[Dict[str, int]] = None,
+) -> ReadingTask:
+    """
+    Runs passage → questions → QA without blocking the event loop.
+    `question_types` asks the question agent for at least that many questions
+    of each type.
+
+    With a `topic_cache`, a cached task for a near-identical topic is served
+    instead, or a similar topic's passage is given to the passage agent as a
+    model; see `topic_cache.py`. Cached tasks whose topic is in `seen_topics`
+    (for example, ones the user already received) are never served.
+    """
+    from config import ReadingTask
+    from agents.base import describe_prompt_versions, record_prompt_versions
+
+    topic = resolve_topic(topic)
+    match = _lookup_topic(topic, topic_cache, seen_topics)
+    if match is not None and match.action == "serve":
+        return match.task
+    with record_prompt_versions() as used:
+        passage = await asyncio.to_thread(passage_agent.run, _passage_inputs(topic, match))
+        question_inputs = {"passage": passage, "question_types": question_types} if question_types else passage
+        questions_set = await asyncio.to_thread(question_agent.run, question_inputs)
+        evaluation_result = await asyncio.to_thread(
+            qa_agent.run, {"passage": passage, "questions_set": questions_set}
+        )
+    task = ReadingTask(
+        topic=topic,
+        passage=passage,
+        questions_set=questions_set,
+        evaluation_result=evaluation_result,
+        prompt_version=describe_prompt_versions(used),
+        difficulty_score=_difficulty_score(passage_agent, passage),
+    )
+    _remember(task, topic_cache, match)
+    return task
+
+
+async def generate_reading_task_early_exit(
+    topic: str,
+    passage_agent: ReadingPassageAgent,
+    question_agent: ReadingQuestionAgent,
+    passage_qa_agent: PassageQualityAgent,
+    question_qa_agent: QuestionSetQualityAgent,
+    passage_attempts: int = 1,
+    topic_cache: Optional[TopicCache] = None,
+    seen_topics: Collection[str] = (),
+) -> ReadingTask:
+    """
+    Runs passage → (passage QA ∥ questions) → question QA.
+
+    The passage review starts together with question generation. If the
+    passage fails, the question request is cancelled in flight and a new
+    passage is tried, up to `passage_attempts` passages in total;
+    `PassageRejectedError` is raised for the last rejection.
+
+    With a `topic_cache`, a cached task for a near-identical topic is served
+    instead, or a similar topic's reviewed passage is given to the passage
+    agent as a model; see `topic_cache.py`. Cached tasks whose topic is in
+    `seen_topics` are never served.
+    """
+    from config import ReadingTask
+    from agents.base import describe_prompt_versions, record_prompt_versions
+    from agents.quality_assurance import merge_evaluations
+
+    topic = resolve_topic(topic)
+    match = _lookup_topic(topic, topic_cache, seen_topics)
+    if match is not None and match.action == "serve":
+        return match.task
+    with record_prompt_versions() as used:
+        passage, passage_result, questions_set = await _reviewed_passage_and_questions(
+            topic, _passage_inputs(topic, match), passage_agent, question_agent, passage_qa_agent, passage_attempts
+        )
+
+        question_set_result = await question_qa_agent.arun(
+            {"passage": passage, "questions_set": questions_set}
+        )
+    task = ReadingTask(
+        topic=topic,
+        passage=passage,
+        questions_set=questions_set,
+        evaluation_result=merge_evaluations(passage_result, question_set_result),
+        prompt_version=describe_prompt_versions(used),
+        difficulty_score=_difficulty_score(passage_agent, passage),
+    )
+    _remember(task, topic_cache, match)
+    return task
+
+
+async def _reviewed_passage_and_questions(
+    topic: str,
+    passage_inputs: Union[str, dict],
+    passage_agent: ReadingPassageAgent,
+    question_agent: ReadingQuestionAgent,
+    passage_qa_agent: PassageQualityAgent,
+    passage_attempts: int,
+):
+    for attempt in range(1, passage_attempts + 1):
+        passage = await asyncio.to_thread(passage_agent.run, passage_inputs)
+        questions = asyncio.create_task(question_agent.arun(passage))
+        try:
+            passage_result = await passage_qa_agent.arun(passage)
+            if passage_result.overall_summary.final_decision == "Pass":
+                return passage, passage_result, await questions
+        finally:
+            if not questions.done():
+                questions.cancel()
+                await asyncio.gather(questions, return_exceptions=True)
+        print(f"❌ Passage {attempt}/{passage_attempts} failed review; question generation cancelled.")
+    raise PassageRejectedError(topic, passage, passage_result)
+
+
+async def generate_listening_task(
+    scenario: str,
+    topic: str,
+    passage_agent: ListeningPassageAgent,
+    question_agent: ListeningQuestionAgent,
+    qa_agent: QualityAssuranceAgent,
+    audio_agent: Optional[ListeningAudioAgent] = None,
+    audio_dir: str = "output/audio",
+) -> ListeningTask:
+    """Runs script → questions → QA (→ audio) for one lecture or conversation."""
+    from config import ListeningTask
+    from agents.base import describe_prompt_versions, record_prompt_versions
+
+    topic = resolve_topic(topic)
+    with record_prompt_versions() as used:
+        script = await asyncio.to_thread(passage_agent.run, {"scenario": scenario, "topic": topic})
+        questions_set = await asyncio.to_thread(
+            question_agent.run, {"scenario": scenario, "script": script}
+        )
+
+        evaluation = asyncio.to_thread(
+            qa_agent.run, {"passage": script, "questions_set": questions_set}
+        )
+        if audio_agent is None:
+            evaluation_result, audio_path = await evaluation, None
+        else:
+            output_path = os.path.join(audio_dir, f"{scenario}_{uuid.uuid4().hex[:12]}.wav")
+            evaluation_result, audio_path = await asyncio.gather(
+                evaluation,
+                asyncio.to_thread(audio_agent.run, {"script": script, "output_path": output_path}),
+            )
+
+    return ListeningTask(
+        scenario=scenario,
+        topic=topic,
+        script=script,
+        questions_set=questions_set,
+        evaluation_result=evaluation_result,
+        audio_path=audio_path,
+        prompt_version=describe_prompt_versions(used),
+    )
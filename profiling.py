@@ -0,0 +1,334 @@
+"""
+Opt-in sampling profiler for the generation pipeline.
+
+Enable it with `profiling.enable()` (or `TOEFL_PROFILE=1` for the entry
+points). While enabled:
+
+* a background thread samples the Python stack of every thread that is
+  inside a `stage(...)` every `interval` seconds, attributing each sample to
+  the current task and stage path;
+* `stage(name)` records wall time and the thread's CPU time, so network
+  waits (`llm.invoke` with near-zero CPU) separate from local work such as
+  prompt rendering and output parsing;
+* `disable()` writes collapsed stacks (for flamegraph.pl / inferno), a
+  speedscope JSON file and a stage table for the whole run, plus the same
+  files for the slowest `top_n` tasks.
+
+When profiling is off `stage` and `task` return a shared no-op context
+manager, so the hooks cost next to nothing.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_NULL = contextlib.nullcontext()
+
+# (task id, stage path) of the code running in the current context.
+_context: contextvars.ContextVar[Tuple[Optional[str], Tuple[str, ...]]] = contextvars.ContextVar(
+    "profiling_context", default=(None, ())
+)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    cpu_calls: int = 0
+
+    def add(self, wall: float, cpu: Optional[float]):
+        self.calls += 1
+        self.wall_s += wall
+        if cpu is not None:
+            self.cpu_s += cpu
+            self.cpu_calls += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4) if self.cpu_calls else None,
+            "cpu_share": round(self.cpu_s / self.wall_s, 3) if self.cpu_calls and self.wall_s else None,
+        }
+
+
+@dataclass
+class TaskProfile:
+    task_id: str
+    wall_s: float = 0.0
+    samples: Counter = field(default_factory=Counter)
+    stages: Dict[str, StageStats] = field(default_factory=lambda: defaultdict(StageStats))
+
+
+class Profiler:
+    def __init__(self, interval: float = 0.005, output_dir: str = "output/profiles", top_n: int = 5,
+                 name: Optional[str] = None):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.name = name or time.strftime("run-%Y%m%d-%H%M%S")
+        self.run = TaskProfile(task_id=self.name)
+        self.sample_count = 0
+        self._tasks: Dict[str, TaskProfile] = {}
+        self._slowest: List[Tuple[float, int, TaskProfile]] = []
+        self._order = itertools.count()
+        self._threads: Dict[int, Tuple[Optional[str], Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> "Profiler":
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.run.wall_s = time.perf_counter() - self._started
+
+    @contextlib.contextmanager
+    def task(self, task_id: str):
+        """
+        Attributes the stages and samples inside the block to one task. A name
+        already used by a running task gets a "#2", "#3"... suffix, so
+        overlapping tasks with the same name keep separate profiles.
+        """
+        name = task_id = str(task_id)
+        with self._lock:
+            copy = 1
+            while task_id in self._tasks:
+                copy += 1
+                task_id = f"{name}#{copy}"
+            profile = self._tasks[task_id] = TaskProfile(task_id=task_id)
+        token = _context.set((task_id, ()))
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            _context.reset(token)
+            profile.wall_s = time.perf_counter() - start
+            with self._lock:
+                del self._tasks[task_id]
+                # Only the slowest `top_n` finished tasks keep their samples.
+                heapq.heappush(self._slowest, (profile.wall_s, next(self._order), profile))
+                if len(self._slowest) > self.top_n:
+                    heapq.heappop(self._slowest)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, cpu: bool = True):
+        """
+        Times a stage. Pass cpu=False for coroutines: they share the event loop
+        thread, so neither its CPU time nor its stack belongs to one task.
+        """
+        task_id, path = _context.get()
+        path = path + (name,)
+        token = _context.set((task_id, path))
+        ident = threading.get_ident()
+        previous = self._threads.get(ident)
+        if cpu:
+            self._threads[ident] = (task_id, path)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu_time = time.thread_time() - cpu_start if cpu else None
+            if cpu:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+            _context.reset(token)
+            key = "/".join(path)
+            with self._lock:
+                self.run.stages[key].add(wall, cpu_time)
+                task_profile = self._tasks.get(task_id)
+                if task_profile is not None:
+                    task_profile.stages[key].add(wall, cpu_time)
+
+    def slowest_tasks(self) -> List[TaskProfile]:
+        with self._lock:
+            return [profile for _, _, profile in sorted(self._slowest, key=lambda item: -item[0])]
+
+    def export(self) -> List[str]:
+        """Writes the run profile and the slowest tasks' profiles; returns the file paths."""
+        import json
+
+        run_dir = os.path.join(self.output_dir, self.name)
+        os.makedirs(run_dir, exist_ok=True)
+        paths = self._export_profile(self.run, os.path.join(run_dir, "run"))
+        summary = {
+            "interval_s": self.interval,
+            "samples": self.sample_count,
+            "wall_s": round(self.run.wall_s, 3),
+            "slowest_tasks": [],
+        }
+        for rank, profile in enumerate(self.slowest_tasks(), start=1):
+            prefix = os.path.join(run_dir, f"task{rank:02d}-{_safe_name(profile.task_id)}")
+            paths += self._export_profile(profile, prefix)
+            summary["slowest_tasks"].append({"task_id": profile.task_id, "wall_s": round(profile.wall_s, 3)})
+        summary_path = os.path.join(run_dir, "summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return paths + [summary_path]
+
+    def report(self, limit: int = 15) -> str:
+        lines = [f"{'stage':<60} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'cpu %':>6}"]
+        stages = sorted(self.run.stages.items(), key=lambda item: -item[1].wall_s)[:limit]
+        for name, stats in stages:
+            row = stats.as_dict()
+            cpu = "-" if row["cpu_s"] is None else f"{row['cpu_s']:.3f}"
+            share = "-" if row["cpu_share"] is None else f"{row['cpu_share']:.0%}"
+            lines.append(f"{name[-60:]:<60} {row['calls']:>6} {row['wall_s']:>9.3f} {cpu:>9} {share:>6}")
+        return "\n".join(lines)
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                self.sample_count += 1
+                for ident, (task_id, path) in list(self._threads.items()):
+                    frame = frames.get(ident)
+                    if frame is None or ident == own:
+                        continue
+                    stack = ";".join([f"[{name}]" for name in path] + _collapse(frame))
+                    self.run.samples[stack] += 1
+                    task_profile = self._tasks.get(task_id)
+                    if task_profile is not None:
+                        task_profile.samples[stack] += 1
+
+    def _export_profile(self, profile: TaskProfile, prefix: str) -> List[str]:
+        import json
+
+        collapsed_path = f"{prefix}.collapsed"
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in profile.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        speedscope_path = f"{prefix}.speedscope.json"
+        with open(speedscope_path, "w", encoding="utf-8") as f:
+            json.dump(_speedscope(profile, self.interval), f)
+
+        stages_path = f"{prefix}.stages.json"
+        with open(stages_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "task_id": profile.task_id,
+                "wall_s": round(profile.wall_s, 4),
+                "stages": {name: stats.as_dict() for name, stats in profile.stages.items()},
+            }, f, ensure_ascii=False, indent=2)
+        return [collapsed_path, speedscope_path, stages_path]
+
+
+def _collapse(frame) -> List[str]:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _speedscope(profile: TaskProfile, interval: float) -> dict:
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in profile.samples.most_common():
+        sample = []
+        for name in stack.split(";"):
+            if name not in index:
+                index[name] = len(frames)
+                frames.append({"name": name})
+            sample.append(index[name])
+        samples.append(sample)
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": profile.task_id,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": profile.task_id,
+        "exporter": "toefl-task-generator profiling",
+    }
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text)[:60]
+
+
+_active: Optional[Profiler] = None
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name: str, cpu: bool = True):
+    profiler = _active
+    return profiler.stage(name, cpu=cpu) if profiler is not None else _NULL
+
+
+def task(task_id: str):
+    profiler = _active
+    return profiler.task(task_id) if profiler is not None else _NULL
+
+
+def enable(**kwargs) -> Profiler:
+    """Starts a profiler and routes every `stage`/`task` hook to it."""
+    global _active
+    if _active is not None:
+        return _active
+    _active = Profiler(**kwargs).start()
+    return _active
+
+
+def disable(export: bool = True) -> List[str]:
+    """Stops the active profiler, prints the stage table and writes the profile files."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return []
+    profiler.stop()
+    print(f"\n⏱️  Profile ({profiler.sample_count} samples, {profiler.run.wall_s:.1f}s)\n{profiler.report()}")
+    if not export:
+        return []
+    paths = profiler.export()
+    print(f"📁 Profile written to {os.path.dirname(paths[0])}")
+    return paths
+
+
+def enable_from_env() -> Optional[Profiler]:
+    """
+    Enables profiling if TOEFL_PROFILE is set. TOEFL_PROFILE_DIR,
+    TOEFL_PROFILE_TOP and TOEFL_PROFILE_INTERVAL_MS override the defaults.
+    """
+    if not os.getenv("TOEFL_PROFILE"):
+        return None
+    return enable(
+        output_dir=os.getenv("TOEFL_PROFILE_DIR", "output/profiles"),
+        top_n=int(os.getenv("TOEFL_PROFILE_TOP", "5")),
+        interval=float(os.getenv("TOEFL_PROFILE_INTERVAL_MS", "5")) / 1000,
+    )
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PROMPTS_DIR = "prompts"
+
+# (path, mtime_ns, size) for every file under the root.
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+@dataclass(frozen=True)
+class PromptSnapshot:
+    """
+    An immutable, in-memory copy of the prompts tree.
+
+    Paths are given the same way agents open files ("prompts/reading/...").
+    Paths outside the tree fall through to the filesystem.
+    """
+
+    root: str
+    version: str
+    files: Dict[str, str]
+    loaded_at: float = field(default_factory=time.time)
+
+    def read(self, path: str) -> str:
+        key = os.path.normpath(path)
+        if key in self.files:
+            return self.files[key]
+        if self._inside(key):
+            raise FileNotFoundError(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def isdir(self, path: str) -> bool:
+        key = os.path.normpath(path)
+        if not self._inside(key):
+            return os.path.isdir(path)
+        prefix = key + os.sep
+        return any(name.startswith(prefix) for name in self.files)
+
+    def listdir(self, path: str) -> List[str]:
+        key = os.path.normpath(path)
+        if not self._inside(key):
+            return os.listdir(path)
+        prefix = key + os.sep
+        return sorted({name[len(prefix):].split(os.sep, 1)[0] for name in self.files if name.startswith(prefix)})
+
+    def _inside(self, key: str) -> bool:
+        return key == self.root or key.startswith(self.root + os.sep)
+
+
+class PromptRegistry:
+    """
+    Serves versioned snapshots of the prompts tree and swaps in a new one when
+    files change.
+
+    `current()` never touches the disk once loaded. `check_for_changes()`
+    compares file mtimes and sizes with the last scan and, if anything moved,
+    reads the whole tree into a new snapshot and replaces the old one in a
+    single assignment, so readers always see one consistent version.
+    `start_watching()` runs that check on a background thread.
+
+    The version is a hash of file paths and contents, so it is stable across
+    restarts and unchanged by a bare `touch`.
+    """
+
+    def __init__(self, root: str = DEFAULT_PROMPTS_DIR, poll_interval: float = 2.0):
+        self.root = os.path.normpath(root)
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self._snapshot: Optional[PromptSnapshot] = None
+        self._signature: Optional[Signature] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def current(self) -> PromptSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.check_for_changes()
+            snapshot = self._snapshot
+        return snapshot
+
+    def check_for_changes(self) -> bool:
+        """Rescans the tree. Returns True if a snapshot with a new version was installed."""
+        with self._lock:
+            signature = self._scan()
+            if signature == self._signature and self._snapshot is not None:
+                return False
+            snapshot = self._load(signature)
+            self._signature = signature
+            if self._snapshot is not None and snapshot.version == self._snapshot.version:
+                return False
+            if self._snapshot is not None:
+                self.reloads += 1
+                print(f"🔄 Prompts reloaded: {self._snapshot.version} → {snapshot.version}")
+            self._snapshot = snapshot
+            return True
+
+    def start_watching(self) -> "PromptRegistry":
+        if self._thread is None:
+            self.current()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="prompt-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        snapshot = self.current()
+        return {
+            "version": snapshot.version,
+            "files": len(snapshot.files),
+            "reloads": self.reloads,
+            "watching": self._thread is not None,
+        }
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_changes()
+            except OSError as e:
+                # A file may vanish between listing and reading while an editor saves it.
+                print(f"Warning: Prompt rescan failed, keeping version {self._snapshot.version}: {e}")
+
+    def _scan(self) -> Signature:
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            # Hidden entries are editor swap files and in-progress example writes.
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for filename in sorted(f for f in filenames if not f.startswith(".")):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                entries.append((os.path.normpath(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def _load(self, signature: Signature) -> PromptSnapshot:
+        files = {}
+        digest = hashlib.sha256()
+        for path, _, _ in signature:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except UnicodeDecodeError:
+                continue
+            files[path] = text
+            digest.update(os.path.relpath(path, self.root).encode("utf-8") + b"\0" + text.encode("utf-8") + b"\0")
+        return PromptSnapshot(root=self.root, version=digest.hexdigest()[:12], files=files)
+
+
+_default_registry: Optional[PromptRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> PromptRegistry:
+    """The process-wide registry agents read their prompts from."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = PromptRegistry()
+        return _default_registry
+
+
+def set_registry(registry: Optional[PromptRegistry]) -> None:
+    global _default_registry
+    with _default_lock:
+        _default_registry = registry
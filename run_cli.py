@@ -1,8 +1,17 @@
+from __future__ import annotations
+
 import traceback
+import profiling
+from typing import TYPE_CHECKING
 from agents.reading_passage import ReadingPassageAgent
 from agents.reading_question import ReadingQuestionAgent
 from agents.quality_assurance import QualityAssuranceAgent
-from config import BaseQuestionSet, EvaluationResult
+from agents.listening_passage import ListeningPassageAgent, LISTENING_SCENARIOS
+from agents.listening_question import ListeningQuestionAgent
+from agents.listening_audio import ListeningAudioAgent
+
+if TYPE_CHECKING:
+    from config import BaseQuestionSet, EvaluationResult, ListeningTask
 
 
 def get_user_topic() -> str:
@@ -25,7 +34,11 @@ def display_results(passage: str, questions_set: BaseQuestionSet):
     print(passage)
     print("=" * 50)
 
-    print("\n📝 Questions\n")
+    display_questions(questions_set)
+
+
+def display_questions(questions_set, heading: str = "📝 Questions"):
+    print(f"\n{heading}\n")
     for q in questions_set.questions:
         print(f"Q: {q.question} ({q.question_type})")
         for i, opt in enumerate(q.options):
@@ -67,10 +80,11 @@ def run_reading_task():
         qa_agent = QualityAssuranceAgent()
 
         topic = get_user_topic()
-        passage, questions_set = generate_task(passage_agent, question_agent, topic)
+        with profiling.task(f"reading:{topic}"):
+            passage, questions_set = generate_task(passage_agent, question_agent, topic)
 
-        evaluation_input = {"passage": passage, "questions_set": questions_set}
-        evaluation_result = qa_agent.run(evaluation_input)
+            evaluation_input = {"passage": passage, "questions_set": questions_set}
+            evaluation_result = qa_agent.run(evaluation_input)
 
         display_results(passage, questions_set)
         display_evaluation_results(evaluation_result)
@@ -80,20 +94,74 @@ def run_reading_task():
         traceback.print_exc()
 
 
-def main():
+def get_listening_scenario() -> str:
     while True:
-        print("\n" + "=" * 50)
-        print("📚 Welcome to the TOEFL Task Generator 😈")
-        print("=" * 50)
-        task_type = input("Choose a task to generate ('reading' or 'listening', 'exit' to quit): ").lower()
-
-        if task_type == 'reading':
-            run_reading_task()
-        elif task_type == 'exit':
-            print("프로그램을 종료합니다.")
-            break
-        else:
-            print("Invalid choice. Please enter 'reading', 'listening', or 'exit'.")
+        scenario = input("Choose a listening scenario ('lecture' or 'conversation'): ").strip().lower()
+        if scenario in LISTENING_SCENARIOS:
+            return scenario
+        print("Invalid choice. Please enter 'lecture' or 'conversation'.")
+
+
+def display_listening_results(task: ListeningTask):
+    print("=" * 50)
+    print(f"\n🎧 Listening Script ({task.scenario})\n")
+    print(task.script)
+    if task.audio_path:
+        print(f"\n🔊 Audio: {task.audio_path}")
+    print("=" * 50)
+    display_questions(task.questions_set, heading="📝 Listening Questions")
+
+
+def run_listening_task():
+    import asyncio
+    from pipeline import generate_listening_task
+
+    try:
+        scenario = get_listening_scenario()
+        topic = input(f"Enter a topic for the {scenario} (or 'random'): ")
+        render_audio = input("Render audio as well? (y/N): ").strip().lower() == 'y'
+
+        print(f"\n🔥 TOEFL Listening Task ({scenario}) 생성을 시작합니다...")
+        with profiling.task(f"{scenario}:{topic}"):
+            task = asyncio.run(generate_listening_task(
+                scenario,
+                topic,
+                ListeningPassageAgent(),
+                ListeningQuestionAgent(),
+                QualityAssuranceAgent(section="listening"),
+                audio_agent=ListeningAudioAgent() if render_audio else None,
+            ))
+        print("\n\n🎉 TOEFL Listening Task 생성이 완료되었습니다! 🎉")
+
+        display_listening_results(task)
+        display_evaluation_results(task.evaluation_result)
+
+    except Exception as ex:
+        print(f"\n🚨 Listening task 중 오류가 발생했습니다: {ex}")
+        traceback.print_exc()
+
+
+def main():
+    # TOEFL_PROFILE=1 samples every task and writes flame graphs on exit (see profiling.py).
+    profiling.enable_from_env()
+    try:
+        while True:
+            print("\n" + "=" * 50)
+            print("📚 Welcome to the TOEFL Task Generator 😈")
+            print("=" * 50)
+            task_type = input("Choose a task to generate ('reading' or 'listening', 'exit' to quit): ").lower()
+
+            if task_type == 'reading':
+                run_reading_task()
+            elif task_type == 'listening':
+                run_listening_task()
+            elif task_type == 'exit':
+                print("프로그램을 종료합니다.")
+                break
+            else:
+                print("Invalid choice. Please enter 'reading', 'listening', or 'exit'.")
+    finally:
+        profiling.disable()
 
 
 if __name__ == '__main__':
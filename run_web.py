@@ -1,19 +1,52 @@
+import functools
+import uuid
 import streamlit as st
 from agents.reading_passage import ReadingPassageAgent
 from agents.reading_question import ReadingQuestionAgent
-from agents.quality_assurance import QualityAssuranceAgent
+from agents.quality_assurance import PassageQualityAgent, QuestionSetQualityAgent
 from config import BaseQuestionSet, EvaluationResult
-from typing import Tuple
+from generation_service import GenerationService, QueueFullError
+from pipeline import generate_reading_task_early_exit, resolve_topic, topic_key
+from prompt_registry import get_registry
+from single_flight import all_stats
+from topic_cache import TopicCache
+
+POLL_INTERVAL_SECONDS = 1.0
+
+
+@st.cache_resource
+def load_topic_cache() -> TopicCache:
+    return TopicCache()
 
 
 @st.cache_resource
-def load_agents() -> Tuple[ReadingPassageAgent, ReadingQuestionAgent, QualityAssuranceAgent]:
-    print("--- 에이전트 초기화 중 ---")
-    passage_agent = ReadingPassageAgent()
-    question_agent = ReadingQuestionAgent()
-    qa_agent = QualityAssuranceAgent()
-    print("--- ✅ 에이전트 초기화 완료 ---")
-    return passage_agent, question_agent, qa_agent
+def load_generation_service() -> GenerationService:
+    print("--- 에이전트 및 생성 서비스 초기화 중 ---")
+    # Edited prompt files are picked up by the running agents; no restart needed.
+    get_registry().start_watching()
+    handler = functools.partial(
+        generate_for_user,
+        passage_agent=ReadingPassageAgent(),
+        question_agent=ReadingQuestionAgent(),
+        passage_qa_agent=PassageQualityAgent(),
+        question_qa_agent=QuestionSetQualityAgent(),
+        passage_attempts=2,
+        topic_cache=load_topic_cache(),
+    )
+    service = GenerationService(
+        handler=handler,
+        max_concurrency=4,
+        max_queue_size=32,
+        max_jobs_per_user=1,
+    ).start()
+    print("--- ✅ 생성 서비스 초기화 완료 ---")
+    return service
+
+
+async def generate_for_user(payload, **kwargs):
+    """Service handler for a (topic, topics the user has already seen) payload."""
+    topic, seen_topics = payload
+    return await generate_reading_task_early_exit(topic, seen_topics=seen_topics, **kwargs)
 
 
 def initialize_session_state():
@@ -22,28 +55,80 @@ def initialize_session_state():
         st.session_state.passage = ""
         st.session_state.questions_set = None
         st.session_state.evaluation_result = None
+        st.session_state.prompt_version = None
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = uuid.uuid4().hex
+        st.session_state.job_id = None
+        # Topics of the tasks shown to this user; they are never served again from the topic cache.
+        st.session_state.seen_topics = []
+
+
+def submit_generation_job(topic: str, service: GenerationService):
+    display_topic = resolve_topic(topic)
+    seen_topics = tuple(st.session_state.seen_topics)
+    # Users who have seen different tasks may get different results, so they only share jobs with the same history.
+    key = topic_key(display_topic)
+    if seen_topics:
+        key = (key, tuple(sorted(topic_key(t) for t in seen_topics)))
+    try:
+        job = service.submit(
+            user_id=st.session_state.user_id,
+            key=key,
+            payload=(display_topic, seen_topics),
+        )
+        st.session_state.job_id = job.job_id
+    except QueueFullError as e:
+        st.warning(f"요청이 많아 지금은 작업을 추가할 수 없습니다. 잠시 후 다시 시도해 주세요. ({e})")
+
+
+@st.fragment(run_every=POLL_INTERVAL_SECONDS)
+def poll_generation_job(service: GenerationService):
+    job = service.get_job(st.session_state.job_id)
+    if job is None:
+        st.session_state.job_id = None
+        st.error("작업 정보를 찾을 수 없습니다. 다시 시도해 주세요.")
+        return
+
+    if not job.done:
+        if job.status == "queued":
+            position = service.queue_position(job)
+            st.info(f"⏳ 대기 중... (앞선 작업: {position}개, {job.elapsed:.0f}s 경과)")
+        else:
+            st.info(f"🔥 '{job.payload[0]}'에 대한 TOEFL Task 생성 및 평가 중... ({job.elapsed:.0f}s 경과)")
+        return
+
+    st.session_state.job_id = None
+    st.session_state.last_job = {
+        "status": job.status,
+        "queue_delay_s": round(job.queue_delay or 0.0, 3),
+        "elapsed_s": round(job.elapsed, 3),
+    }
+    if job.status == "done":
+        task = job.result
+        st.session_state.passage = task.passage
+        st.session_state.questions_set = task.questions_set
+        st.session_state.evaluation_result = task.evaluation_result
+        st.session_state.prompt_version = task.prompt_version
+        st.session_state.seen_topics.append(task.topic)
+        st.session_state.task_generated = True
+        st.session_state.job_notice = ("success", "🎉 TOEFL Task 생성 및 평가가 완료되었습니다!")
+    else:
+        st.session_state.task_generated = False
+        st.session_state.job_notice = ("error", f"오류가 발생했습니다: {job.error}")
+    st.rerun(scope="app")
 
 
-def generate_task_and_update_state(topic: str, passage_agent: ReadingPassageAgent, question_agent: ReadingQuestionAgent,
-                                   qa_agent: QualityAssuranceAgent):
-    display_topic = topic if topic and topic.strip().lower() != 'random' else "a randomly generated academic topic"
-
-    with st.spinner(f"🔥 '{display_topic}'에 대한 TOEFL Task 생성 및 평가 중..."):
-        try:
-            passage = passage_agent.run(display_topic)
-            questions_set = question_agent.run(passage)
-
-            eval_inputs = {"passage": passage, "questions_set": questions_set}
-            evaluation_result = qa_agent.run(eval_inputs)
+def display_service_metrics(service: GenerationService):
+    with st.sidebar.expander("Service Metrics"):
+        from llm_client import default_limiter
 
-            st.session_state.passage = passage
-            st.session_state.questions_set = questions_set
-            st.session_state.evaluation_result = evaluation_result
-            st.session_state.task_generated = True
-            st.success("🎉 TOEFL Task 생성 및 평가가 완료되었습니다!")
-        except Exception as e:
-            st.error(f"오류가 발생했습니다: {e}")
-            st.session_state.task_generated = False
+        st.json({
+            "queue": service.stats(),
+            "coalesced_calls": all_stats(),
+            "llm_concurrency": default_limiter.snapshot(),
+            "prompts": get_registry().stats(),
+            "topic_cache": load_topic_cache().stats(),
+        })
 
 
 def display_evaluation_interface(result: EvaluationResult):
@@ -106,17 +191,31 @@ def main():
     st.title("📚 TOEFL Reading Task Generator")
 
     initialize_session_state()
-    passage_agent, question_agent, qa_agent = load_agents()
+    service = load_generation_service()
+    display_service_metrics(service)
 
     topic = st.text_input(
         "Enter an academic topic for the Reading passage (or leave blank for random):",
         key="topic_input"
     )
 
-    if st.button("Generate & Evaluate Task", key="generate_button"):
-        generate_task_and_update_state(topic, passage_agent, question_agent, qa_agent)
+    job_pending = st.session_state.job_id is not None
+    if st.button("Generate & Evaluate Task", key="generate_button", disabled=job_pending):
+        submit_generation_job(topic, service)
+
+    if st.session_state.job_id is not None:
+        poll_generation_job(service)
+
+    notice = st.session_state.pop("job_notice", None)
+    if notice:
+        level, message = notice
+        if level == "success":
+            st.success(message)
+        else:
+            st.error(message)
 
     if st.session_state.task_generated:
+        st.caption(f"Prompt version: {st.session_state.prompt_version}")
         if st.session_state.evaluation_result:
             display_evaluation_interface(st.session_state.evaluation_result)
 
@@ -124,4 +223,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,91 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Optional, Union
+
+from adaptive_concurrency import AdaptiveConcurrencyLimiter
+from llm_client import GoogleLLMClient
+
+# A curve takes (seconds since the client was created, requests currently in flight).
+Curve = Callable[[float, int], float]
+
+
+class SimulatedRateLimitError(RuntimeError):
+    def __init__(self):
+        super().__init__("429 Resource exhausted (simulated)")
+
+
+def _as_curve(value: Union[float, Curve]) -> Curve:
+    return value if callable(value) else (lambda elapsed, inflight: value)
+
+
+def capacity_latency(base_latency: float, capacity: int) -> Curve:
+    """Latency stays flat up to `capacity` concurrent requests, then grows linearly (queueing)."""
+    return lambda elapsed, inflight: base_latency * max(1.0, inflight / capacity)
+
+
+class SimulatedLLMClient(GoogleLLMClient):
+    """
+    A GoogleLLMClient stand-in with scripted latency and error curves.
+
+    It goes through the same single-flight and concurrency-limiter path as the
+    real client; only the model call is replaced. No API key is needed.
+    """
+
+    def __init__(
+        self,
+        latency: Union[float, Curve] = 0.05,
+        error_rate: Union[float, Curve] = 0.0,
+        responder: Optional[Callable[[str], str]] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        model_name: str = "simulated",
+        temperature: float = 0.7,
+        seed: Optional[int] = None,
+    ):
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.model_name = str(model_name)
+        self.temperature = temperature
+        self.latency_curve = _as_curve(latency)
+        self.error_curve = _as_curve(error_rate)
+        self.responder = responder or (lambda prompt: f"Simulated response to a {len(prompt)}-character prompt.")
+        self.calls = 0
+        self.max_inflight = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._started = time.monotonic()
+
+    def _invoke_model(self, prompt: str) -> str:
+        fail, delay = self._begin_call()
+        try:
+            time.sleep(delay)
+            if fail:
+                raise SimulatedRateLimitError()
+            return self.responder(prompt)
+        finally:
+            self._end_call()
+
+    async def _ainvoke_model(self, prompt: str) -> str:
+        fail, delay = self._begin_call()
+        try:
+            await asyncio.sleep(delay)
+            if fail:
+                raise SimulatedRateLimitError()
+            return self.responder(prompt)
+        finally:
+            self._end_call()
+
+    def _begin_call(self):
+        with self._lock:
+            self.calls += 1
+            self._inflight += 1
+            self.max_inflight = max(self.max_inflight, self._inflight)
+            inflight = self._inflight
+            elapsed = time.monotonic() - self._started
+            fail = self._random.random() < self.error_curve(elapsed, inflight)
+        return fail, self.latency_curve(elapsed, inflight)
+
+    def _end_call(self):
+        with self._lock:
+            self._inflight -= 1
@@ -0,0 +1,93 @@
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_registry: Dict[str, "SingleFlight"] = {}
+_registry_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is still running wait for and receive the same result (or exception).
+    Results are not cached: once the call finishes, the next caller for the
+    key starts a new execution. Coalesced callers share the returned object,
+    so treat results as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        self._calls = 0
+        self._coalesced = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self._calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                is_leader = False
+            else:
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+                is_leader = True
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "executions": self._calls - self._coalesced,
+                "coalesced": self._coalesced,
+                "inflight": len(self._inflight),
+            }
+
+    def _finish(self, key: Hashable):
+        with self._lock:
+            del self._inflight[key]
+
+
+def all_stats() -> Dict[str, dict]:
+    """Coalescing metrics for every SingleFlight group in the process."""
+    with _registry_lock:
+        groups = list(_registry.values())
+    return {group.name: group.stats() for group in groups}
+
+
+def fingerprint(value: Any) -> str:
+    """A stable hash of agent inputs (strings, dicts, lists and pydantic models)."""
+    return hashlib.sha256(_canonical(value).encode("utf-8")).hexdigest()
+
+
+def _canonical(value: Any) -> str:
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json()
+    if isinstance(value, dict):
+        return json.dumps({str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))})
+    if isinstance(value, (list, tuple)):
+        return json.dumps([_canonical(v) for v in value])
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=repr)
@@ -0,0 +1,94 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from adaptive_concurrency import AdaptiveConcurrencyLimiter
+from simulated_llm import SimulatedLLMClient, SimulatedRateLimitError, capacity_latency
+
+
+def run_saturated_window(limiter: AdaptiveConcurrencyLimiter, latency: float, error: Exception = None):
+    """Fills every slot, then completes one window's worth of calls."""
+    for _ in range(limiter.window_size):
+        while limiter.try_acquire():
+            pass
+        limiter.release(latency, error=error)
+    while limiter.snapshot()["inflight"]:
+        limiter.release(latency, error=error)
+
+
+def test_limiter_aimd_rules():
+    print("--- Starting Test for AdaptiveConcurrencyLimiter (scripted samples) ---")
+
+    try:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=10, window_size=5)
+
+        for _ in range(4):
+            run_saturated_window(limiter, latency=0.10)
+        assert limiter.limit > 4, f"FAIL: Limit should grow while latency is flat, got {limiter.limit}"
+        grown = limiter.limit
+        print(f"PASS: Limit grew additively to {grown} with flat latency.")
+
+        run_saturated_window(limiter, latency=0.30)
+        assert limiter.limit < grown, f"FAIL: Limit should back off when p50 rises, got {limiter.limit}"
+        print(f"PASS: Limit backed off to {limiter.limit} when p50 tripled.")
+
+        before = limiter.limit
+        for _ in range(before):
+            limiter.try_acquire()
+        for _ in range(before):
+            limiter.release(0.1, error=SimulatedRateLimitError())
+        assert limiter.limit == max(1, int(before * 0.7)), \
+            f"FAIL: A burst of 429s should back off exactly once ({before} → {limiter.limit})"
+        print(f"PASS: A burst of 429s backed off once ({before} → {limiter.limit}).")
+
+        snapshot = limiter.snapshot()
+        assert {"limit", "p50_ms", "baseline_p50_ms", "error_rate"} <= snapshot.keys(), "FAIL: Snapshot is incomplete."
+        print(f"PASS: Snapshot exposes limit and measurements ({snapshot}).")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_limiter_with_simulated_backend():
+    print("--- Starting Test for AdaptiveConcurrencyLimiter (simulated backend) ---")
+
+    try:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=32, window_size=10, latency_tolerance=1.3)
+        phase = {"overloaded": False}
+        client = SimulatedLLMClient(
+            latency=capacity_latency(base_latency=0.004, capacity=8),
+            error_rate=lambda elapsed, inflight: 0.5 if phase["overloaded"] else 0.0,
+            limiter=limiter,
+            seed=7,
+        )
+
+        def call(i: int):
+            try:
+                client.invoke(f"prompt {i}")
+            except SimulatedRateLimitError:
+                pass
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(call, range(600)))
+        settled = limiter.limit
+        assert 5 <= settled <= 16, f"FAIL: Limit should settle near backend capacity (8), got {settled}"
+        assert client.max_inflight <= limiter.max_limit, "FAIL: Limiter did not bound concurrency."
+        print(f"PASS: Limit climbed from 2 and settled at {settled} for a backend with capacity 8.")
+
+        phase["overloaded"] = True
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(call, range(600, 700)))
+        assert limiter.limit < settled, f"FAIL: Limit should drop under errors ({settled} → {limiter.limit})"
+        print(f"PASS: Limit dropped to {limiter.limit} when the backend started returning 429s.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+if __name__ == '__main__':
+    test_limiter_aimd_rules()
+    test_limiter_with_simulated_backend()
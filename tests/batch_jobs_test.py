@@ -0,0 +1,168 @@
+import itertools
+import json
+import os
+import tempfile
+import traceback
+from batch_jobs import BatchJobError, LocalBatchEndpoint, NightlyReadingJob
+from llm_client import set_client_factory
+from pipeline import RANDOM_TOPIC
+from simulated_llm import SimulatedLLMClient
+
+FAKE_SCORE = {"score": 4, "comment": "ok"}
+FAKE_EVALUATION = {
+    "evaluation_scores": {
+        "passage_quality": {k: FAKE_SCORE for k in (
+            "word_count", "readability", "vocabulary_distribution", "academic_logic_and_cohesion", "tone")},
+        "question_set_quality": {k: FAKE_SCORE for k in (
+            "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency",
+            "question_variety")},
+    },
+    "overall_summary": {"final_decision": "Pass", "justification": "ok"},
+}
+
+
+def fake_model(prompt: str) -> str:
+    if "Head Reviewer" in prompt:
+        return json.dumps(FAKE_EVALUATION)
+    if prompt.rstrip().endswith("JSON Output:"):
+        if "unparseable" in prompt:
+            return "not json"
+        question = {"question_type": "Inference", "question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A"}
+        return json.dumps({"questions": [question]})
+    topic = prompt.rstrip().rsplit("Topic:\n", 1)[1].split("\n")[0]
+    return f"A passage about {topic}."
+
+
+class FailOnceEndpoint(LocalBatchEndpoint):
+    """Fails the first job whose requests contain `fail_stage_marker`."""
+
+    def __init__(self, root_dir: str, fail_stage_marker: str):
+        super().__init__(root_dir)
+        self.fail_stage_marker = fail_stage_marker
+        self.failed = False
+
+    def _process(self, job_id: str):
+        with open(os.path.join(self.root_dir, job_id, "requests.jsonl"), "r", encoding="utf-8") as f:
+            requests = f.read()
+        if not self.failed and self.fail_stage_marker in requests:
+            self.failed = True
+            self._write_status(job_id, {"state": "failed", "error": "simulated outage"})
+            return
+        super()._process(job_id)
+
+
+def test_nightly_reading_job():
+    print("--- Starting Test for the offline batch job mode ---")
+
+    clients = []
+
+    def factory(model_name, temperature):
+        client = SimulatedLLMClient(latency=0.0, responder=fake_model, model_name=model_name, temperature=temperature)
+        clients.append(client)
+        return client
+
+    set_client_factory(factory)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            work_dir = os.path.join(tmp_dir, "work")
+            endpoint = LocalBatchEndpoint(os.path.join(tmp_dir, "batch"))
+            polls = []
+            job = NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10,
+                                    on_poll=lambda stage, state: polls.append((stage, state)))
+            tasks = job.run(["tides", "volcanoes", "unparseable"])
+
+            assert sorted(task.topic for task in tasks) == ["tides", "volcanoes"], f"FAIL: Unexpected tasks: {tasks}"
+            assert tasks[0].evaluation_result.overall_summary.final_decision == "Pass"
+            assert list(job.failures) == ["task-00002"] and "questions" in job.failures["task-00002"], \
+                f"FAIL: Unexpected failures: {job.failures}"
+            print("PASS: Three stages ran through the batch endpoint; a parse failure dropped only its item.")
+
+            assert not os.path.exists(os.path.join(work_dir, "state.json")), "FAIL: A finished build kept its state."
+            (archive_name,) = os.listdir(os.path.join(work_dir, "archive"))
+            archive_dir = os.path.join(work_dir, "archive", archive_name)
+            for stage, count in (("passages", 3), ("questions", 3), ("qa", 2)):
+                with open(os.path.join(archive_dir, f"{stage}_requests.jsonl"), "r", encoding="utf-8") as f:
+                    requests = [json.loads(line) for line in f]
+                assert len(requests) == count, f"FAIL: {stage} wrote {len(requests)} requests"
+            assert {stage for stage, state in polls if state == "succeeded"} == {"passages", "questions", "qa"}
+            print("PASS: Each stage wrote one request file, was polled until it succeeded and was archived.")
+
+            tomorrow = NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10)
+            assert [task.topic for task in tomorrow.run(["glaciers"])] == ["glaciers"], "FAIL: Old state was reused."
+            print("PASS: A finished build was archived and the next run used its own topics.")
+
+            def interrupt(stage, state):
+                if stage == "qa":
+                    raise KeyboardInterrupt
+
+            calls_before = sum(client.calls for client in clients)
+            try:
+                NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10, on_poll=interrupt).run(["deserts"])
+                raise AssertionError("FAIL: The interrupt did not stop the build.")
+            except KeyboardInterrupt:
+                pass
+            resumed = NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10)
+            assert [task.topic for task in resumed.run(["deserts"])] == ["deserts"], "FAIL: Resumed job lost tasks."
+            assert sum(client.calls for client in clients) == calls_before + 3, "FAIL: Resumed job called the model again."
+            print("PASS: Rerunning an interrupted build resumed from the saved state without new model calls.")
+
+            try:
+                NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10, on_poll=interrupt).run(["rivers"])
+            except KeyboardInterrupt:
+                pass
+            fresh = NightlyReadingJob(endpoint, work_dir, poll_interval=0.01, timeout=10)
+            assert [task.topic for task in fresh.run(["lakes"])] == ["lakes"], "FAIL: Stale state was resumed."
+            print("PASS: A different topic list archived the unfinished state and started fresh.")
+
+            failing = FailOnceEndpoint(os.path.join(tmp_dir, "batch"), fail_stage_marker="Head Reviewer")
+            try:
+                NightlyReadingJob(failing, work_dir, poll_interval=0.01, timeout=10).run(["caves"])
+                raise AssertionError("FAIL: A failed batch job was not reported.")
+            except BatchJobError:
+                pass
+            retried = NightlyReadingJob(failing, work_dir, poll_interval=0.01, timeout=10)
+            assert [task.topic for task in retried.run(["caves"])] == ["caves"], "FAIL: The failed stage was not resubmitted."
+            print("PASS: A stage whose batch job failed was resubmitted on the next run.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+def test_random_topics_get_distinct_passages():
+    print("--- Starting Test for random topics in a batch job ---")
+
+    counter = itertools.count()
+
+    def sampled_model(prompt: str) -> str:
+        reply = fake_model(prompt)
+        return f"{reply} (draft {next(counter)})" if reply.startswith("A passage about") else reply
+
+    set_client_factory(lambda model_name, temperature: SimulatedLLMClient(
+        latency=0.05, responder=sampled_model, model_name=model_name, temperature=temperature))
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            job = NightlyReadingJob(LocalBatchEndpoint(os.path.join(tmp_dir, "batch")), os.path.join(tmp_dir, "work"),
+                                    poll_interval=0.01, timeout=10)
+            tasks = job.run([RANDOM_TOPIC] * 4)
+
+            passages = [task.passage for task in tasks]
+            assert len(passages) == 4 and len(set(passages)) == 4, f"FAIL: Random topics shared passages: {passages}"
+            print("PASS: Four identical random-topic requests in one batch produced four distinct passages.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_nightly_reading_job()
+    test_random_topics_get_distinct_passages()
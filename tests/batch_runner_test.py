@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import tempfile
+import traceback
+from batch_runner import JsonlBatchWriter, listening_items, run_batch
+from config import EvaluationResult, ListeningQuestionSet
+from generation_service import GenerationService
+from pipeline import generate_listening_task
+
+FAKE_QUESTIONS = {
+    "questions": [
+        {
+            "question_type": "Gist-Content",
+            "question": "What is the lecture mainly about?",
+            "options": ["A", "B", "C", "D"],
+            "answer": "A",
+        }
+    ]
+}
+FAKE_SCORE = {"score": 4, "comment": "ok"}
+FAKE_EVALUATION = {
+    "evaluation_scores": {
+        "passage_quality": {k: FAKE_SCORE for k in (
+            "word_count", "readability", "vocabulary_distribution", "academic_logic_and_cohesion", "tone")},
+        "question_set_quality": {k: FAKE_SCORE for k in (
+            "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency",
+            "question_variety")},
+    },
+    "overall_summary": {"final_decision": "Pass", "justification": "ok"},
+}
+
+
+class FakeAgent:
+    def __init__(self, output):
+        self.output = output
+        self.calls = []
+
+    def run(self, inputs):
+        self.calls.append(inputs)
+        return self.output
+
+
+def test_listening_batch():
+    print("--- Starting Test for the listening batch runner ---")
+
+    running = {"lecture": 0, "conversation": 0}
+    peak = {"lecture": 0, "conversation": 0}
+    passage_agent = FakeAgent("(Professor): Today we discuss tides.")
+    question_agent = FakeAgent(ListeningQuestionSet.model_validate(FAKE_QUESTIONS))
+    qa_agent = FakeAgent(EvaluationResult.model_validate(FAKE_EVALUATION))
+
+    async def handler(payload):
+        scenario, topic = payload
+        running[scenario] += 1
+        peak[scenario] = max(peak[scenario], running[scenario])
+        await asyncio.sleep(0.02)
+        running[scenario] -= 1
+        return await generate_listening_task(scenario, topic, passage_agent, question_agent, qa_agent)
+
+    service = GenerationService(
+        handler, max_concurrency=4, max_queue_size=100, max_jobs_per_user=100,
+        lane_limits={"lecture": 2, "conversation": 1},
+    ).start()
+    try:
+        topics = [f"topic {i}" for i in range(6)] + ["Topic 0"]
+        items = listening_items(topics, ["lecture", "conversation"])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = os.path.join(tmp_dir, "tasks.jsonl")
+            with JsonlBatchWriter(out_path, batch_size=4) as writer:
+                summary = asyncio.run(run_batch(service, items, writer))
+
+            with open(out_path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+
+        assert summary["unique"] == 12 and summary["done"] == 12, f"FAIL: Unexpected summary: {summary}"
+        assert len(records) == 12, f"FAIL: Expected 12 records, got {len(records)}"
+        print(f"PASS: Duplicate topics were coalesced and all results were written ({summary}).")
+
+        assert peak["lecture"] <= 2 and peak["conversation"] <= 1, f"FAIL: Lane limits exceeded: {peak}"
+        print(f"PASS: Per-scenario concurrency limits were respected (peak: {peak}).")
+
+        record = records[0]
+        assert record["status"] == "done" and record["task"]["scenario"] in ("lecture", "conversation"), \
+            f"FAIL: Unexpected record: {record}"
+        assert passage_agent.calls[0].keys() == {"scenario", "topic"}, "FAIL: Script agent received wrong inputs."
+        print("PASS: Records contain the full listening task.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        service.stop()
+
+
+if __name__ == '__main__':
+    test_listening_batch()
@@ -0,0 +1,114 @@
+import json
+import time
+import traceback
+from agents.chunked_quality_assurance import ChunkedQuestionSetQualityAgent, reduce_question_reviews
+from config import BaseQuestionSet
+from llm_client import set_client_factory
+from paragraph_index import ParagraphIndex, split_paragraphs
+from simulated_llm import SimulatedLLMClient
+
+PASSAGE = """The Formation of Ocean Tides
+
+Tides are caused mainly by the gravitational pull of the Moon on the oceans of the Earth.
+
+Volcanic islands form when magma rises through the crust and cools into basalt above the sea.
+
+Coral reefs grow slowly in warm, shallow water where sunlight reaches the symbiotic algae.
+
+Glaciers carve valleys as compacted ice moves downhill under its own enormous weight."""
+
+MIX = {
+    "Factual Information": 3, "Negative Factual Information": 1, "Vocabulary-in-Context": 2, "Inference": 1,
+    "Rhetorical Purpose": 1, "Sentence Simplification": 1, "Insert Text": 1, "Prose Summary": 1,
+}
+
+
+def make_question(question_type: str, text: str) -> dict:
+    question = {"question_type": question_type, "question": text, "options": ["A", "B", "C", "D"], "answer": "A"}
+    if question_type == "Sentence Simplification":
+        question["highlighted_sentence"] = "Coral reefs grow slowly in warm, shallow water."
+    elif question_type == "Insert Text":
+        question.update(sentence_to_insert="Ice is heavy.", options=["1", "2", "3", "4"], answer="2")
+    elif question_type == "Prose Summary":
+        question.update(introductory_sentence="Intro.", options=list("ABCDEF"), answer=["A", "B", "C"])
+    return question
+
+
+def review(prompt: str) -> str:
+    score = 2 if '"question_type": "Inference"' in prompt else 4
+    return json.dumps({k: {"score": score, "comment": "ok"} for k in (
+        "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency")})
+
+
+def test_paragraph_index():
+    print("--- Starting Test for ParagraphIndex ---")
+
+    try:
+        paragraphs = split_paragraphs(PASSAGE)
+        assert len(paragraphs) == 4 and paragraphs[0].startswith("Tides"), "FAIL: Title was not dropped."
+        index = ParagraphIndex(paragraphs)
+        assert index.search("What does paragraph 3 say about reefs?") == [2]
+        assert index.search("According to paragraphs 1 and 2, which is true?") == [0, 1]
+        assert index.search("Why does magma cool into basalt?", k=1) == [1]
+        assert index.search("glaciers ice valleys", k=2)[0] == 3
+        print("PASS: Explicit paragraph references and lexical matches find the right paragraphs.")
+
+        raw = "Thought Process:\nPlan four short paragraphs.\n\nFinal Passage:\n" + PASSAGE
+        assert ParagraphIndex.from_passage(raw).paragraphs == paragraphs, "FAIL: The thought process was indexed."
+        print("PASS: A raw generation is indexed from its final passage only.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_chunked_question_review():
+    print("--- Starting Test for ChunkedQuestionSetQualityAgent ---")
+
+    set_client_factory(lambda model_name, temperature: SimulatedLLMClient(latency=0.1, responder=review))
+    try:
+        topics = ["the Moon and tides", "magma and basalt", "coral algae", "glaciers and ice", "sunlight"]
+        questions = [
+            make_question(qt, f"What does the passage say about {topics[i % len(topics)]}?")
+            for i, qt in enumerate(qt for qt, n in MIX.items() for _ in range(n))
+        ]
+        questions_set = BaseQuestionSet.model_validate({"questions": questions})
+        agent = ChunkedQuestionSetQualityAgent(paragraphs_per_question=1, max_workers=10)
+
+        agent.ensure_initialized()
+        review_prompts = agent._review_prompts({"passage": PASSAGE, "questions_set": questions_set})
+        assert len(review_prompts) == 11
+        assert all(PASSAGE.split("\n\n")[4] not in p for p in review_prompts[:2]), "FAIL: Excerpts are not chunked."
+        assert review_prompts[-1].count("[Paragraph") == 4, "FAIL: Prose Summary needs the passage."
+        print("PASS: Each question prompt carries only its relevant paragraph (Prose Summary gets all).")
+
+        start = time.monotonic()
+        result = agent.run({"passage": PASSAGE, "questions_set": questions_set})
+        elapsed = time.monotonic() - start
+        assert elapsed < 0.5, f"FAIL: Reviews did not run in parallel ({elapsed:.2f}s)"
+        assert result.question_set_quality.question_variety.score == 5
+        assert result.overall_summary.final_decision == "Fail", "FAIL: A weak question should fail the set."
+        assert "Q7 clarity_of_stem (2)" in result.overall_summary.justification, result.overall_summary.justification
+        print(f"PASS: 11 reviews ran in parallel ({elapsed:.2f}s) and the weak question failed the set.")
+
+        try:
+            reduce_question_reviews([], [])
+            raise AssertionError("FAIL: An empty question set was reduced.")
+        except ValueError as e:
+            assert "empty question set" in str(e), e
+        print("PASS: An empty question set is rejected with a clear error.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_paragraph_index()
+    test_chunked_question_review()
@@ -0,0 +1,86 @@
+import time
+import traceback
+import numpy as np
+from agents.reading_passage import ReadingPassageAgent
+from difficulty import DifficultyScorer
+from llm_client import set_client_factory
+from simulated_llm import SimulatedLLMClient
+
+EASY = """Bees live together in large groups. Each bee has a job to do. Some bees look for food, and others take care of the young.
+
+When a bee finds flowers, it flies back home. Then it dances to show the other bees where the food is. The other bees watch the dance and fly to the same place."""
+
+MEDIUM = """Honeybee colonies function as highly organized societies in which individual workers perform specialized roles. Foragers collect nectar and pollen, while younger bees remain inside the hive to maintain the comb and feed the developing larvae.
+
+When a forager locates a productive source of food, it returns to the colony and performs a so-called waggle dance. The angle of the dance indicates the direction of the flowers relative to the sun, and its duration corresponds to the distance that must be traveled.
+
+Researchers have demonstrated that this system of communication allows a colony to allocate its workers efficiently. Consequently, the colony can respond rapidly to changes in the availability of resources across the surrounding landscape."""
+
+HARD = """The apparent altruism exhibited by sterile worker honeybees, which forgo reproduction entirely in order to sustain the reproductive output of a single queen, constituted a significant theoretical anomaly for evolutionary biology, since natural selection was presumed to favor traits that enhance an individual's own reproductive success.
+
+Subsequent formulations of inclusive fitness theory resolved this paradox by demonstrating that, under haplodiploid sex determination, sisters share an unusually high proportion of their genes; nevertheless, empirical investigations of polyandrous colonies, in which relatedness is substantially diminished, have prompted researchers to reconsider whether kinship alone adequately accounts for eusociality."""
+
+
+def test_difficulty_scorer():
+    print("--- Starting Test for DifficultyScorer ---")
+
+    try:
+        scorer = DifficultyScorer()
+        reports = [scorer.score(text) for text in (EASY, MEDIUM, HARD)]
+        assert [r.band for r in reports] == ["easy", "medium", "hard"], f"FAIL: {[(r.score, r.band) for r in reports]}"
+        assert reports[0].features["academic_share"] < reports[1].features["academic_share"]
+        assert np.allclose(scorer.score_batch([EASY, MEDIUM, HARD]), [r.score for r in reports], atol=0.01)
+        assert scorer.rank([HARD, EASY, MEDIUM], target="medium")[0] == 2
+        print(f"PASS: Scores {[r.score for r in reports]} fall in the easy, medium and hard bands.")
+
+        passage = "\n\n".join([MEDIUM] * 6)  # About 700 words, a full TOEFL passage.
+        start = time.perf_counter()
+        for _ in range(200):
+            scorer.score(passage)
+        per_passage = (time.perf_counter() - start) / 200
+        assert per_passage < 0.002, f"FAIL: Scoring took {per_passage * 1e6:.0f} µs per passage."
+        print(f"PASS: A 700-word passage is scored in {per_passage * 1e6:.0f} µs.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_passage_agent_redrafts_off_target_passages():
+    print("--- Starting Test for difficulty-targeted passages ---")
+
+    def respond(prompt: str) -> str:
+        # Follows the feedback: an "easy" first draft, a "medium" one once told it was too easy.
+        return MEDIUM if "was too easy" in prompt else EASY
+
+    client = SimulatedLLMClient(latency=0.0, responder=respond)
+    set_client_factory(lambda model_name, temperature: client)
+    try:
+        agent = ReadingPassageAgent(difficulty="medium")
+        prompt = agent.build_prompt("honeybees")
+        assert "Target Difficulty: medium" in prompt and prompt.rstrip().endswith("Thought Process:")
+        print("PASS: The prompt carries the medium band's targets.")
+
+        assert agent.run("honeybees") == MEDIUM
+        assert client.calls == 2 and dict(agent.draft_stats) == {"drafts": 2, "accepted": 1, "rejected": 1}
+        print("PASS: The easy draft was rejected locally and the redraft was accepted.")
+
+        stubborn = ReadingPassageAgent(difficulty="hard", max_drafts=2)
+        assert stubborn.run("honeybees") == MEDIUM and stubborn.draft_stats["exhausted"] == 1
+        assert "Target Difficulty" not in ReadingPassageAgent().build_prompt("honeybees")
+        print("PASS: After max_drafts the closest draft is returned; untargeted prompts are unchanged.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_difficulty_scorer()
+    test_passage_agent_redrafts_off_target_passages()
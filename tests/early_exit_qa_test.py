@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+import traceback
+from agents.quality_assurance import PassageQualityAgent, QuestionSetQualityAgent
+from agents.reading_passage import ReadingPassageAgent
+from agents.reading_question import ReadingQuestionAgent
+from llm_client import set_client_factory
+from pipeline import PassageRejectedError, generate_reading_task_early_exit
+from simulated_llm import SimulatedLLMClient
+
+SCORE = {"score": 4, "comment": "ok"}
+QUESTION_SET = {"questions": [
+    {"question_type": "Inference", "question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A"}
+]}
+QUESTION_LATENCY = 0.5
+
+
+def passage_review(prompt: str) -> str:
+    decision = "Fail" if "too short" in prompt else "Pass"
+    return json.dumps({
+        "passage_quality": {k: SCORE for k in (
+            "word_count", "readability", "vocabulary_distribution", "academic_logic_and_cohesion", "tone")},
+        "overall_summary": {"final_decision": decision, "justification": "passage"},
+    })
+
+
+def question_set_review(prompt: str) -> str:
+    return json.dumps({
+        "question_set_quality": {k: SCORE for k in (
+            "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency",
+            "question_variety")},
+        "overall_summary": {"final_decision": "Pass", "justification": "questions"},
+    })
+
+
+def build_agents(passage: str):
+    set_client_factory(lambda model_name, temperature: SimulatedLLMClient(latency=0.0))
+    agents = {
+        "passage_agent": ReadingPassageAgent(),
+        "question_agent": ReadingQuestionAgent(),
+        "passage_qa_agent": PassageQualityAgent(),
+        "question_qa_agent": QuestionSetQualityAgent(),
+    }
+    for agent in agents.values():
+        agent.ensure_initialized()
+    agents["passage_agent"].llm_client = SimulatedLLMClient(latency=0.0, responder=lambda prompt: passage)
+    agents["question_agent"].llm_client = SimulatedLLMClient(
+        latency=QUESTION_LATENCY, responder=lambda prompt: json.dumps(QUESTION_SET))
+    agents["passage_qa_agent"].llm_client = SimulatedLLMClient(latency=0.05, responder=passage_review)
+    agents["question_qa_agent"].llm_client = SimulatedLLMClient(latency=0.0, responder=question_set_review)
+    return agents
+
+
+def test_passage_review_runs_alongside_questions():
+    print("--- Starting Test for speculative passage QA ---")
+
+    try:
+        agents = build_agents("A passage that is long enough.")
+        start = time.monotonic()
+        task = asyncio.run(generate_reading_task_early_exit("tides", **agents))
+        elapsed = time.monotonic() - start
+
+        assert task.evaluation_result.overall_summary.final_decision == "Pass", "FAIL: Merged decision should pass."
+        assert task.evaluation_result.evaluation_scores.passage_quality.word_count.score == 4
+        assert elapsed < QUESTION_LATENCY + 0.3, f"FAIL: Passage QA did not overlap question generation ({elapsed:.2f}s)"
+        print(f"PASS: Passage QA overlapped question generation and the reviews were merged ({elapsed:.2f}s).")
+        assert task.prompt_version == agents["passage_agent"].prompt_version is not None, task.prompt_version
+        print(f"PASS: The task is tagged with the prompt version its agents used ({task.prompt_version}).")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+def test_failed_passage_cancels_questions():
+    print("--- Starting Test for early exit on a failed passage ---")
+
+    try:
+        agents = build_agents("A passage that is too short.")
+        question_client = agents["question_agent"].llm_client
+        start = time.monotonic()
+        try:
+            asyncio.run(generate_reading_task_early_exit("tides", passage_attempts=2, **agents))
+            raise AssertionError("FAIL: A rejected passage should raise PassageRejectedError.")
+        except PassageRejectedError as e:
+            assert e.evaluation.overall_summary.final_decision == "Fail"
+        elapsed = time.monotonic() - start
+
+        assert question_client.calls == 2, f"FAIL: Expected one question request per passage, got {question_client.calls}"
+        assert elapsed < QUESTION_LATENCY, f"FAIL: Question generation was not cancelled ({elapsed:.2f}s)"
+        assert agents["question_qa_agent"].llm_client.calls == 0, "FAIL: Question QA ran for a rejected passage."
+        assert question_client.limiter.snapshot()["inflight"] == 0, "FAIL: Cancelled calls kept their slots."
+        print(f"PASS: Both rejected passages cancelled their question requests in flight ({elapsed:.2f}s).")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_passage_review_runs_alongside_questions()
+    test_failed_passage_cancels_questions()
@@ -0,0 +1,163 @@
+import traceback
+import pipeline
+from config import BaseQuestionSet, EvaluationResult, ReadingTask, type_mix_violations
+from form_assembler import (
+    FormAssembler, FormSpec, GenerationRequest, InsufficientPoolError, PooledTask, TaskPool, build_generator,
+)
+
+STANDARD_MIX = {
+    "Factual Information": 3,
+    "Negative Factual Information": 1,
+    "Vocabulary-in-Context": 2,
+    "Inference": 1,
+    "Rhetorical Purpose": 1,
+    "Sentence Simplification": 1,
+    "Insert Text": 1,
+    "Prose Summary": 1,
+}
+
+
+def make_question(question_type: str) -> dict:
+    question = {"question_type": question_type, "question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A"}
+    if question_type == "Sentence Simplification":
+        question["highlighted_sentence"] = "A sentence."
+    elif question_type == "Insert Text":
+        question.update(sentence_to_insert="New sentence.", options=["1", "2", "3", "4"], answer="2")
+    elif question_type == "Prose Summary":
+        question.update(introductory_sentence="Intro.", options=list("ABCDEF"), answer=["A", "B", "C"])
+    return question
+
+
+def make_task(topic: str, difficulty: int, mix: dict = STANDARD_MIX, decision: str = "Pass") -> ReadingTask:
+    score = lambda s: {"score": s, "comment": ""}
+    questions = [make_question(qt) for qt, count in mix.items() for _ in range(count)]
+    evaluation = {
+        "evaluation_scores": {
+            "passage_quality": {
+                "word_count": score(4), "readability": score(difficulty), "vocabulary_distribution": score(difficulty),
+                "academic_logic_and_cohesion": score(4), "tone": score(4),
+            },
+            "question_set_quality": {k: score(4) for k in (
+                "clarity_of_stem", "unambiguous_correct_answer", "plausible_distractors", "passage_dependency",
+                "question_variety")},
+        },
+        "overall_summary": {"final_decision": decision, "justification": ""},
+    }
+    return ReadingTask(
+        topic=topic,
+        passage=f"Passage about {topic}",
+        questions_set=BaseQuestionSet.model_validate({"questions": questions}),
+        evaluation_result=EvaluationResult.model_validate(evaluation),
+    )
+
+
+def test_form_assembler():
+    print("--- Starting Test for FormAssembler ---")
+
+    try:
+        no_insert = dict(STANDARD_MIX, **{"Insert Text": 0, "Factual Information": 4})
+        pool = TaskPool([
+            make_task("Volcanoes", 2),
+            make_task("Coral Reefs", 5),
+            make_task("Trade Routes", 4, mix=no_insert),
+            make_task("Printing Press", 4),
+            make_task("Glaciers", 4, decision="Fail"),
+            make_task("Bees", 3),
+        ])
+        standard, off_mix = next(iter(pool)).task, make_task("x", 3, mix=no_insert)
+        assert type_mix_violations(q.question_type for q in standard.questions_set.questions) == {}, \
+            "FAIL: Standard mix flagged."
+        assert "Insert Text" in type_mix_violations(q.question_type for q in off_mix.questions_set.questions), \
+            "FAIL: Missing type not flagged."
+        print("PASS: Per-passage type mix is validated.")
+
+        spec = FormSpec(passages=3, difficulty_range=(3.5, 4.5))
+        form = FormAssembler(pool, spec).assemble()
+        topics = sorted(t.topic for t in form.tasks)
+        assert topics == ["Bees", "Coral Reefs", "Printing Press"], f"FAIL: Unexpected selection {topics}"
+        assert 3.5 <= form.mean_difficulty <= 4.5, f"FAIL: Mean difficulty {form.mean_difficulty} out of range."
+        assert form.question_type_counts["Insert Text"] == 3, "FAIL: Type mix constraint violated."
+        print(f"PASS: Assembled {topics} (mean difficulty {form.mean_difficulty:.2f}).")
+
+        hard_spec = FormSpec(passages=3, difficulty_range=(4.5, 5.0))
+        try:
+            FormAssembler(pool, hard_spec).assemble()
+            raise AssertionError("FAIL: Infeasible spec should raise InsufficientPoolError.")
+        except InsufficientPoolError as e:
+            assert len(e.missing) == 2, f"FAIL: Expected 2 missing passages, got {len(e.missing)}"
+            print(f"PASS: Infeasible spec reports only the missing pieces ({len(e.missing)} passages).")
+
+        generated = []
+
+        def fake_generate(requests):
+            tasks = [make_task(f"New topic {len(generated) + i}", 5) for i, _ in enumerate(requests)]
+            generated.extend(tasks)
+            return tasks
+
+        form = FormAssembler(pool, hard_spec).assemble(generate=fake_generate)
+        assert len(generated) == 2, f"FAIL: Expected to generate 2 passages, generated {len(generated)}"
+        assert "Coral Reefs" in [t.topic for t in form.tasks], "FAIL: Existing pool task was not reused."
+        print("PASS: Only the missing passages were generated and the pool task was reused.")
+
+        reseeded = make_task("Bees", 3, mix=no_insert)
+        assert PooledTask.from_task(reseeded).task_id != PooledTask.from_task(make_task("Bees", 3)).task_id, \
+            "FAIL: Tasks sharing a passage got the same ID."
+        print("PASS: Tasks that share a passage but not their questions are pooled separately.")
+
+        picks = [PooledTask.from_task(t) for t in (
+            make_task("Trade Routes", 4, mix=no_insert), make_task("Bees", 4), make_task("Printing Press", 4),
+        )]
+        (request,) = FormAssembler(TaskPool(), spec)._missing_requests(picks)
+        assert request.needed_question_types.get("Insert Text") == 1, \
+            f"FAIL: The pick missing Insert Text was kept: {request.needed_question_types}"
+        print("PASS: A full selection with the wrong mix replaces the pick that causes it.")
+
+        print("\n--- Test Summary ---")
+        print("🎉 All assertions passed! The FormAssembler is working as expected.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_generator_follows_requests():
+    print("--- Starting Test for build_generator ---")
+
+    calls = []
+
+    async def fake_generate_reading_task(topic, passage_agent, question_agent, qa_agent, question_types=None):
+        calls.append((topic, passage_agent.difficulty, question_types))
+        mix = dict(STANDARD_MIX, **{"Insert Text": 0, "Factual Information": 4}) if topic == "Deserts" else STANDARD_MIX
+        return make_task(topic, 5, mix=mix)
+
+    original = pipeline.generate_reading_task
+    pipeline.generate_reading_task = fake_generate_reading_task
+    try:
+        generate = build_generator(["Volcanoes", "Deserts", "volcanoes", "Rivers", "Caves"])
+        requests = [
+            GenerationRequest(difficulty_target=4.8, needed_question_types={"Insert Text": 1}, exclude_topics=["VOLCANOES"]),
+            GenerationRequest(difficulty_target=1.5, needed_question_types={}, exclude_topics=["Volcanoes"]),
+        ]
+        tasks = generate(requests)
+
+        assert calls == [("Deserts", "hard", {"Insert Text": 1}), ("Rivers", "easy", {})], \
+            f"FAIL: Unexpected topics, bands or question types: {calls}"
+        print("PASS: Each request got an unused, non-excluded topic, a passage agent for its difficulty band "
+              "and its needed question types.")
+        assert [task.topic for task in tasks] == ["Rivers"], "FAIL: A task without the needed types was kept."
+        print("PASS: A task that does not supply the needed question types was discarded.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        pipeline.generate_reading_task = original
+
+
+if __name__ == '__main__':
+    test_form_assembler()
+    test_generator_follows_requests()
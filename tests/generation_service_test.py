@@ -0,0 +1,93 @@
+import asyncio
+import time
+import traceback
+from generation_service import GenerationService, QueueFullError
+
+
+def test_generation_service():
+    print("--- Starting Test for GenerationService ---")
+
+    calls = []
+
+    async def fake_handler(payload):
+        calls.append(payload)
+        await asyncio.sleep(0.05)
+        return f"task for {payload}"
+
+    service = GenerationService(fake_handler, max_concurrency=1, max_queue_size=4, max_jobs_per_user=3).start()
+    try:
+        blocker = service.submit("user-a", "a-1", "a-1")
+        a2 = service.submit("user-a", "a-2", "a-2")
+        a3 = service.submit("user-a", "a-3", "a-3")
+        b1 = service.submit("user-b", "b-1", "b-1")
+        duplicate = service.submit("user-c", "b-1", "b-1")
+
+        assert duplicate is b1, "FAIL: Identical in-flight requests should share one job."
+        assert service.stats()["coalesced"] == 1, "FAIL: Coalesced request was not counted."
+        print("PASS: Duplicate topic joined the in-flight job.")
+
+        for job in (blocker, a2, a3, b1):
+            job.future.result(timeout=5)
+
+        assert calls.count("b-1") == 1, "FAIL: Coalesced job ran more than once."
+        assert calls.index("b-1") < calls.index("a-3"), f"FAIL: user-b was starved. Order: {calls}"
+        assert b1.queue_delay is not None and b1.status == "done", "FAIL: Job timing/status not recorded."
+        print(f"PASS: Jobs were dispatched fairly across users ({calls}).")
+
+        service.max_queue_size = 0
+        try:
+            service.submit("user-d", "d-1", "d-1")
+            raise AssertionError("FAIL: Submitting to a full queue should raise QueueFullError.")
+        except QueueFullError:
+            print("PASS: Full queue rejects new jobs.")
+
+        print("\n--- Test Summary ---")
+        print("🎉 All assertions passed! The GenerationService is working as expected.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        service.stop()
+
+
+def test_stop_resolves_every_job():
+    print("--- Starting Test for GenerationService.stop ---")
+
+    async def slow_handler(payload):
+        await asyncio.sleep(30)
+        return payload
+
+    service = GenerationService(slow_handler, max_concurrency=1).start()
+    try:
+        running = service.submit("user-a", "a-1", "a-1")
+        queued = service.submit("user-b", "b-1", "b-1")
+        deadline = time.monotonic() + 5
+        while running.status != "running" and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        service.stop()
+        for job in (running, queued):
+            try:
+                job.future.result(timeout=1)
+                raise AssertionError("FAIL: A job finished although the service stopped.")
+            except RuntimeError as e:
+                assert "stopped" in str(e) and job.status == "failed", f"FAIL: Unexpected outcome: {e}"
+        stats = service.stats()
+        assert stats["running"] == 0 and stats["queued"] == 0, f"FAIL: Counters were not released: {stats}"
+        print("PASS: Stopping cancelled the running job, failed the queued one and released the counters.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        service.stop()
+
+
+if __name__ == '__main__':
+    test_generation_service()
+    test_stop_resolves_every_job()
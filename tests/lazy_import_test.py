@@ -0,0 +1,59 @@
+import subprocess
+import sys
+import traceback
+
+HEAVY_MODULES = ["langchain_google_genai", "langchain_core", "dotenv"]
+
+IMPORT_CHECK = """
+import sys
+import run_cli
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def test_cli_import_is_lazy():
+    print("--- Starting Test for lazy imports ---")
+
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_CHECK.format(heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        loaded = completed.stdout.strip()
+
+        assert loaded == "", f"FAIL: Importing run_cli pulled in heavy modules: {loaded}"
+        print("PASS: Importing run_cli does not import langchain or dotenv.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_agent_construction_is_lazy():
+    print("--- Starting Test for lazy agent construction ---")
+
+    try:
+        from agents.reading_passage import ReadingPassageAgent
+        from agents.reading_question import ReadingQuestionAgent
+        from agents.quality_assurance import QualityAssuranceAgent
+
+        for agent_cls in (ReadingPassageAgent, ReadingQuestionAgent, QualityAssuranceAgent):
+            agent = agent_cls()
+            assert not agent.is_initialized, f"FAIL: {agent_cls.__name__} initialized eagerly."
+            assert not hasattr(agent, "llm_client"), f"FAIL: {agent_cls.__name__} built its client eagerly."
+        print("PASS: Agents defer client and prompt setup until the first run.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+if __name__ == '__main__':
+    test_cli_import_is_lazy()
+    test_agent_construction_is_lazy()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import traceback
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from agents.listening_audio import AudioCache, ListeningAudioAgent, StubTTSBackend, split_speaker_turns
+
+SAMPLE_SCRIPT = """
+Thought Process:
+The student needs help finding sources.
+
+Final Script:
+(Student): Hi, um, I'm looking for sources on coral reef bleaching.
+(Librarian): Sure. Are you looking for journal articles or books?
+(Student): Journal articles, mostly.
+I need recent ones, from the last five years.
+(Librarian): Then the marine science database is your best bet.
+"""
+
+
+def test_listening_audio_agent():
+    print("--- Starting Test for ListeningAudioAgent ---")
+
+    try:
+        turns = split_speaker_turns(SAMPLE_SCRIPT)
+        assert [t.speaker for t in turns] == ["Student", "Librarian", "Student", "Librarian"], \
+            f"FAIL: Unexpected speaker turns: {turns}"
+        assert "last five years" in turns[2].text, "FAIL: Continuation line was not merged into the previous turn."
+        print("PASS: Script was split into speaker turns.")
+
+        lecture = "Professor: Today we look at tides.\nNote: the Moon matters most.\nExample: spring tides.\n" \
+                  "(Student): Why spring?\nProfessor: Good question."
+        turns = split_speaker_turns(lecture, speakers=["professor"])
+        assert [t.speaker for t in turns] == ["Professor", "Student", "Professor"], f"FAIL: {turns}"
+        assert "Note: the Moon" in turns[0].text and "Example: spring" in turns[0].text
+        assert [t.speaker for t in split_speaker_turns(lecture)] == ["Narrator", "Student"], \
+            "FAIL: An undeclared label was a speaker."
+        print("PASS: Only declared or configured names start a turn; 'Note:' lines stay in the turn.")
+
+        scopes = {
+            ListeningAudioAgent(backend=StubTTSBackend())._flight_scope(),
+            ListeningAudioAgent(backend=StubTTSBackend(), voices={"professor": "en-US-Neural2-A"})._flight_scope(),
+            ListeningAudioAgent(backend=StubTTSBackend(), pause_seconds=1.0)._flight_scope(),
+        }
+        assert len(scopes) == 3, "FAIL: Renders with different voices or pauses would be coalesced."
+        print("PASS: Voices and pause length are part of the coalescing scope.")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            backend = StubTTSBackend(seconds_per_word=0.01)
+            agent = ListeningAudioAgent(backend=backend, cache_dir=os.path.join(tmp_dir, "cache"))
+            output_path = os.path.join(tmp_dir, "conversation.wav")
+
+            result_path = agent.run({"script": SAMPLE_SCRIPT, "output_path": output_path})
+
+            assert result_path == output_path and os.path.exists(output_path), "FAIL: Audio file was not written."
+            with wave.open(output_path, "rb") as wav:
+                duration = wav.getnframes() / wav.getframerate()
+            assert duration > 0.5, f"FAIL: Audio seems too short ({duration:.2f}s)."
+            assert backend.calls == 4, f"FAIL: Expected 4 synthesis calls, got {backend.calls}"
+            print(f"PASS: Rendered {duration:.2f}s of audio with {backend.calls} TTS calls.")
+
+            agent.run({"script": SAMPLE_SCRIPT, "output_path": os.path.join(tmp_dir, "again.wav")})
+            assert backend.calls == 4, "FAIL: Cached turns were synthesized again."
+            print("PASS: Re-rendering the same script is served from the audio cache.")
+
+            cache = AudioCache(os.path.join(tmp_dir, "shared"))
+            chunks = [bytes([i]) * 50_000 for i in range(16)]
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                list(pool.map(lambda pcm: cache.put("same-key", pcm), chunks))
+            assert cache.get("same-key") in chunks, "FAIL: Concurrent writes left a mixed chunk."
+            assert os.listdir(cache.cache_dir) == ["same-key.pcm"], "FAIL: Temp files were left behind."
+            print("PASS: Concurrent writes of one key from many threads leave one whole chunk.")
+
+        print("\n--- Test Summary ---")
+        print("🎉 All assertions passed! The ListeningAudioAgent is working as expected.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+if __name__ == '__main__':
+    test_listening_audio_agent()
@@ -0,0 +1,28 @@
+import traceback
+from load_test_web import _percentile, run_load_test
+
+
+def test_web_load_test_reports_latency_percentiles():
+    print("--- Starting Test for the web load test ---")
+
+    try:
+        assert _percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0 and _percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
+        # The app runs 4 jobs at once, so the 6th session has to queue.
+        report = run_load_test(sessions=6, llm_latency=0.2, poll_interval=0.05, timeout=60)
+
+        assert report["statuses"]["done"] == 6, f"FAIL: Not every session got its task: {report}"
+        latency = report["latency_s"]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"], f"FAIL: {latency}"
+        assert report["queue_delay_s"]["max"] > 0.1, f"FAIL: No queueing was measured: {report['queue_delay_s']}"
+        assert report["memory_per_session_kb"]["session_state"] > 0
+        print(f"PASS: 6 sessions finished; latency {latency}, queue delay {report['queue_delay_s']}.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+if __name__ == '__main__':
+    test_web_load_test_reports_latency_percentiles()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+from agents.base import BaseAgent
+from simulated_llm import SimulatedLLMClient
+
+
+def burn_cpu(seconds: float):
+    import time
+
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+class SlowParsingAgent(BaseAgent[float, str]):
+    """Waits on the (simulated) network, then spends `inputs` seconds of CPU parsing."""
+
+    def _initialize_agent(self):
+        self.llm_client = SimulatedLLMClient(latency=0.1)
+
+    def _build_prompt(self, inputs: float) -> str:
+        return f"Parse for {inputs} seconds."
+
+    def _parse_output(self, llm_output: str, inputs: float) -> str:
+        burn_cpu(inputs)
+        return llm_output
+
+    def _run(self, inputs: float) -> str:
+        return self._parse_output(self.llm_client.invoke(self._build_prompt(inputs)), inputs)
+
+
+def test_profiler_splits_wall_and_cpu_time():
+    print("--- Starting Test for the profiler ---")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            assert profiling.stage("idle") is profiling.task("idle"), "FAIL: Disabled hooks should be no-ops."
+            profiler = profiling.enable(output_dir=tmp_dir, top_n=2, name="unit", interval=0.002)
+            agent = SlowParsingAgent()
+
+            def run_task(i: int):
+                with profiling.task(f"task-{i}"):
+                    return agent.run(0.05 * (i + 1))
+
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(run_task, range(4)))
+            paths = profiling.disable()
+
+            stages = profiler.run.stages
+            run_stage = stages["SlowParsingAgent.run"].as_dict()
+            model_stage = stages["SlowParsingAgent.run/llm.invoke/model"].as_dict()
+            assert run_stage["calls"] == 4 and model_stage["calls"] == 4, f"FAIL: {list(stages)}"
+            assert model_stage["cpu_share"] < 0.2, f"FAIL: Network wait was counted as CPU: {model_stage}"
+            assert run_stage["cpu_s"] >= 0.45, f"FAIL: Parsing CPU time is missing: {run_stage}"
+            print(f"PASS: Stage table separates network wait {model_stage} from parsing CPU {run_stage}.")
+
+            collapsed = open(os.path.join(tmp_dir, "unit", "run.collapsed"), encoding="utf-8").read()
+            assert "[SlowParsingAgent.run];" in collapsed and "profiling_test:burn_cpu" in collapsed
+            print("PASS: Collapsed stacks attribute samples to the stage and the hot function.")
+
+            summary = json.load(open(os.path.join(tmp_dir, "unit", "summary.json"), encoding="utf-8"))
+            assert [t["task_id"] for t in summary["slowest_tasks"]] == ["task-3", "task-2"], summary
+            speedscope = json.load(open(os.path.join(tmp_dir, "unit", "task01-task-3.speedscope.json"), encoding="utf-8"))
+            profile = speedscope["profiles"][0]
+            assert profile["type"] == "sampled" and len(profile["samples"]) == len(profile["weights"]) > 0
+            assert len(paths) == 3 * 3 + 1, f"FAIL: Unexpected files: {paths}"
+            print("PASS: Only the two slowest tasks were exported, with valid speedscope profiles.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        profiling.disable(export=False)
+
+
+def test_overlapping_tasks_with_the_same_name():
+    print("--- Starting Test for overlapping profiler tasks ---")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profiler = profiling.enable(output_dir=tmp_dir, top_n=5, name="same-name", interval=0.002)
+            agent = SlowParsingAgent()
+
+            def run_task(seconds: float):
+                with profiling.task("reading:random"):
+                    return agent.run(seconds)
+
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(run_task, [0.05, 0.15]))
+            profiling.disable(export=False)
+
+            tasks = profiler.slowest_tasks()
+            assert sorted(t.task_id for t in tasks) == ["reading:random", "reading:random#2"], tasks
+            for profile in tasks:
+                stats = profile.stages["SlowParsingAgent.run"]
+                assert stats.calls == 1, f"FAIL: {profile.task_id} got another task's stages."
+                assert profile.wall_s < 0.5, f"FAIL: {profile.task_id} wall time adds up both tasks."
+            assert tasks[0].wall_s > tasks[1].wall_s + 0.05, [t.wall_s for t in tasks]
+            print("PASS: Two overlapping tasks with the same name are profiled separately.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        profiling.disable(export=False)
+
+
+if __name__ == '__main__':
+    test_profiler_splits_wall_and_cpu_time()
+    test_overlapping_tasks_with_the_same_name()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+import traceback
+from agents.base import BaseAgent, record_prompt_versions
+from prompt_registry import PromptRegistry, set_registry
+
+
+class EchoAgent(BaseAgent[str, str]):
+    def __init__(self, prompt_path: str, footer_path: str):
+        super().__init__()
+        self.prompt_path = prompt_path
+        self.footer_path = footer_path
+        self.loads = 0
+
+    def _initialize_agent(self):
+        pass
+
+    def _load_prompts(self):
+        self.loads += 1
+        templates = {}
+        for name, path in (("template", self.prompt_path), ("footer", self.footer_path)):
+            template = self._read_file(path)
+            template.format(topic="")  # Fails on malformed templates, like building a PromptTemplate would.
+            templates[name] = template
+        return templates
+
+    def _run(self, inputs: str) -> str:
+        return self.templates.template.format(topic=inputs) + self.templates.footer.format(topic=inputs)
+
+
+def write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_prompt_registry_hot_reload():
+    print("--- Starting Test for the prompt registry ---")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = os.path.join(tmp_dir, "prompts")
+            prompt_path = os.path.join(root, "reading", "instruction.txt")
+            footer_path = os.path.join(root, "reading", "footer.txt")
+            write(prompt_path, "Write about {topic}.")
+            write(footer_path, "")
+            write(os.path.join(root, "reading", "examples", "example_01", "topic.txt"), "Tides")
+
+            registry = PromptRegistry(root, poll_interval=0.05)
+            set_registry(registry)
+            agent = EchoAgent(prompt_path, footer_path)
+
+            assert agent.run("tides") == "Write about tides."
+            first_version = agent.prompt_version
+            assert first_version == registry.version, "FAIL: Agent is not tagged with the registry version."
+            snapshot = registry.current()
+            assert snapshot.listdir(os.path.join(root, "reading")) == ["examples", "footer.txt", "instruction.txt"]
+            assert snapshot.isdir(os.path.join(root, "reading", "examples", "example_01"))
+            print(f"PASS: Agent loaded its prompt from snapshot {first_version}.")
+
+            write(prompt_path, "Write a passage about {topic}.")
+            assert agent.run("tides") == "Write about tides.", "FAIL: Prompt changed without a rescan."
+            assert agent.loads == 1, "FAIL: Agent re-read prompts without a new version."
+            print("PASS: Runs are served from memory until the registry rescans.")
+
+            registry.start_watching()
+            deadline = time.monotonic() + 5
+            while registry.version == first_version and time.monotonic() < deadline:
+                time.sleep(0.02)
+            registry.stop()
+
+            assert agent.run("tides") == "Write a passage about tides.", "FAIL: Agent kept the old prompt."
+            assert agent.prompt_version != first_version and registry.reloads == 1
+            print(f"PASS: The watcher swapped in version {agent.prompt_version} without rebuilding the agent.")
+
+            os.utime(prompt_path)
+            assert not registry.check_for_changes(), "FAIL: A touch without edits changed the version."
+            good_version = agent.prompt_version
+            write(prompt_path, "Write an essay about {topic}.")
+            write(footer_path, "Broken {template")
+            assert registry.check_for_changes()
+            with record_prompt_versions() as used:
+                assert agent.run("tides") == "Write a passage about tides.", "FAIL: A bad prompt replaced a good one."
+            assert agent.prompt_version == good_version, "FAIL: A rejected version was published."
+            assert used == {"EchoAgent": good_version}, f"FAIL: Recorded {used} instead of the version used."
+            print("PASS: Touches keep the version and a half-broken prompt set keeps all previous templates.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_registry(None)
+
+
+if __name__ == '__main__':
+    test_prompt_registry_hot_reload()
@@ -0,0 +1,103 @@
+import json
+import traceback
+from agents.chunked_quality_assurance import ChunkedQuestionSetQualityAgent
+from agents.question_regeneration import QuestionRegenerationAgent, regenerate_questions
+from agents.reading_question import ReadingQuestionAgent
+from config import BaseQuestionSet
+from llm_client import set_client_factory
+from paragraph_index import ParagraphIndex
+from simulated_llm import SimulatedLLMClient
+from tests.chunked_quality_assurance_test import MIX, PASSAGE, make_question, review
+
+
+def make_questions_set() -> BaseQuestionSet:
+    topics = ["the Moon and tides", "magma and basalt", "coral algae", "glaciers and ice", "sunlight"]
+    return BaseQuestionSet.model_validate({"questions": [
+        make_question(qt, f"What does the passage say about {topics[i % len(topics)]}?")
+        for i, qt in enumerate(qt for qt, n in MIX.items() for _ in range(n))
+    ]})
+
+
+def test_regenerates_only_selected_questions():
+    print("--- Starting Test for QuestionRegenerationAgent ---")
+
+    replies = iter([
+        json.dumps(make_question("Factual Information", "Which is NOT true of coral reefs?")),
+        json.dumps(make_question("Inference", "What can be inferred about glaciers from paragraph 4?")),
+    ])
+    clients = []
+
+    def factory(model_name, temperature):
+        responder = review if temperature < 0.5 else lambda prompt: next(replies)
+        clients.append(SimulatedLLMClient(latency=0.0, responder=responder, temperature=temperature))
+        return clients[-1]
+
+    set_client_factory(factory)
+    try:
+        questions_set = make_questions_set()
+        agent = QuestionRegenerationAgent(paragraphs_per_question=1)
+        review_agent = ChunkedQuestionSetQualityAgent(paragraphs_per_question=1)
+        previous_reviews = review_agent.review_questions(PASSAGE, questions_set.questions)
+        assert review_agent.llm_client.calls == 11
+
+        agent.ensure_initialized()
+        prompt = agent._regeneration_prompt(ParagraphIndex.from_passage(PASSAGE), questions_set.questions, 6, "")
+        full_prompt = ReadingQuestionAgent().build_prompt(PASSAGE)
+        # Prompt plus reply: one question against the whole set.
+        one = len(prompt) + len(questions_set.questions[6].model_dump_json())
+        full = len(full_prompt) + len(questions_set.model_dump_json())
+        assert one * 2 < full, f"FAIL: {one} vs {full} characters"
+        assert "Q6 (Vocabulary-in-Context)" in prompt and "Q7 (" not in prompt
+        print(f"PASS: Regenerating one question moves {one} characters; regenerating the set moves {full}.")
+
+        # The first reply is a Factual question for the Inference slot, so it is retried.
+        result = regenerate_questions(
+            PASSAGE, questions_set, [6], feedback={6: "Two options are correct."},
+            previous_reviews=previous_reviews, regeneration_agent=agent, review_agent=review_agent,
+        )
+        new_questions = result.questions_set.questions
+        assert result.changed == [6] and agent.llm_client.calls == 2
+        assert new_questions[6].question.startswith("What can be inferred about glaciers")
+        assert all(new_questions[i] == questions_set.questions[i] for i in range(11) if i != 6)
+        assert review_agent.llm_client.calls == 12, "FAIL: Unchanged questions were reviewed again."
+        assert list(result.reviews) == [6]
+        assert result.evaluation.overall_summary.final_decision == "Fail"
+        assert result.evaluation.question_set_quality.question_variety.score == 5
+        print("PASS: Only Q7 was replaced (after one wrong-type reply) and only Q7 was re-reviewed.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+def test_regeneration_gives_up_on_wrong_type():
+    print("--- Starting Test for QuestionRegenerationAgent retries ---")
+
+    reply = json.dumps(make_question("Factual Information", "Which is true of coral reefs?"))
+    set_client_factory(lambda model_name, temperature: SimulatedLLMClient(latency=0.0, responder=lambda p: reply))
+    try:
+        agent = QuestionRegenerationAgent(max_attempts=2)
+        try:
+            agent.run({"passage": PASSAGE, "questions_set": make_questions_set(), "indices": [8]})
+            raise AssertionError("FAIL: A wrong-type replacement was accepted.")
+        except ValueError as e:
+            assert "Q9 could not be regenerated" in str(e), e
+        assert agent.llm_client.calls == 2
+        print("PASS: A slot is never filled with a question of another type.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_regenerates_only_selected_questions()
+    test_regeneration_gives_up_on_wrong_type()
@@ -1,6 +1,6 @@
 import traceback
 from agents.reading_question import ReadingQuestionAgent
-from config import BaseQuestionSet
+from config import BaseQuestionSet, type_mix_violations
 
 SAMPLE_PASSAGE = """
 Social Change and Revolution: Unpacking the Dynamics of Historical Transformation
@@ -44,6 +44,10 @@ def test_reading_question_agent():
             assert hasattr(q, 'answer'), f"FAIL: Question {i} is missing 'answer'"
         print("PASS: All questions have the required fields.")
 
+        violations = type_mix_violations(q.question_type for q in result.questions)
+        assert not violations, f"FAIL: Question type mix is off (type: actual count): {violations}"
+        print("PASS: Question types match the required distribution.")
+
         print("\n--- Test Summary ---")
         print("🎉 All assertions passed! The agent is working as expected.")
 
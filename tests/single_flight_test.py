@@ -0,0 +1,113 @@
+import threading
+import time
+import itertools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from agents.reading_passage import ReadingPassageAgent
+from llm_client import set_client_factory
+from pipeline import RANDOM_TOPIC
+from simulated_llm import SimulatedLLMClient
+from single_flight import SingleFlight, fingerprint
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    print("--- Starting Test for SingleFlight ---")
+
+    try:
+        group = SingleFlight("test.coalesce")
+        executions = []
+        started = threading.Event()
+
+        def slow_call():
+            executions.append(1)
+            started.set()
+            time.sleep(0.1)
+            return "shared result"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            leader = pool.submit(group.do, "same-prompt", slow_call)
+            started.wait(timeout=5)
+            followers = [pool.submit(group.do, "same-prompt", slow_call) for _ in range(4)]
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(executions) == 1, f"FAIL: Expected 1 execution, got {len(executions)}"
+        assert results == ["shared result"] * 5, f"FAIL: Callers received different results: {results}"
+        stats = group.stats()
+        assert stats["coalesced"] == 4 and stats["executions"] == 1, f"FAIL: Unexpected metrics: {stats}"
+        print(f"PASS: 5 concurrent calls ran once ({stats}).")
+
+        group.do("same-prompt", slow_call)
+        assert len(executions) == 2, "FAIL: Finished calls must not be cached."
+        print("PASS: A call after completion executes again.")
+
+        def failing_call():
+            raise ValueError("boom")
+
+        try:
+            group.do("failing", failing_call)
+            raise AssertionError("FAIL: Exception was not propagated.")
+        except ValueError:
+            pass
+        assert group.stats()["inflight"] == 0, "FAIL: Failed call left an in-flight entry."
+        print("PASS: Exceptions propagate and clear the in-flight entry.")
+
+        assert fingerprint({"a": 1, "b": "x"}) == fingerprint({"b": "x", "a": 1}), "FAIL: Fingerprint depends on key order."
+        print("PASS: Input fingerprints are order-independent.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_sampled_and_random_runs_are_not_coalesced():
+    print("--- Starting Test for single-flight with sampled and random-topic runs ---")
+
+    counter = itertools.count()
+    clients = []
+
+    def factory(model_name, temperature):
+        client = SimulatedLLMClient(latency=0.1, responder=lambda prompt: f"Passage {next(counter)}",
+                                    model_name=model_name, temperature=temperature)
+        clients.append(client)
+        return client
+
+    set_client_factory(factory)
+    try:
+        agent = ReadingPassageAgent()
+        agent.ensure_initialized()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            passages = list(pool.map(agent.run, [RANDOM_TOPIC] * 5))
+        assert len(set(passages)) == 5, f"FAIL: Concurrent random-topic runs shared a result: {passages}"
+        print("PASS: Five concurrent random-topic runs executed separately.")
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            passages = list(pool.map(agent.run, ["Tides"] * 5))
+        assert len(set(passages)) == 5, f"FAIL: Sampled runs (temperature 0.7) were coalesced: {passages}"
+        print("PASS: Identical topics at a sampling temperature executed separately.")
+
+        deterministic = SimulatedLLMClient(latency=0.1, responder=lambda prompt: f"Reply {next(counter)}",
+                                           temperature=0)
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            replies = list(pool.map(deterministic.invoke, ["Same prompt"] * 5))
+        assert len(set(replies)) == 1 and deterministic.calls == 1, f"FAIL: Temperature 0 was not coalesced: {replies}"
+        print("PASS: Identical prompts at temperature 0 shared one request.")
+
+        agent.llm_client = deterministic
+        assert agent._coalesces("Tides") and not agent._coalesces(RANDOM_TOPIC), \
+            "FAIL: Random-topic runs must never be coalesced, even with deterministic settings."
+        print("PASS: Random-topic runs opt out of coalescing even at temperature 0.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_single_flight_coalesces_concurrent_calls()
+    test_sampled_and_random_runs_are_not_coalesced()
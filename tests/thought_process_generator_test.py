@@ -0,0 +1,82 @@
+import os
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from thought_process_generator import ExampleLibrary, build_examples, question_sources
+
+
+class FakeThoughtAgent:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, inputs):
+        with self._lock:
+            self.calls += 1
+        if "broken" in inputs["passage"]:
+            raise ValueError("model error")
+        return f"Thoughts on {inputs['passage'][:20]}"
+
+
+def test_example_library_assigns_ids_atomically():
+    print("--- Starting Test for ExampleLibrary ---")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, "example_03"))  # Numbering continues after gaps.
+            library = ExampleLibrary(tmp_dir, "input_passage.txt")
+            files = lambda i: {"input_passage.txt": f"passage {i}", "output.json": "{}", "thought_process.txt": "t"}
+
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                created = list(pool.map(lambda i: library.add(files(i)), range(40)))
+
+            names = sorted(os.path.basename(d) for d in created)
+            assert names == [f"example_{n:02d}" for n in range(4, 44)], f"FAIL: Unexpected IDs: {names}"
+            assert not [d for d in os.listdir(tmp_dir) if d.startswith(".")], "FAIL: Staging directories were left."
+            assert all(len(os.listdir(d)) == 3 for d in created), "FAIL: An example is missing files."
+            print("PASS: 40 concurrent writers got 40 distinct, complete examples (example_04..example_43).")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_bulk_build_from_directory():
+    print("--- Starting Test for bulk example building ---")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_dir = os.path.join(tmp_dir, "sources")
+            os.makedirs(source_dir)
+            for name, passage in [("a", "Tides rise."), ("b", "Lava cools."), ("c", "broken input"), ("d", "Tides rise.")]:
+                with open(os.path.join(source_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                    f.write(passage)
+                with open(os.path.join(source_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                    f.write('{"questions": []}')
+
+            library = ExampleLibrary(os.path.join(tmp_dir, "examples"), "input_passage.txt")
+            agent = FakeThoughtAgent()
+            summary = build_examples(question_sources(source_dir), library, agent, max_workers=4)
+
+            assert len(summary["created"]) == 2 and list(summary["failed"]) == ["c"], f"FAIL: {summary}"
+            assert summary["skipped"] == ["d"], "FAIL: A duplicate passage in the same batch was not skipped."
+            print("PASS: Pairs were built concurrently; duplicates were skipped and failures reported.")
+
+            rerun = build_examples(question_sources(source_dir), library, agent, max_workers=4)
+            assert rerun["created"] == [] and sorted(rerun["skipped"]) == ["a", "b", "d"], f"FAIL: {rerun}"
+            assert agent.calls == 4, f"FAIL: Rerun regenerated existing examples ({agent.calls} calls)."
+            print("PASS: Rerunning only retried the failed source.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+if __name__ == '__main__':
+    test_example_library_assigns_ids_atomically()
+    test_bulk_build_from_directory()
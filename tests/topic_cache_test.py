@@ -0,0 +1,123 @@
+import asyncio
+import os
+import tempfile
+import traceback
+from collections import Counter
+from types import SimpleNamespace
+from agents.quality_assurance import PassageQualityAgent, QuestionSetQualityAgent
+from agents.reading_passage import ReadingPassageAgent
+from agents.reading_question import ReadingQuestionAgent
+from llm_client import set_client_factory
+from load_test_web import fake_response
+from pipeline import generate_reading_task_early_exit
+from simulated_llm import SimulatedLLMClient
+from topic_cache import TopicCache, normalize_topic, topic_vector
+
+
+def similarity(a: str, b: str) -> float:
+    va, vb = topic_vector(normalize_topic(a)), topic_vector(normalize_topic(b))
+    return sum(weight * vb.get(gram, 0.0) for gram, weight in va.items())
+
+
+def test_topic_similarity():
+    print("--- Starting Test for topic normalization ---")
+
+    try:
+        assert normalize_topic("The Causes of the French Revolutions!") == "cause french revolution"
+        assert similarity("Plate tectonics", "tectonic plates") > 0.999
+        assert 0.7 <= similarity("Photosynthesis", "photosynthesis in plants") < 0.9
+        assert similarity("French Revolution", "American Revolution") < 0.7
+        assert similarity("plant cells", "animal cells") < 0.7
+        print("PASS: Trivial variants are close and different topics are not.")
+
+        cache = TopicCache()
+        cache._insert(SimpleNamespace(topic="Marine biology"))
+        assert similarity("Marine biology", "Marine geology") > 0.7
+        assert cache.lookup("Marine geology") is None
+        print("PASS: Topics sharing too few words never match, however similar their spelling.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+
+
+def test_topic_cache_serves_and_seeds():
+    print("--- Starting Test for TopicCache in the reading pipeline ---")
+
+    prompts = Counter()
+    passage_prompts = []
+
+    def responder(prompt: str) -> str:
+        if "Passage Generation Goals" in prompt:
+            passage_prompts.append(prompt)
+        prompts["passage_review" if "passage_quality" in prompt else
+                "question_review" if "question_set_quality" in prompt else
+                "passage" if "Passage Generation Goals" in prompt else "questions"] += 1
+        return fake_response(prompt)
+
+    set_client_factory(lambda model_name, temperature: SimulatedLLMClient(latency=0.0, responder=responder))
+    try:
+        agents = dict(
+            passage_agent=ReadingPassageAgent(), question_agent=ReadingQuestionAgent(),
+            passage_qa_agent=PassageQualityAgent(), question_qa_agent=QuestionSetQualityAgent(),
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "topics.jsonl")
+            cache = TopicCache(path)
+
+            def generate(topic: str):
+                return asyncio.run(generate_reading_task_early_exit(topic, topic_cache=cache, **agents))
+
+            first = generate("Photosynthesis")
+            assert prompts["passage"] == 1 and len(cache) == 1
+
+            prompts.clear()
+            served = generate("the photosynthesis")
+            assert served is first and not prompts, f"FAIL: A cached task cost calls: {prompts}"
+            print("PASS: An equivalent topic is served from the cache without any model call.")
+
+            seeded = generate("photosynthesis in plants")
+            assert prompts == Counter(passage=1, passage_review=1, questions=1, question_review=1), f"FAIL: {prompts}"
+            assert "Reference Passage:" in passage_prompts[-1] and '"Photosynthesis"' in passage_prompts[-1]
+            assert seeded.topic == "photosynthesis in plants" and len(cache) == 1
+            assert seeded.evaluation_result.overall_summary.final_decision == "Pass"
+            print("PASS: A similar topic gets a new, reviewed passage modelled on the cached one, and is not cached.")
+
+            prompts.clear()
+            fresh = asyncio.run(generate_reading_task_early_exit(
+                "Photosynthesis", topic_cache=cache, seen_topics=["Photosynthesis"], **agents
+            ))
+            assert fresh is not first and prompts["passage"] == 1, f"FAIL: {prompts}"
+            assert "Reference Passage:" not in passage_prompts[-1]
+            print("PASS: A topic the user has already seen is generated afresh.")
+
+            prompts.clear()
+            generate("World War 1")
+            generate("World War 2")
+            generate("random")
+            assert prompts["passage"] == 3, f"FAIL: Different topics were matched: {prompts}"
+
+            stats = cache.stats()
+            assert stats["lookups"] == 6 and stats["served"] == 1 and stats["seeded"] == 1, stats
+            assert round(stats["hit_rate"], 3) == 0.333 and stats["lookup_ms"]["p95"] < 5, stats
+            print(f"PASS: Numbers and random topics never match. Stats: {stats}")
+
+            reloaded = TopicCache(path)
+            assert len(reloaded) == 3 and reloaded.lookup("Photosynthesis").action == "serve"
+            assert len(TopicCache(path, scope="hard")) == 0
+            print("PASS: The cache reloads its entries from disk, per scope.")
+
+    except Exception as e:
+        print("\n--- 🚨 TEST FAILED 🚨 ---")
+        print(f"An error occurred during the test: {e}")
+        traceback.print_exc()
+        raise
+    finally:
+        set_client_factory(None)
+
+
+if __name__ == '__main__':
+    test_topic_similarity()
+    test_topic_cache_serves_and_seeds()
@@ -1,7 +1,23 @@
 import os
+import re
+import json
+import uuid
 import shutil
+import hashlib
 import argparse
-from agents.thought_process import QuestionThoughtProcessAgent
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from agents.thought_process import PassageThoughtProcessAgent, QuestionThoughtProcessAgent
+
+QUESTION_EXAMPLES_DIR = "prompts/reading/question_examples"
+PASSAGE_EXAMPLES_DIR = "prompts/reading/passage_examples"
+
+# The file in each example directory that identifies its source material.
+IDENTITY_FILES = {"question": "input_passage.txt", "passage": "output.txt"}
+
+_EXAMPLE_DIR = re.compile(r"^example_(\d+)$")
 
 
 def read_file(path: str) -> str:
@@ -9,46 +25,239 @@ def read_file(path: str) -> str:
         return f.read()
 
 
-def create_new_question_example(passage_path: str, json_path: str):
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ExampleSource:
+    """One example to build: the files to store and the inputs for the thought-process agent."""
+
+    name: str
+    files: Dict[str, str]
+    agent_inputs: dict
+
+
+class ExampleLibrary:
+    """
+    A directory of few-shot examples named example_01, example_02, ...
+
+    `add` writes every file into a hidden staging directory first and then
+    renames it to the next free example number. The rename both publishes the
+    example in one step (readers never see a half-written example) and claims
+    the number: if another writer took it first the rename fails and the next
+    number is tried, so concurrent threads and processes never collide.
+    """
+
+    def __init__(self, base_dir: str, identity_file: str):
+        self.base_dir = base_dir
+        self.identity_file = identity_file
+        self._lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+        self._known = {
+            _content_hash(read_file(path))
+            for path in (os.path.join(base_dir, d, identity_file) for d in self._example_dirs())
+            if os.path.exists(path)
+        }
+
+    def contains(self, identity_text: str) -> bool:
+        with self._lock:
+            return _content_hash(identity_text) in self._known
+
+    def next_number(self) -> int:
+        numbers = [int(_EXAMPLE_DIR.match(d).group(1)) for d in self._example_dirs()]
+        return max(numbers, default=0) + 1
+
+    def add(self, files: Dict[str, str]) -> str:
+        staging_dir = os.path.join(self.base_dir, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging_dir)
+        try:
+            for filename, content in files.items():
+                with open(os.path.join(staging_dir, filename), "w", encoding="utf-8") as f:
+                    f.write(content)
+            number = self.next_number()
+            while True:
+                example_dir = os.path.join(self.base_dir, f"example_{number:02d}")
+                try:
+                    os.rename(staging_dir, example_dir)
+                    break
+                except OSError:
+                    if not os.path.exists(example_dir):
+                        raise
+                    number += 1
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        with self._lock:
+            self._known.add(_content_hash(files[self.identity_file]))
+        return example_dir
+
+    def _example_dirs(self) -> List[str]:
+        return [
+            d for d in os.listdir(self.base_dir)
+            if _EXAMPLE_DIR.match(d) and os.path.isdir(os.path.join(self.base_dir, d))
+        ]
+
+
+def question_sources(path: str) -> List[ExampleSource]:
+    """
+    Collects passage/question-JSON pairs from a directory or a JSONL manifest.
+
+    A directory may hold subdirectories with input_passage.txt and output.json,
+    or flat <name>.txt/<name>.json pairs. Manifest lines look like
+    {"passage": "a.txt", "json": "a.json"}, relative to the manifest.
+    """
+    pairs = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            full_path = os.path.join(path, name)
+            if os.path.isdir(full_path):
+                pairs.append((name, os.path.join(full_path, "input_passage.txt"), os.path.join(full_path, "output.json")))
+            elif name.endswith(".txt") and os.path.exists(full_path[:-4] + ".json"):
+                pairs.append((name[:-4], full_path, full_path[:-4] + ".json"))
+    else:
+        base = os.path.dirname(os.path.abspath(path))
+        for entry in _read_manifest(path):
+            passage_path = os.path.join(base, entry["passage"])
+            pairs.append((entry.get("name", entry["passage"]), passage_path, os.path.join(base, entry["json"])))
+
+    sources = []
+    for name, passage_path, json_path in pairs:
+        if not os.path.exists(passage_path) or not os.path.exists(json_path):
+            print(f"Warning: Skipping {name} because its passage or JSON file is missing.")
+            continue
+        passage, json_output = read_file(passage_path), read_file(json_path)
+        sources.append(ExampleSource(
+            name=name,
+            files={"input_passage.txt": passage, "output.json": json_output},
+            agent_inputs={"passage": passage, "json_output": json_output},
+        ))
+    return sources
+
+
+def passage_sources(path: str) -> List[ExampleSource]:
+    """
+    Collects topic/passage pairs from a directory of subdirectories with
+    topic.txt and output.txt, or from a JSONL manifest of
+    {"topic": "...", "passage": "a.txt"} lines.
+    """
+    pairs = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            full_path = os.path.join(path, name)
+            topic_path, passage_path = os.path.join(full_path, "topic.txt"), os.path.join(full_path, "output.txt")
+            if os.path.exists(topic_path) and os.path.exists(passage_path):
+                pairs.append((name, read_file(topic_path).strip(), passage_path))
+    else:
+        base = os.path.dirname(os.path.abspath(path))
+        for entry in _read_manifest(path):
+            pairs.append((entry.get("name", entry["passage"]), entry["topic"], os.path.join(base, entry["passage"])))
+
+    sources = []
+    for name, topic, passage_path in pairs:
+        if not os.path.exists(passage_path):
+            print(f"Warning: Skipping {name} because {passage_path} is missing.")
+            continue
+        passage = read_file(passage_path)
+        sources.append(ExampleSource(
+            name=name,
+            files={"topic.txt": topic, "output.txt": passage},
+            agent_inputs={"topic": topic, "final_passage": passage},
+        ))
+    return sources
+
+
+def _read_manifest(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_examples(sources: List[ExampleSource], library: ExampleLibrary, agent, max_workers: int = 8) -> dict:
+    """
+    Generates thought processes for many sources concurrently with one shared
+    agent and adds each finished example to the library. Sources already in
+    the library are skipped, so an interrupted build can simply be rerun.
+    """
+    summary = {"created": [], "skipped": [], "failed": {}}
+    pending, seen = [], set()
+    for source in sources:
+        identity = source.files[library.identity_file]
+        if library.contains(identity) or _content_hash(identity) in seen:
+            summary["skipped"].append(source.name)
+        else:
+            seen.add(_content_hash(identity))
+            pending.append(source)
+
+    def build(source: ExampleSource) -> str:
+        thought_process = agent.run(source.agent_inputs)
+        return library.add({**source.files, "thought_process.txt": thought_process})
+
+    print(f"📚 Building {len(pending)} example(s) ({len(summary['skipped'])} already in {library.base_dir}).")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(build, source): source for source in pending}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                example_dir = future.result()
+                summary["created"].append(example_dir)
+                print(f"✅ {source.name} → {example_dir} ({len(summary['created'])}/{len(pending)})")
+            except Exception as e:
+                summary["failed"][source.name] = f"{type(e).__name__}: {e}"
+                print(f"❌ {source.name}: {e}")
+    return summary
+
+
+def create_new_question_example(passage_path: str, json_path: str, agent=None) -> Optional[str]:
     print("--- Starting: Create New Few-shot Example ---")
 
     if not os.path.exists(passage_path) or not os.path.exists(json_path):
         print(f"❌ Error: Input file not found. Check paths: {passage_path}, {json_path}")
-        return
-
-    base_dir = "prompts/reading/question_examples"
-    existing_dirs = [d for d in os.listdir(base_dir) if d.startswith("example_")]
-    next_example_num = len(existing_dirs) + 1
-    new_example_dir = os.path.join(base_dir, f"example_{next_example_num:02d}")
-    os.makedirs(new_example_dir, exist_ok=True)
-    print(f"📂 Creating new example directory: {new_example_dir}")
+        return None
 
     passage_content = read_file(passage_path)
     json_content = read_file(json_path)
 
     try:
-        agent = QuestionThoughtProcessAgent()
+        agent = agent or QuestionThoughtProcessAgent()
         inputs = {"passage": passage_content, "json_output": json_content}
         thought_process_content = agent.run(inputs)
     except Exception as e:
         print(f"❌ Error during thought process generation: {e}")
-        shutil.rmtree(new_example_dir)
-        return
+        return None
 
-    shutil.copy(passage_path, os.path.join(new_example_dir, "input_passage.txt"))
-    shutil.copy(json_path, os.path.join(new_example_dir, "output.json"))
-    with open(os.path.join(new_example_dir, "thought_process.txt"), "w", encoding="utf-8") as f:
-        f.write(thought_process_content)
+    library = ExampleLibrary(QUESTION_EXAMPLES_DIR, IDENTITY_FILES["question"])
+    new_example_dir = library.add({
+        "input_passage.txt": passage_content,
+        "output.json": json_content,
+        "thought_process.txt": thought_process_content,
+    })
 
     print("\n--- ✅ Success! ---")
     print(f"A new few-shot example has been successfully created at: {new_example_dir}")
+    return new_example_dir
 
 
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Create a new few-shot example for Reading Questions.")
-    parser.add_argument("passage_file", type=str, help="Path to the input_passage.txt file.")
-    parser.add_argument("json_file", type=str, help="Path to the output.json file.")
+    parser = argparse.ArgumentParser(description="Create new few-shot examples for Reading passages and questions.")
+    parser.add_argument("passage_file", type=str, nargs="?", help="Path to the input_passage.txt file.")
+    parser.add_argument("json_file", type=str, nargs="?", help="Path to the output.json file.")
+    parser.add_argument("--bulk", metavar="PATH", help="A directory or JSONL manifest of many examples to build.")
+    parser.add_argument("--kind", choices=["question", "passage"], default="question",
+                        help="Which example library to build in bulk mode.")
+    parser.add_argument("--workers", type=int, default=8, help="Examples generated concurrently in bulk mode.")
 
     args = parser.parse_args()
 
-    create_new_question_example(args.passage_file, args.json_file)
\ No newline at end of file
+    if args.bulk:
+        if args.kind == "question":
+            library = ExampleLibrary(QUESTION_EXAMPLES_DIR, IDENTITY_FILES["question"])
+            summary = build_examples(question_sources(args.bulk), library, QuestionThoughtProcessAgent(), args.workers)
+        else:
+            library = ExampleLibrary(PASSAGE_EXAMPLES_DIR, IDENTITY_FILES["passage"])
+            summary = build_examples(passage_sources(args.bulk), library, PassageThoughtProcessAgent(), args.workers)
+        print(f"\n🎉 Created {len(summary['created'])}, skipped {len(summary['skipped'])}, "
+              f"failed {len(summary['failed'])}.")
+    elif args.passage_file and args.json_file:
+        create_new_question_example(args.passage_file, args.json_file)
+    else:
+        parser.error("Provide passage_file and json_file, or --bulk PATH.")
@@ -0,0 +1,236 @@
+"""
+An approximate-match cache of QA-passed reading tasks, keyed by topic.
+
+Topics that differ only trivially ("Photosynthesis", "photosynthesis in
+plants", "The process of photosynthesis") should not each cost a full
+generation. Topics are normalized (case, punctuation, filler words, plurals)
+and embedded as character trigram vectors; an inverted index over the
+trigrams finds the most similar stored topic without scanning every entry.
+
+A lookup returns one of:
+
+* "serve": similarity >= `threshold`. The stored task is returned as is.
+* "seed": similarity >= `seed_threshold`. A new passage is generated with
+  the stored, already reviewed passage as a model of length and structure.
+  The result is not added to the cache.
+* None: a miss; the task is generated from scratch and, if it passes QA,
+  added to the cache.
+
+Trigram similarity alone rates topics such as "Marine biology" and "Marine
+geology" as close, so a match also needs `min_word_overlap` (Jaccard) of
+the normalized words. Topics whose numbers differ ("World War 1" / "World
+War 2") never match.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Collection, Dict, FrozenSet, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from config import ReadingTask
+
+FILLER_WORDS = frozenset("""
+a an the of in on at for to and its their introduction overview basics
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_topic(topic: str) -> str:
+    """Lowercase, accent-free words without filler words or plural -s."""
+    text = unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode("ascii").lower()
+    words = [word for word in _WORD.findall(text) if word not in FILLER_WORDS]
+    return " ".join(_singular(word) for word in words)
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def topic_vector(normalized: str) -> Dict[str, float]:
+    """L2-normalized counts of each word's padded character trigrams."""
+    grams = Counter(
+        padded[i:i + 3]
+        for word in normalized.split()
+        for padded in (f" {word} ",)
+        for i in range(len(padded) - 2)
+    )
+    norm = math.sqrt(sum(count * count for count in grams.values()))
+    return {gram: count / norm for gram, count in grams.items()} if norm else {}
+
+
+def _numbers(normalized: str) -> Tuple[str, ...]:
+    return tuple(sorted(word for word in normalized.split() if word.isdigit()))
+
+
+def _word_overlap(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+@dataclass
+class TopicMatch:
+    action: str  # "serve" or "seed"
+    topic: str  # the stored topic that matched
+    similarity: float
+    task: "ReadingTask"
+
+
+class TopicCache:
+    """
+    Stores QA-passed `ReadingTask`s and finds them again for similar topics.
+
+    With a `path` the cache is also a JSONL file: entries are loaded on
+    construction and appended as they are added, so a batch can reuse the
+    tasks of earlier runs. `scope` separates incompatible configurations
+    (for example difficulty bands); entries of another scope are ignored.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.9,
+        seed_threshold: Optional[float] = 0.8,
+        min_word_overlap: float = 0.5,
+        scope: str = "",
+        latency_window: int = 1000,
+    ):
+        if seed_threshold is not None and seed_threshold > threshold:
+            raise ValueError("seed_threshold must not be above threshold.")
+        self.path = path
+        self.threshold = threshold
+        self.seed_threshold = seed_threshold
+        self.min_word_overlap = min_word_overlap
+        self.scope = scope
+
+        self._lock = threading.Lock()
+        self._topics: List[str] = []
+        self._numbers: List[Tuple[str, ...]] = []
+        self._words: List[FrozenSet[str]] = []
+        self._tasks: List["ReadingTask"] = []
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._counts = Counter()
+        self._lookup_ms = deque(maxlen=latency_window)
+
+        if path is not None:
+            self._load(path)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def lookup(self, topic: str, exclude: Collection[str] = ()) -> Optional[TopicMatch]:
+        """
+        Finds the closest stored topic. Entries whose topic is in `exclude`
+        (for example, tasks the requester already received) are skipped.
+        """
+        start = time.perf_counter()
+        normalized = normalize_topic(topic)
+        excluded = {normalize_topic(t) for t in exclude}
+        with self._lock:
+            best, similarity = self._search(normalized, excluded)
+            action = None
+            if best is not None and similarity >= self.threshold:
+                action = "serve"
+            elif best is not None and self.seed_threshold is not None and similarity >= self.seed_threshold:
+                action = "seed"
+            self._counts["lookups"] += 1
+            self._counts[action or "misses"] += 1
+            self._lookup_ms.append((time.perf_counter() - start) * 1000)
+            if action is None:
+                return None
+            return TopicMatch(action=action, topic=self._topics[best], similarity=similarity, task=self._tasks[best])
+
+    def add(self, task: "ReadingTask") -> bool:
+        """Stores a task if it passed QA and its topic is not cached yet. Returns whether it was stored."""
+        evaluation = task.evaluation_result
+        if evaluation is None or evaluation.overall_summary.final_decision != "Pass":
+            return False
+        with self._lock:
+            if not self._insert(task):
+                return False
+            if self.path is not None:
+                record = {"scope": self.scope, "task": task.model_dump(mode="json")}
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counts["lookups"]
+            latencies = sorted(self._lookup_ms)
+            return {
+                "entries": len(self._tasks),
+                "lookups": lookups,
+                "served": self._counts["serve"],
+                "seeded": self._counts["seed"],
+                "misses": self._counts["misses"],
+                "hit_rate": round((self._counts["serve"] + self._counts["seed"]) / lookups, 3) if lookups else None,
+                "lookup_ms": {
+                    "p50": _percentile(latencies, 0.50),
+                    "p95": _percentile(latencies, 0.95),
+                    "max": round(latencies[-1], 3) if latencies else None,
+                },
+            }
+
+    def _search(self, normalized: str, excluded: Collection[str] = ()) -> Tuple[Optional[int], float]:
+        if normalized in excluded:
+            return None, 0.0
+        if normalized in self._exact:
+            return self._exact[normalized], 1.0
+        numbers, words = _numbers(normalized), frozenset(normalized.split())
+        scores = defaultdict(float)
+        for gram, weight in topic_vector(normalized).items():
+            for entry, entry_weight in self._postings.get(gram, ()):
+                scores[entry] += weight * entry_weight
+        candidates = [
+            (score, entry) for entry, score in scores.items()
+            if self._numbers[entry] == numbers
+            and _word_overlap(self._words[entry], words) >= self.min_word_overlap
+            and (not excluded or normalize_topic(self._topics[entry]) not in excluded)
+        ]
+        if not candidates:
+            return None, 0.0
+        score, entry = max(candidates, key=lambda c: (c[0], -c[1]))
+        return entry, min(score, 1.0)
+
+    def _insert(self, task: "ReadingTask") -> bool:
+        normalized = normalize_topic(task.topic)
+        if not normalized or normalized in self._exact:
+            return False
+        entry = len(self._tasks)
+        self._topics.append(task.topic)
+        self._numbers.append(_numbers(normalized))
+        self._words.append(frozenset(normalized.split()))
+        self._tasks.append(task)
+        self._exact[normalized] = entry
+        for gram, weight in topic_vector(normalized).items():
+            self._postings[gram].append((entry, weight))
+        return True
+
+    def _load(self, path: str):
+        from config import ReadingTask
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("scope", "") == self.scope:
+                    self._insert(ReadingTask.model_validate(record["task"]))
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)